@@ -0,0 +1,207 @@
+# backend/loadtest.py
+"""
+ConstructAI — in-process load test harness.
+
+Drives the FastAPI app through httpx's ASGI transport (no network, no
+uvicorn) with the mock detector and an in-memory Supabase fake, then
+prints throughput, latency percentiles and error rates as JSON.
+
+    python -m backend.loadtest --concurrency 16 --requests 400
+    python -m backend.loadtest --endpoints analyze,pathfind --out build_a.json
+    python -m backend.loadtest --endpoints analyze --elements 1000 --image-pool 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENDPOINTS = ("analyze", "annotated", "pathfind", "reports")
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _summarise(latencies_ms: list, errors: int, elapsed_s: float) -> dict:
+    values = sorted(latencies_ms)
+    total = len(values)
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "throughput_rps": round(total / elapsed_s, 2) if elapsed_s else 0.0,
+        "latency_ms": {
+            "mean": round(sum(values) / total, 2) if total else 0.0,
+            "p50": round(_percentile(values, 50), 2),
+            "p90": round(_percentile(values, 90), 2),
+            "p95": round(_percentile(values, 95), 2),
+            "p99": round(_percentile(values, 99), 2),
+            "max": round(values[-1], 2) if values else 0.0,
+        },
+    }
+
+
+def _make_scenes(count: int, seed: int, elements: int) -> list:
+    """
+    Distinct seeded synthetic scenes as (jpeg_bytes, cad_coords) pairs, so
+    the detection cache can be defeated on purpose and runs are repeatable.
+    The mock detector recognises the rendered scenes and returns their
+    ground truth, so matching works on realistic element counts.
+    """
+    from ml.yolo.synthetic import generate_scene, render_scene
+
+    scenes = []
+    for k in range(count):
+        scene = generate_scene(seed * 1000 + k, elements)
+        scenes.append((render_scene(scene), scene["cad"]))
+    return scenes
+
+
+def _build_request(endpoint: str, i: int, scenes: list, rng: random.Random, profile: str = None) -> dict:
+    if endpoint in ("analyze", "annotated"):
+        path = "/api/v1/analyze" if endpoint == "analyze" else "/api/v1/analyze/annotated-image"
+        image, cad = scenes[i % len(scenes)]
+        data = {"cad_data": json.dumps(cad), "site_name": "Load Test"}
+        if profile:
+            data["preprocess_profile"] = profile
+        return {
+            "method": "POST",
+            "url": path,
+            "files": {"site_photo": ("photo.jpg", image, "image/jpeg")},
+            "data": data,
+        }
+    if endpoint == "pathfind":
+        obstacles = [{"col": rng.randrange(2, 18), "row": rng.randrange(0, 10)} for _ in range(12)]
+        return {
+            "method": "POST",
+            "url": "/api/v1/pathfind",
+            "json": {
+                "grid_cols": 20, "grid_rows": 10,
+                "obstacle_nodes": obstacles,
+                "start": {"col": 0, "row": 5},
+                "end": {"col": 19, "row": 5},
+            },
+        }
+    return {"method": "GET", "url": "/api/v1/reports", "params": {"limit": 50}}
+
+
+async def run_load(
+    endpoints: list,
+    concurrency: int,
+    requests_per_endpoint: int,
+    image_pool: int,
+    seed: int,
+    profile: str = None,
+    elements: int = 3,
+) -> dict:
+    import httpx
+    from backend.main import app
+
+    rng = random.Random(seed)
+    scenes = _make_scenes(image_pool, seed, elements)
+
+    work = [(ep, i) for ep in endpoints for i in range(requests_per_endpoint)]
+    rng.shuffle(work)
+    results = {ep: {"latencies": [], "errors": 0} for ep in endpoints}
+
+    await app.router.startup()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=120) as client:
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in work:
+            queue.put_nowait(item)
+
+        async def worker():
+            while True:
+                try:
+                    endpoint, i = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                spec = _build_request(endpoint, i, scenes, rng, profile)
+                start = time.perf_counter()
+                try:
+                    resp = await client.request(**spec)
+                    ok = resp.status_code < 400
+                except Exception:
+                    ok = False
+                results[endpoint]["latencies"].append((time.perf_counter() - start) * 1000)
+                if not ok:
+                    results[endpoint]["errors"] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    await app.router.shutdown()
+
+    all_latencies = [v for r in results.values() for v in r["latencies"]]
+    all_errors = sum(r["errors"] for r in results.values())
+    return {
+        "config": {
+            "endpoints": endpoints,
+            "concurrency": concurrency,
+            "requests_per_endpoint": requests_per_endpoint,
+            "image_pool": image_pool,
+            "elements": elements,
+            "seed": seed,
+            "preprocess_profile": profile,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "overall": _summarise(all_latencies, all_errors, elapsed),
+        "endpoints": {
+            ep: _summarise(r["latencies"], r["errors"], elapsed) for ep, r in results.items()
+        },
+    }
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="In-process load test for the ConstructAI API")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS),
+                        help=f"comma-separated subset of: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="requests per endpoint")
+    parser.add_argument("--image-pool", type=int, default=16,
+                        help="distinct synthetic photos (1 = every analyze call after the first is a cache hit)")
+    parser.add_argument("--elements", type=int, default=3,
+                        help="CAD elements per synthetic scene (hundreds to thousands for scale runs)")
+    parser.add_argument("--supabase-latency-ms", type=float, default=5.0,
+                        help="simulated round-trip time of the fake Supabase client")
+    parser.add_argument("--preprocess-profile", help="full | downsampled | bilateral | fast | none")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoint(s): {', '.join(sorted(unknown))}")
+
+    # Mock detector path: point the model at a file that does not exist
+    os.environ["YOLO_MODEL_PATH"] = os.environ.get("LOADTEST_MODEL_PATH", "__loadtest_no_model__.pt")
+    os.environ.setdefault("REPORT_SPOOL_PATH", "loadtest_report_spool.jsonl")
+
+    from backend.utils import supabase_client
+    from backend.utils.fake_supabase import FakeSupabaseClient
+    supabase_client._client = FakeSupabaseClient(latency_ms=args.supabase_latency_ms)
+
+    report = asyncio.run(run_load(endpoints, args.concurrency, args.requests, args.image_pool, args.seed,
+                                 args.preprocess_profile, args.elements))
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
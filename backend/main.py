@@ -4,19 +4,39 @@ ConstructAI — FastAPI Backend
 The bridge between Streamlit UI, YOLO, A*, and Supabase.
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+import asyncio
 import json
 import sys
 import os
+import tempfile
+import threading
+import time
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.models.schemas import PathfindRequest, AnalyzeRequest
+from backend.models.schemas import (
+    PathfindRequest, BatchPathfindRequest, IncrementalPathfindRequest, AnalyzeRequest, ModelDeployRequest,
+)
 from ml.yolo.detector import ConstructionDetector
-from ml.astar.pathfinder import compute_reroute, AStarPathfinder
-from backend.utils.supabase_client import save_report, get_reports, update_report_status
+from ml.yolo.video import analyze_video, resolve_sample_mode
+from ml.yolo.fusion import VIEW_NAMES, fuse_views
+from ml.yolo.quality import REASON_CODES, ImageQualityError
+from ml.astar.array_astar import ArrayAStarPathfinder
+from ml.astar.pathfinder import compute_reroute, resolve_engine, AStarPathfinder
+from ml.astar.jps import JPSPathfinder
+from ml.astar.router import route_nets
+from ml.astar.incremental import replan
+from ml.astar.session import reroute_mismatches
+from backend.utils.supabase_client import get_reports, update_report_status
+from backend.utils.report_writer import ReportWriter
+from backend.utils.jobs import JobStore
+from backend.utils import metrics
+from backend.utils.inference_pool import InferencePool
+from backend.utils.model_registry import ModelRegistry
+from backend.utils.planner_store import PlannerStore
 
 app = FastAPI(
     title="ConstructAI API",
@@ -31,8 +51,307 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize detector once at startup
-detector = ConstructionDetector()
+# Detectors per model name (default / per site / per version). The default
+# one is created lazily: weights load + warm up in the background after
+# the server binds. /ready flips to 200 once that has finished — in
+# process mode, once every inference worker has done the same.
+registry = ModelRegistry(lambda path: ConstructionDetector(model_path=path, lazy=True))
+readiness = {
+    "ready": False, "stage": "starting", "load_ms": None, "warmup_ms": [], "workers_ready": 0, "error": None,
+}
+
+
+def _warm_worker():
+    """Inference-pool initializer: load + warm the default model in each worker process"""
+    detector = registry.default()
+    detector.load()
+    detector.warmup()
+
+
+# CPU-heavy work (OpenCV, YOLO, A*) runs here, never on the event loop
+inference_pool = InferencePool(initializer=_warm_worker)
+
+# Batched, spool-backed writes to detection_reports
+report_writer = ReportWriter()
+
+# Asynchronous analyses (POST /api/v1/jobs)
+job_store = JobStore()
+planner_store = PlannerStore()
+
+
+# ─────────────────────────────────────────
+# Metrics (Prometheus text on /metrics)
+# ─────────────────────────────────────────
+
+HTTP_REQUESTS = metrics.counter("http_requests_total", "HTTP requests by route, method and status")
+HTTP_ERRORS = metrics.counter("http_request_errors_total", "HTTP 5xx responses and unhandled exceptions by route")
+HTTP_LATENCY = metrics.histogram("http_request_duration_seconds", "HTTP request latency by route")
+STAGE_SECONDS = metrics.histogram("analyze_stage_seconds", "Analyze pipeline latency per stage")
+QUEUE_WAIT_SECONDS = metrics.histogram("inference_queue_wait_seconds", "Time spent waiting for an inference worker")
+RUN_SECONDS = metrics.histogram("inference_run_seconds", "Time spent running inside an inference worker")
+DETECTOR_SECONDS = metrics.histogram("detector_method_seconds", "ConstructionDetector method latency")
+ASTAR_SECONDS = metrics.histogram("astar_find_path_seconds", "A* find_path latency by engine")
+
+for _method in ("preprocess", "decode", "enhance", "detect_columnar", "draw_detections"):
+    metrics.instrument_method(ConstructionDetector, _method, DETECTOR_SECONDS, method=_method)
+metrics.instrument_method(AStarPathfinder, "find_path", ASTAR_SECONDS, engine="classic")
+metrics.instrument_method(ArrayAStarPathfinder, "find_path", ASTAR_SECONDS, engine="array")
+metrics.instrument_method(JPSPathfinder, "find_path", ASTAR_SECONDS, engine="jps")
+
+metrics.gauge("queue_depth", "Items waiting in each internal queue", fn=lambda: [
+    ({"queue": "inference_pool"}, inference_pool.stats()["pending"]),
+    ({"queue": "batcher"}, sum(d.batcher.stats()["queue_depth"] for _, d in registry.loaded() if d.batcher)),
+    ({"queue": "report_writer"}, report_writer.stats()["queued"]),
+])
+metrics.counter("detection_cache_hits_total", "Detection cache hits by tier", fn=lambda: [
+    ({"tier": "memory"}, sum(d.cache.stats()["hits"] for _, d in registry.loaded())),
+    ({"tier": "disk"}, sum(d.cache.stats()["disk_hits"] for _, d in registry.loaded())),
+])
+metrics.counter("detection_cache_misses_total", "Detection cache misses", fn=lambda: sum(d.cache.stats()["misses"] for _, d in registry.loaded()))
+metrics.counter("quality_gate_rejections_total", "Uploads stopped by the quality gate by reason", fn=lambda: [
+    ({"reason": reason}, sum(d.quality.stats()["rejected"][reason] for _, d in registry.loaded()))
+    for reason in REASON_CODES
+])
+metrics.counter("quality_gate_inference_skipped_total", "Uploads that skipped inference (rejected or duplicate)",
+                fn=lambda: sum(d.quality.stats()["inference_skipped"] for _, d in registry.loaded()))
+metrics.gauge("models_loaded", "Detectors currently held by the model registry", fn=lambda: len(registry.loaded()))
+metrics.counter("reports_spooled_total", "Reports written to the local spool", fn=lambda: report_writer.stats()["spooled"])
+
+
+def _observe_analysis(analysis: dict, timing: dict):
+    for event in analysis["stages"]:
+        STAGE_SECONDS.observe(event.get("ms", 0.0) / 1000, stage=event["stage"])
+    QUEUE_WAIT_SECONDS.observe(timing["queue_ms"] / 1000)
+    RUN_SECONDS.observe(timing["run_ms"] / 1000)
+
+
+def _route_label(request: Request) -> str:
+    """
+    Route template ("/api/v1/jobs/{job_id}") to bound label cardinality;
+    requests no route matched (404s, scanners) share one fixed label
+    """
+    route = request.scope.get("route")
+    return route.path if route is not None else "<unmatched>"
+
+
+@app.middleware("http")
+async def _record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        HTTP_ERRORS.inc(route=_route_label(request))
+        raise
+    route = _route_label(request)
+    HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    HTTP_LATENCY.observe(time.perf_counter() - start, route=route)
+    if response.status_code >= 500:
+        HTTP_ERRORS.inc(route=route)
+    return response
+
+
+def _load_and_warm_model():
+    try:
+        readiness["stage"] = "loading"
+        start = time.perf_counter()
+        detector = registry.default()
+        detector.load()
+        readiness["load_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+        readiness["stage"] = "warming"
+        readiness["warmup_ms"] = detector.warmup()
+
+        if inference_pool.kind == "process":
+            readiness["stage"] = "warming_workers"
+            readiness["workers_ready"] = inference_pool.start_workers()
+
+        readiness["stage"] = "ready"
+        readiness["ready"] = True
+        print(f"✅ Detector ready (load {readiness['load_ms']}ms, warm-up {readiness['warmup_ms']}ms)")
+    except Exception as e:
+        readiness["stage"] = "failed"
+        readiness["error"] = str(e)
+        print(f"Detector startup failed: {e}")
+
+
+@app.on_event("startup")
+def _start_background_workers():
+    report_writer.start()
+    threading.Thread(target=_load_and_warm_model, name="model-loader", daemon=True).start()
+
+
+@app.on_event("shutdown")
+def _shutdown_workers():
+    report_writer.close()
+    inference_pool.shutdown(wait=False)
+    registry.close()
+
+
+# ─────────────────────────────────────────
+# Pipeline workers (run inside inference_pool)
+# ─────────────────────────────────────────
+
+def _run_analysis(
+    model_ref: dict,
+    image_bytes: bytes,
+    cad_coords: list,
+    on_stage=None,
+    profile: str = None,
+    mode: str = None,
+    site: str = None,
+) -> dict:
+    """
+    YOLO detect → CAD compare → A* reroute for each error.
+    Every finished stage is recorded in "stages" and passed to on_stage.
+    model_ref comes from registry.resolve() in the request handler.
+    """
+    detector = registry.get(model_ref)
+    stages = []
+
+    def emit(event: dict):
+        stages.append(event)
+        if on_stage is not None:
+            on_stage(event)
+
+    detections = detector.detect_columnar(
+        image_bytes, on_stage=emit, profile=profile, mode=mode, cad_coords=cad_coords, site=site
+    )
+
+    t0 = time.perf_counter()
+    mismatches, missing = detector.match_with_cad(detections, cad_coords)
+    emit({
+        "stage": "cad_compare",
+        "ms": round((time.perf_counter() - t0) * 1000, 2),
+        "mismatches": len(mismatches),
+        "missing": len(missing),
+    })
+
+    return {
+        "total_detections": len(detections),
+        "mismatches": _reroute_mismatches(mismatches, emit),
+        "missing": missing,
+        "stages": stages,
+        "preprocess_profile": detector.resolve_profile(profile),
+        "detection_mode": detector.resolve_mode(mode),
+        "model": {"name": model_ref["name"], "version": model_ref["version"]},
+    }
+
+
+def _reroute_mismatches(mismatches: list, emit) -> list:
+    """
+    A* reroute around the error mismatches (adds "reroute" and
+    "obstacle_nodes" to each): one shared obstacle grid, one solve
+    """
+    return reroute_mismatches(mismatches, emit=emit)
+
+
+def _run_video_analysis(model_ref: dict, video_path: str, cad_coords: list, sample_mode: str = None,
+                        every_s: float = None, profile: str = None) -> dict:
+    """Sampled video frames → aggregated elements → one CAD compare → A*"""
+    stages = []
+    analysis = analyze_video(registry.get(model_ref), video_path, cad_coords, sample_mode, every_s, profile, stages.append)
+    analysis["mismatches"] = _reroute_mismatches(analysis["mismatches"], stages.append)
+    analysis["stages"] = stages
+    analysis["model"] = {"name": model_ref["name"], "version": model_ref["version"]}
+    return analysis
+
+
+def _run_view_analysis(model_ref: dict, view_bytes: list, cad_coords: list, profile: str = None) -> dict:
+    """
+    Top/Front/Left/Right photos → one batch of four → fuse per-view
+    detections → one CAD compare → A* per error.
+    """
+    detector = registry.get(model_ref)
+    stages = []
+    view_sets = detector.detect_batch(view_bytes, profile, on_stage=stages.append)
+
+    t0 = time.perf_counter()
+    fused, views_seen = fuse_views(view_sets)
+    stages.append({
+        "stage": "fusion",
+        "ms": round((time.perf_counter() - t0) * 1000, 2),
+        "per_view": [len(v) for v in view_sets],
+        "elements": len(fused),
+    })
+
+    t0 = time.perf_counter()
+    mismatches, missing = detector.match_with_cad(fused, cad_coords)
+    stages.append({
+        "stage": "cad_compare",
+        "ms": round((time.perf_counter() - t0) * 1000, 2),
+        "mismatches": len(mismatches),
+        "missing": len(missing),
+    })
+
+    return {
+        "total_detections": len(fused),
+        "mismatches": _reroute_mismatches(mismatches, stages.append),
+        "missing": missing,
+        "stages": stages,
+        "preprocess_profile": detector.resolve_profile(profile),
+        "detection_mode": "single",
+        "model": {"name": model_ref["name"], "version": model_ref["version"]},
+        "views": {name: len(v) for name, v in zip(VIEW_NAMES, view_sets)},
+    }
+
+
+def _analysis_response(analysis: dict, timing: dict) -> dict:
+    mismatches = analysis["mismatches"]
+    preprocess_ms = next((e["ms"] for e in analysis["stages"] if e["stage"] == "preprocess"), 0.0)
+    return {
+        "status": "ok",
+        "total_detections": analysis["total_detections"],
+        "errors_found": sum(1 for m in mismatches if m["is_error"]),
+        "mismatches": mismatches,
+        "missing": analysis["missing"],
+        "stages": analysis["stages"],
+        "preprocess": {"profile": analysis["preprocess_profile"], "ms": preprocess_ms},
+        "detection_mode": analysis["detection_mode"],
+        "model": analysis["model"],
+        "timing": timing,
+    }
+
+
+def _run_annotation(model_ref: dict, image_bytes: bytes, cad_coords: list, profile: str = None, mode: str = None) -> bytes:
+    detector = registry.get(model_ref)
+    detections = detector.detect_columnar(image_bytes, profile=profile, mode=mode, cad_coords=cad_coords)
+    mismatches, missing = detector.match_with_cad(detections, cad_coords)
+    return detector.draw_detections(image_bytes, mismatches, missing)
+
+
+def _quality_detail(error: ImageQualityError) -> dict:
+    report = error.report
+    return {
+        "message": str(error),
+        "reason_codes": report["reasons"],
+        "quality": {k: report[k] for k in ("blur_score", "dark_frac", "bright_frac", "mean_luma")},
+    }
+
+
+def _report_rows(mismatches: list, site_name: str, engineer: str) -> list:
+    """detection_reports rows for every error mismatch"""
+    rows = []
+    for m in mismatches:
+        if not m["is_error"]:
+            continue
+        path_result = m["reroute"]
+        routed = bool(path_result and path_result.get("success"))
+        rows.append({
+            "site_name": site_name,
+            "engineer": engineer,
+            "object_type": m["object_type"],
+            "confidence": m["confidence"],
+            "detected_x": m["detected_x"],
+            "detected_y": m["detected_y"],
+            "expected_x": m["expected_x"],
+            "expected_y": m["expected_y"],
+            "offset_inches": m["offset_inches"],
+            # No route found → NULL, never a 0 m route
+            "rerouted_path": path_result["path"] if routed else None,
+            "path_length_m": path_result["path_length"] * 0.3 if routed else None,
+            "status": "open",
+        })
+    return rows
 
 
 # ─────────────────────────────────────────
@@ -45,6 +364,9 @@ async def analyze_site(
     cad_data: str = Form(..., description="JSON string of CAD coordinates"),
     site_name: str = Form(default="Site A"),
     engineer: str = Form(default=None),
+    preprocess_profile: str = Form(default=None, description="full | downsampled | bilateral | fast | none"),
+    detection_mode: str = Form(default=None, description="single | tiled | refine"),
+    x_model: str = Header(default=None, description="Route to a registered model by name"),
 ):
     """
     Full pipeline:
@@ -57,68 +379,350 @@ async def analyze_site(
     try:
         image_bytes = await site_photo.read()
         cad_coords = json.loads(cad_data)
+        model_ref = registry.resolve(site_name, x_model)
+        detector = registry.default()
+        profile = detector.resolve_profile(preprocess_profile)
+        mode = detector.resolve_mode(detection_mode)
     except Exception as e:
         raise HTTPException(400, f"Invalid input: {str(e)}")
 
-    # ── Step 2: Vision AI ──────────────────
+    # ── Step 2 + 3: Vision AI + Logic AI (A*) in the inference pool ──
     try:
-        detections = detector.detect(image_bytes)
-        mismatches = detector.compare_with_cad(detections, cad_coords)
+        analysis, timing = await inference_pool.run(
+            _run_analysis, model_ref, image_bytes, cad_coords, None, profile, mode, site_name
+        )
+    except ImageQualityError as e:
+        raise HTTPException(422, _quality_detail(e))
+    except ValueError as e:
+        raise HTTPException(400, f"Invalid image: {str(e)}")
     except Exception as e:
         raise HTTPException(500, f"YOLO detection failed: {str(e)}")
+    _observe_analysis(analysis, timing)
 
-    # ── Step 3: Logic AI (A*) for each error ──
-    results = []
-    for m in mismatches:
-        path_result = None
-        if m["is_error"]:
-            pf = AStarPathfinder(cols=20, rows=10)
-            obstacles = pf.get_obstacle_nodes_from_mismatch(
-                m["detected_x"], m["detected_y"]
-            )
-            path_result = compute_reroute(obstacles)
-
-            # ── Step 4: Save to Supabase ──────
-            try:
-                save_report({
-                    "site_name": site_name,
-                    "engineer": engineer,
-                    "object_type": m["object_type"],
-                    "confidence": m["confidence"],
-                    "detected_x": m["detected_x"],
-                    "detected_y": m["detected_y"],
-                    "expected_x": m["expected_x"],
-                    "expected_y": m["expected_y"],
-                    "offset_inches": m["offset_inches"],
-                    "rerouted_path": path_result.get("path") if path_result else None,
-                    "path_length_m": path_result.get("path_length", 0) * 0.3 if path_result else None,
-                    "status": "open",
-                })
-            except Exception as e:
-                print(f"Supabase save warning: {e}")
-
-        results.append({**m, "reroute": path_result})
+    # ── Step 4: Save to Supabase (write-behind, batched) ──
+    report_writer.enqueue_many(_report_rows(analysis["mismatches"], site_name, engineer))
 
-    return {
-        "status": "ok",
-        "total_detections": len(detections),
-        "errors_found": sum(1 for m in mismatches if m["is_error"]),
-        "mismatches": results,
-    }
+    return _analysis_response(analysis, timing)
 
 
 @app.post("/api/v1/analyze/annotated-image")
 async def get_annotated_image(
     site_photo: UploadFile = File(...),
     cad_data: str = Form(...),
+    preprocess_profile: str = Form(default=None),
+    detection_mode: str = Form(default=None),
+    site_name: str = Form(default=None),
+    x_model: str = Header(default=None, description="Route to a registered model by name"),
 ):
     """Returns the site photo with YOLO bounding boxes drawn on it"""
     image_bytes = await site_photo.read()
     cad_coords = json.loads(cad_data)
-    detections = detector.detect(image_bytes)
-    mismatches = detector.compare_with_cad(detections, cad_coords)
-    annotated = detector.draw_detections(image_bytes, mismatches)
-    return Response(content=annotated, media_type="image/jpeg")
+    try:
+        model_ref = registry.resolve(site_name, x_model)
+        detector = registry.default()
+        profile = detector.resolve_profile(preprocess_profile)
+        mode = detector.resolve_mode(detection_mode)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    try:
+        annotated, timing = await inference_pool.run(_run_annotation, model_ref, image_bytes, cad_coords, profile, mode)
+    except ImageQualityError as e:
+        raise HTTPException(422, _quality_detail(e))
+    except ValueError as e:
+        raise HTTPException(400, f"Invalid image: {str(e)}")
+    except Exception as e:
+        # e.g. cv2.error while drawing
+        raise HTTPException(500, f"Annotation failed: {str(e)}")
+    return Response(
+        content=annotated,
+        media_type="image/jpeg",
+        headers={
+            "X-Queue-Wait-Ms": str(timing["queue_ms"]),
+            "X-Run-Ms": str(timing["run_ms"]),
+        },
+    )
+
+
+@app.post("/api/v1/analyze/views")
+async def analyze_views(
+    top: UploadFile = File(..., description="Drone / top view"),
+    front: UploadFile = File(..., description="Front view"),
+    left: UploadFile = File(..., description="Left view"),
+    right: UploadFile = File(..., description="Right view"),
+    cad_data: str = Form(..., description="JSON string of CAD coordinates"),
+    site_name: str = Form(default="Site A"),
+    engineer: str = Form(default=None),
+    preprocess_profile: str = Form(default=None, description="full | downsampled | bilateral | fast | none"),
+    x_model: str = Header(default=None, description="Route to a registered model by name"),
+):
+    """
+    Four-view inspection in one round trip: the views are preprocessed in
+    parallel, detected as one batch of four and fused into a single
+    mismatch list.
+    """
+    try:
+        view_bytes = await asyncio.gather(*(f.read() for f in (top, front, left, right)))
+        cad_coords = json.loads(cad_data)
+        model_ref = registry.resolve(site_name, x_model)
+        profile = registry.default().resolve_profile(preprocess_profile)
+    except Exception as e:
+        raise HTTPException(400, f"Invalid input: {str(e)}")
+
+    try:
+        analysis, timing = await inference_pool.run(
+            _run_view_analysis, model_ref, list(view_bytes), cad_coords, profile
+        )
+    except ImageQualityError as e:
+        raise HTTPException(422, {**_quality_detail(e), "view": VIEW_NAMES[e.report["image_index"]]})
+    except ValueError as e:
+        raise HTTPException(400, f"Invalid image: {str(e)}")
+    except Exception as e:
+        raise HTTPException(500, f"YOLO detection failed: {str(e)}")
+    _observe_analysis(analysis, timing)
+
+    report_writer.enqueue_many(_report_rows(analysis["mismatches"], site_name, engineer))
+
+    return {**_analysis_response(analysis, timing), "views": analysis["views"]}
+
+
+@app.post("/api/v1/analyze/video")
+async def analyze_video_upload(
+    site_video: UploadFile = File(..., description="Drone walk-through video (MP4/MOV)"),
+    cad_data: str = Form(..., description="JSON string of CAD coordinates"),
+    site_name: str = Form(default="Site A"),
+    engineer: str = Form(default=None),
+    sample_mode: str = Form(default=None, description="time | scene"),
+    sample_every_s: float = Form(default=None, description="Seconds between samples in time mode"),
+    preprocess_profile: str = Form(default=None, description="full | downsampled | bilateral | fast | none"),
+    x_model: str = Header(default=None, description="Route to a registered model by name"),
+):
+    """
+    Video pipeline: sample frames → drop near-duplicates → batched YOLO →
+    aggregate elements across frames → one CAD compare → A* per error.
+    """
+    try:
+        cad_coords = json.loads(cad_data)
+        model_ref = registry.resolve(site_name, x_model)
+        profile = registry.default().resolve_profile(preprocess_profile)
+        sample_mode = resolve_sample_mode(sample_mode)
+    except Exception as e:
+        raise HTTPException(400, f"Invalid input: {str(e)}")
+
+    # VideoCapture needs a seekable file; stream the upload to disk in chunks
+    suffix = os.path.splitext(site_video.filename or "")[1] or ".mp4"
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        while chunk := await site_video.read(1 << 20):
+            tmp.write(chunk)
+        video_path = tmp.name
+
+    try:
+        analysis, timing = await inference_pool.run(
+            _run_video_analysis, model_ref, video_path, cad_coords, sample_mode, sample_every_s, profile
+        )
+    except ValueError as e:
+        raise HTTPException(400, f"Invalid video: {str(e)}")
+    except Exception as e:
+        raise HTTPException(500, f"Video analysis failed: {str(e)}")
+    finally:
+        os.unlink(video_path)
+    _observe_analysis(analysis, timing)
+
+    report_writer.enqueue_many(_report_rows(analysis["mismatches"], site_name, engineer))
+
+    mismatches = analysis["mismatches"]
+    return {
+        "status": "ok",
+        "total_detections": len(analysis["elements"]),
+        "errors_found": sum(1 for m in mismatches if m["is_error"]),
+        "mismatches": mismatches,
+        "missing": analysis["missing"],
+        "elements": analysis["elements"],
+        "frames": analysis["frames"],
+        "sample_mode": analysis["sample_mode"],
+        "stages": analysis["stages"],
+        "model": analysis["model"],
+        "timing": timing,
+    }
+
+
+# ─────────────────────────────────────────
+# Async jobs: submit → poll status / stream stage events (SSE)
+# ─────────────────────────────────────────
+
+async def _run_job(
+    job,
+    model_ref: dict,
+    image_bytes: bytes,
+    cad_coords: list,
+    site_name: str,
+    engineer: str,
+    profile: str,
+    mode: str,
+):
+    job.set_status("running")
+    # Callbacks cannot cross a process boundary; replay recorded stages instead
+    live = inference_pool.kind == "thread"
+    try:
+        analysis, timing = await inference_pool.run(
+            _run_analysis, model_ref, image_bytes, cad_coords, job.emit if live else None, profile, mode, site_name
+        )
+    except Exception as e:
+        _fail_job(job, e)
+        return
+    _finish_job(job, analysis, timing, site_name, engineer, replay=not live)
+
+
+async def _run_views_job(
+    job,
+    model_ref: dict,
+    view_bytes: list,
+    cad_coords: list,
+    site_name: str,
+    engineer: str,
+    profile: str,
+):
+    job.set_status("running")
+    try:
+        analysis, timing = await inference_pool.run(_run_view_analysis, model_ref, view_bytes, cad_coords, profile)
+    except Exception as e:
+        _fail_job(job, e)
+        return
+    _finish_job(job, analysis, timing, site_name, engineer, replay=True, extra={"views": analysis["views"]})
+
+
+def _fail_job(job, error: Exception):
+    if isinstance(error, ImageQualityError):
+        # Same body as the 422 from the synchronous endpoints
+        detail = _quality_detail(error)
+        if "image_index" in error.report:
+            detail["view"] = VIEW_NAMES[error.report["image_index"]]
+        job.emit({"stage": "error", **detail})
+        job.set_status("failed", error=detail)
+        return
+    job.emit({"stage": "error", "message": str(error)})
+    job.set_status("failed", error=f"YOLO detection failed: {str(error)}")
+
+
+def _finish_job(job, analysis: dict, timing: dict, site_name: str, engineer: str, replay: bool, extra: dict = None):
+    if replay:
+        for event in analysis["stages"]:
+            job.emit(event)
+    _observe_analysis(analysis, timing)
+
+    t0 = time.perf_counter()
+    rows = _report_rows(analysis["mismatches"], site_name, engineer)
+    report_writer.enqueue_many(rows)
+    job.emit({"stage": "persist", "ms": round((time.perf_counter() - t0) * 1000, 2), "rows": len(rows)})
+
+    job.set_status("done", result={**_analysis_response(analysis, timing), **(extra or {})})
+
+
+def _job_links(job) -> dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/v1/jobs/{job.id}",
+        "events_url": f"/api/v1/jobs/{job.id}/events",
+    }
+
+
+@app.post("/api/v1/jobs", status_code=202)
+async def create_job(
+    site_photo: UploadFile = File(..., description="Drone/mobile site photo"),
+    cad_data: str = Form(..., description="JSON string of CAD coordinates"),
+    site_name: str = Form(default="Site A"),
+    engineer: str = Form(default=None),
+    preprocess_profile: str = Form(default=None, description="full | downsampled | bilateral | fast | none"),
+    detection_mode: str = Form(default=None, description="single | tiled | refine"),
+    x_model: str = Header(default=None, description="Route to a registered model by name"),
+):
+    """Start an analysis in the background and return its job id immediately"""
+    try:
+        image_bytes = await site_photo.read()
+        cad_coords = json.loads(cad_data)
+        model_ref = registry.resolve(site_name, x_model)
+        detector = registry.default()
+        profile = detector.resolve_profile(preprocess_profile)
+        mode = detector.resolve_mode(detection_mode)
+    except Exception as e:
+        raise HTTPException(400, f"Invalid input: {str(e)}")
+
+    job = job_store.create()
+    job.task = asyncio.create_task(
+        _run_job(job, model_ref, image_bytes, cad_coords, site_name, engineer, profile, mode)
+    )
+    return _job_links(job)
+
+
+@app.post("/api/v1/jobs/views", status_code=202)
+async def create_views_job(
+    top: UploadFile = File(..., description="Drone / top view"),
+    front: UploadFile = File(..., description="Front view"),
+    left: UploadFile = File(..., description="Left view"),
+    right: UploadFile = File(..., description="Right view"),
+    cad_data: str = Form(..., description="JSON string of CAD coordinates"),
+    site_name: str = Form(default="Site A"),
+    engineer: str = Form(default=None),
+    preprocess_profile: str = Form(default=None, description="full | downsampled | bilateral | fast | none"),
+    x_model: str = Header(default=None, description="Route to a registered model by name"),
+):
+    """Start a four-view analysis (see /api/v1/analyze/views) in the background; poll it like any job"""
+    try:
+        view_bytes = await asyncio.gather(*(f.read() for f in (top, front, left, right)))
+        cad_coords = json.loads(cad_data)
+        model_ref = registry.resolve(site_name, x_model)
+        profile = registry.default().resolve_profile(preprocess_profile)
+    except Exception as e:
+        raise HTTPException(400, f"Invalid input: {str(e)}")
+
+    job = job_store.create()
+    job.task = asyncio.create_task(
+        _run_views_job(job, model_ref, list(view_bytes), cad_coords, site_name, engineer, profile)
+    )
+    return _job_links(job)
+
+
+@app.get("/api/v1/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status, stages completed so far, and the result once done"""
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found or expired")
+    return job.to_dict()
+
+
+@app.get("/api/v1/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-Sent Events: one "stage" event per finished stage, then "done" / "failed" """
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found or expired")
+
+    async def stream():
+        index = 0
+        last_sent = time.monotonic()
+        while True:
+            events = job.events_since(index)
+            for event in events:
+                yield f"event: stage\ndata: {json.dumps(event)}\n\n"
+            index += len(events)
+            if events:
+                last_sent = time.monotonic()
+
+            if job.finished and not job.events_since(index):
+                yield f"event: {job.status}\ndata: {json.dumps(job.to_dict(), default=str)}\n\n"
+                return
+
+            if time.monotonic() - last_sent > 15:
+                yield ": keepalive\n\n"
+                last_sent = time.monotonic()
+            await asyncio.sleep(0.1)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # ─────────────────────────────────────────
@@ -131,10 +735,74 @@ async def pathfind(req: PathfindRequest):
     obstacles = [{"col": n.col, "row": n.row} for n in req.obstacle_nodes]
     start = {"col": req.start.col, "row": req.start.row}
     end = {"col": req.end.col, "row": req.end.row}
-    result = compute_reroute(obstacles, start, end, req.grid_cols, req.grid_rows)
+    try:
+        engine = resolve_engine(req.engine)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    result, _ = await inference_pool.run(
+        compute_reroute, obstacles, start, end, req.grid_cols, req.grid_rows, engine
+    )
     return result
 
 
+@app.post("/api/v1/pathfind/batch")
+async def pathfind_batch(req: BatchPathfindRequest):
+    """
+    Route many nets (pipes / conduits / ducts) on one grid without overlap:
+    negotiated congestion with rip-up and reroute
+    """
+    obstacles = [{"col": n.col, "row": n.row} for n in req.obstacle_nodes]
+    nets = [
+        {
+            "id": net.id,
+            "start": {"col": net.start.col, "row": net.start.row},
+            "end": {"col": net.end.col, "row": net.end.row},
+            "priority": net.priority,
+            "width": net.width,
+        }
+        for net in req.nets
+    ]
+    try:
+        result, _ = await inference_pool.run(
+            route_nets, nets, obstacles, req.grid_cols, req.grid_rows, req.max_iterations
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return result
+
+
+@app.post("/api/v1/pathfind/incremental")
+async def pathfind_incremental(req: IncrementalPathfindRequest):
+    """
+    Replan a site's saved route after obstacles moved (LPA*): only the
+    changed cells are repaired, the planner state is kept for next time
+    """
+    nodes = lambda items: [{"col": n.col, "row": n.row} for n in items]
+    start = {"col": req.start.col, "row": req.start.row}
+    end = {"col": req.end.col, "row": req.end.row}
+    obstacles = nodes(req.obstacle_nodes) if req.obstacle_nodes is not None else None
+
+    async with planner_store.lock(req.site_name, req.route_id):
+        state = None if req.reset else planner_store.get(req.site_name, req.route_id)
+        try:
+            (result, state), _ = await inference_pool.run(
+                replan, state, req.grid_cols, req.grid_rows, start, end,
+                obstacles, nodes(req.added), nodes(req.removed),
+            )
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        planner_store.put(req.site_name, req.route_id, state)
+    return {**result, "site_name": req.site_name, "route_id": req.route_id}
+
+
+@app.delete("/api/v1/pathfind/incremental/{site_name}/{route_id}")
+async def delete_incremental_route(site_name: str, route_id: str):
+    """Forget a saved route planner"""
+    if not await planner_store.delete(site_name, route_id):
+        raise HTTPException(404, "No saved planner for this site and route")
+    return {"deleted": True, "site_name": site_name, "route_id": route_id}
+
+
 # ─────────────────────────────────────────
 # PHASE 4: Reports / Supabase
 # ─────────────────────────────────────────
@@ -156,9 +824,64 @@ async def patch_status(report_id: int, status: str):
     return update_report_status(report_id, status)
 
 
+# ─────────────────────────────────────────
+# Model registry: list / deploy (background load + atomic swap)
+# ─────────────────────────────────────────
+
+@app.get("/api/v1/models")
+async def list_models():
+    """Registered and loaded models, site routing, deploys in progress"""
+    return registry.stats()
+
+
+@app.post("/api/v1/models/{name}", status_code=202)
+async def deploy_model(name: str, req: ModelDeployRequest):
+    """
+    Load req.model_path under name in the background, then swap it in.
+    Requests keep using the current version until the new one is warm.
+    Only weights inside MODEL_DIR can be deployed.
+    """
+    try:
+        model_path = registry.allowed_path(req.model_path)
+    except PermissionError as e:
+        raise HTTPException(403, str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(400, str(e))
+    try:
+        return registry.deploy(name, model_path, req.sites)
+    except ValueError as e:
+        raise HTTPException(409, str(e))
+
+
 @app.get("/health")
 async def health():
-    return {"status": "ok", "service": "ConstructAI API"}
+    detector = registry.default()
+    return {
+        "status": "ok",
+        "service": "ConstructAI API",
+        "inference_pool": inference_pool.stats(),
+        "batcher": detector.batcher.stats() if detector.batcher else None,
+        "detection_cache": detector.cache.stats(),
+        "quality_gate": detector.quality.stats(),
+        "report_writer": report_writer.stats(),
+        "jobs": len(job_store),
+        "route_planners": len(planner_store),
+        "models": registry.stats(),
+    }
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 503 until the model is loaded and warmed up"""
+    detector = registry.default()
+    body = {**readiness, "model_path": detector.model_path, "mock": detector.loaded and detector.model is None}
+    return JSONResponse(body, status_code=200 if readiness["ready"] else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus text exposition of latency histograms, counters and queue depths"""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
@@ -1,8 +1,14 @@
 # backend/models/schemas.py
-from pydantic import BaseModel
+import os
+
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
+# Largest grid side (cells) the pathfinding endpoints accept; bounds the
+# arrays one request can allocate and what a saved planner keeps on disk
+GRID_MAX_SIDE = int(os.getenv("GRID_MAX_SIDE", "2000"))
+
 
 class CADCoordinate(BaseModel):
     """One element from the CAD design layout"""
@@ -44,11 +50,12 @@ class PathNode(BaseModel):
 
 class PathfindRequest(BaseModel):
     """Input to A* pathfinding"""
-    grid_cols: int = 20
-    grid_rows: int = 10
+    grid_cols: int = Field(default=20, gt=0, le=GRID_MAX_SIDE)
+    grid_rows: int = Field(default=10, gt=0, le=GRID_MAX_SIDE)
     obstacle_nodes: List[PathNode]
     start: PathNode
     end: PathNode
+    engine: Optional[str] = None   # "classic" | "array" | "jps"; default PATHFIND_ENGINE
 
 
 class PathfindResult(BaseModel):
@@ -59,6 +66,45 @@ class PathfindResult(BaseModel):
     path_length: int
     compute_ms: float
     message: str
+    engine: Optional[str] = None
+
+
+class RouteNet(BaseModel):
+    """One pipe / conduit / duct to route in a batch"""
+    id: Optional[str] = None
+    start: PathNode
+    end: PathNode
+    priority: float = 1.0     # higher keeps its direct route under congestion
+    width: int = 1            # footprint in cells (width x width)
+
+
+class BatchPathfindRequest(BaseModel):
+    """Input to the negotiated-congestion batch router"""
+    grid_cols: int = Field(default=20, gt=0, le=GRID_MAX_SIDE)
+    grid_rows: int = Field(default=10, gt=0, le=GRID_MAX_SIDE)
+    obstacle_nodes: List[PathNode] = []
+    nets: List[RouteNet]
+    max_iterations: Optional[int] = Field(default=None, ge=1, le=500)   # default ROUTER_MAX_ITERATIONS
+
+
+class IncrementalPathfindRequest(BaseModel):
+    """Replan a saved site route after obstacles changed"""
+    site_name: str
+    route_id: str = "default"
+    grid_cols: int = Field(default=20, gt=0, le=GRID_MAX_SIDE)
+    grid_rows: int = Field(default=10, gt=0, le=GRID_MAX_SIDE)
+    start: PathNode
+    end: PathNode
+    obstacle_nodes: Optional[List[PathNode]] = None   # full set for today; only the difference is applied
+    added: List[PathNode] = []
+    removed: List[PathNode] = []
+    reset: bool = False
+
+
+class ModelDeployRequest(BaseModel):
+    """Load new weights under a model name and route sites to it"""
+    model_path: str
+    sites: List[str] = []
 
 
 class AnalyzeRequest(BaseModel):
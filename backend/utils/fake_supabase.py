@@ -0,0 +1,103 @@
+# backend/utils/fake_supabase.py
+"""
+In-memory stand-in for the Supabase client.
+Supports the query chain used by backend.utils.supabase_client:
+    table(...).insert(...) / .select(...).order(...).limit(...).eq(...)
+    / .update(...).eq(...)  →  .execute().data
+
+Install it with:  supabase_client._client = FakeSupabaseClient()
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+
+
+class _Result:
+    def __init__(self, data: list):
+        self.data = data
+
+
+class _Query:
+    def __init__(self, client: "FakeSupabaseClient", table: str):
+        self._client = client
+        self._table = table
+        self._op = "select"
+        self._payload = None
+        self._filters = []
+        self._order = None
+        self._limit = None
+
+    def insert(self, payload):
+        self._op, self._payload = "insert", payload
+        return self
+
+    def update(self, payload: dict):
+        self._op, self._payload = "update", payload
+        return self
+
+    def select(self, *columns):
+        self._op = "select"
+        return self
+
+    def eq(self, column: str, value):
+        self._filters.append((column, value))
+        return self
+
+    def order(self, column: str, desc: bool = False):
+        self._order = (column, desc)
+        return self
+
+    def limit(self, n: int):
+        self._limit = n
+        return self
+
+    def _matches(self, row: dict) -> bool:
+        return all(row.get(c) == v for c, v in self._filters)
+
+    def execute(self) -> _Result:
+        if self._client.latency_s:
+            time.sleep(self._client.latency_s)
+        with self._client._lock:
+            rows = self._client.tables.setdefault(self._table, [])
+
+            if self._op == "insert":
+                payload = self._payload if isinstance(self._payload, list) else [self._payload]
+                inserted = []
+                for item in payload:
+                    self._client._next_id += 1
+                    row = {
+                        "id": self._client._next_id,
+                        "created_at": datetime.now(timezone.utc).isoformat(),
+                        **item,
+                    }
+                    rows.append(row)
+                    inserted.append(dict(row))
+                return _Result(inserted)
+
+            if self._op == "update":
+                updated = []
+                for row in rows:
+                    if self._matches(row):
+                        row.update(self._payload)
+                        updated.append(dict(row))
+                return _Result(updated)
+
+            selected = [dict(r) for r in rows if self._matches(r)]
+            if self._order:
+                column, desc = self._order
+                selected.sort(key=lambda r: str(r.get(column, "")), reverse=desc)
+            if self._limit is not None:
+                selected = selected[:self._limit]
+            return _Result(selected)
+
+
+class FakeSupabaseClient:
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_s = latency_ms / 1000
+        self.tables: dict = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, name)
@@ -0,0 +1,123 @@
+# backend/utils/inference_pool.py
+"""
+Bounded worker pool for CPU-heavy inference work.
+Keeps OpenCV/YOLO calls off the asyncio event loop so concurrent
+requests (and /health) are not serialised behind one inference.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+def _worker_pid(hold_s: float) -> int:
+    """Occupies a worker briefly so a round of these spreads over all workers"""
+    time.sleep(hold_s)
+    return os.getpid()
+
+
+def _timed_call(fn, submitted_at: float, *args, **kwargs):
+    """
+    Runs inside the worker. Wall-clock time is used (not perf_counter)
+    so queue wait is comparable across processes.
+    """
+    started_at = time.time()
+    result = fn(*args, **kwargs)
+    finished_at = time.time()
+    return result, {
+        "queue_ms": round((started_at - submitted_at) * 1000, 2),
+        "run_ms": round((finished_at - started_at) * 1000, 2),
+    }
+
+
+class InferencePool:
+    """
+    Thread or process pool sized to the machine's cores.
+
+    INFERENCE_EXECUTOR = "thread" (default) or "process"
+    INFERENCE_WORKERS  = worker count (default: os.cpu_count())
+
+    Process mode needs picklable, module-level callables. initializer
+    (module-level, no arguments) runs once in every worker process
+    before it takes work, e.g. to load and warm up the model;
+    start_workers() spawns all workers and waits for it.
+    """
+
+    def __init__(self, kind: str = None, max_workers: int = None, initializer=None):
+        self.kind = (kind or os.getenv("INFERENCE_EXECUTOR", "thread")).lower()
+        if self.kind not in ("thread", "process"):
+            raise ValueError("INFERENCE_EXECUTOR must be: thread or process")
+        self.max_workers = max_workers or int(os.getenv("INFERENCE_WORKERS", "0")) or os.cpu_count() or 1
+        self.initializer = initializer
+        self.workers_ready = 0
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.max_workers, initializer=self.initializer
+                        )
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.max_workers, thread_name_prefix="inference"
+                        )
+        return self._executor
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Submit fn(*args, **kwargs) to the pool and await it.
+        Returns (result, {"queue_ms", "run_ms"}).
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._pending += 1
+        try:
+            future = self._get_executor().submit(_timed_call, fn, time.time(), *args, **kwargs)
+            return await asyncio.wrap_future(future, loop=loop)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+
+    def start_workers(self, timeout_s: float = 600.0) -> int:
+        """
+        Process mode: spawn every worker and block until each one has run
+        the initializer (a worker only takes tasks after it). Returns the
+        number of ready workers; raises TimeoutError, or the initializer's
+        failure as BrokenProcessPool. Thread mode: no-op.
+        """
+        if self.kind != "process":
+            return 0
+        executor = self._get_executor()
+        deadline = time.monotonic() + timeout_s
+        seen = set()
+        while len(seen) < self.max_workers:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Only {len(seen)} of {self.max_workers} inference workers started in {timeout_s}s")
+            futures = [executor.submit(_worker_pid, 0.2) for _ in range(self.max_workers)]
+            seen.update(f.result(timeout=remaining) for f in futures)
+            self.workers_ready = len(seen)
+        return len(seen)
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "workers_ready": self.workers_ready,
+            "pending": self._pending,
+            "completed": self._completed,
+        }
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -0,0 +1,94 @@
+# backend/utils/jobs.py
+"""
+In-process job store for asynchronous analyses.
+Each job records an ordered list of stage events (decode, preprocess,
+inference, cad_compare, astar, persist) that the SSE endpoint streams.
+Finished jobs are evicted JOB_TTL_S seconds after their last update.
+"""
+
+import os
+import threading
+import time
+import uuid
+from typing import Optional, Union
+
+TERMINAL_STATUSES = ("done", "failed")
+
+
+class Job:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.events: list = []
+        self.result: Optional[dict] = None
+        # str, or the 422 body (message, reason_codes, quality) for quality-gate rejections
+        self.error: Optional[Union[str, dict]] = None
+        self.task = None  # asyncio.Task running this job
+        self._lock = threading.Lock()
+
+    def emit(self, event: dict):
+        """Append one stage event. Safe to call from worker threads."""
+        with self._lock:
+            self.events.append({**event, "seq": len(self.events), "ts": round(time.time(), 3)})
+            self.updated_at = time.time()
+
+    def set_status(self, status: str, result: dict = None, error: Union[str, dict] = None):
+        with self._lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.updated_at = time.time()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def events_since(self, index: int) -> list:
+        with self._lock:
+            return self.events[index:]
+
+    def to_dict(self, include_result: bool = True) -> dict:
+        with self._lock:
+            out = {
+                "job_id": self.id,
+                "status": self.status,
+                "created_at": self.created_at,
+                "updated_at": self.updated_at,
+                "stages": [e["stage"] for e in self.events],
+                "error": self.error,
+            }
+            if include_result:
+                out["result"] = self.result
+            return out
+
+
+class JobStore:
+    def __init__(self, ttl_s: float = None):
+        self.ttl_s = ttl_s or float(os.getenv("JOB_TTL_S", "900"))
+        self._jobs: dict = {}
+        self._lock = threading.Lock()
+
+    def create(self) -> Job:
+        self.evict_expired()
+        job = Job()
+        with self._lock:
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self.evict_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def evict_expired(self):
+        cutoff = time.time() - self.ttl_s
+        with self._lock:
+            expired = [jid for jid, j in self._jobs.items() if j.finished and j.updated_at < cutoff]
+            for jid in expired:
+                del self._jobs[jid]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._jobs)
@@ -0,0 +1,180 @@
+# backend/utils/metrics.py
+"""
+Minimal Prometheus-text metrics (counters, gauges, histograms).
+Exported on /metrics. With INFERENCE_EXECUTOR=process, anything recorded
+inside worker processes stays in those processes — only pipeline stage
+timings (returned with each result) are aggregated here.
+"""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: tuple, extra: dict = None) -> str:
+    items = list(key) + list((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, fn=None):
+        self.name = name
+        self.help_text = help_text
+        self.fn = fn  # optional callback → value, or [(labels_dict, value), ...]
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def _samples(self) -> list:
+        if self.fn is not None:
+            value = self.fn()
+            if isinstance(value, list):
+                return [(f"{self.name}{_format_labels(_label_key(labels))}", v) for labels, v in value]
+            return [(self.name, value)]
+        with self._lock:
+            return [(f"{self.name}{_format_labels(k)}", v) for k, v in self._values.items()]
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for name, value in self._samples():
+            lines.append(f"{name} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            snapshot = {k: {"counts": list(v["counts"]), "sum": v["sum"], "count": v["count"]} for k, v in self._values.items()}
+        for key, series in snapshot.items():
+            for bound, count in zip(self.buckets, series["counts"]):
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': bound})} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {series['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {round(series['sum'], 6)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, fn=None) -> Counter:
+        return self._register(Counter(name, help_text, fn))
+
+    def gauge(self, name: str, help_text: str, fn=None) -> Gauge:
+        return self._register(Gauge(name, help_text, fn))
+
+    def histogram(self, name: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                lines.append(f"# {metric.name} collection failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+
+def timed(hist: Histogram, errors: Counter = None, **labels):
+    """Decorator: observe call duration in hist, count exceptions in errors"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                if errors is not None:
+                    errors.inc(**labels)
+                raise
+            finally:
+                hist.observe(time.perf_counter() - start, **labels)
+        return wrapper
+    return decorator
+
+
+def instrument_method(cls, method_name: str, hist: Histogram, errors: Counter = None, **labels):
+    """Wrap cls.method_name in place so every instance is timed"""
+    original = getattr(cls, method_name)
+    if getattr(original, "_instrumented", False):
+        return
+    wrapped = timed(hist, errors, **labels)(original)
+    wrapped._instrumented = True
+    setattr(cls, method_name, wrapped)
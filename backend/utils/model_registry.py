@@ -0,0 +1,219 @@
+# backend/utils/model_registry.py
+"""
+Registry of loaded detectors (one per model name: per site or per
+weights version).
+
+  resolve(site, name) → ref       pick the model for a request: explicit
+                                  name (X-Model header) > site mapping > default
+  get(ref)            → detector  the loaded detector for that ref; loads
+                                  it on first use (or when the ref is newer,
+                                  e.g. inside a process-pool worker)
+  deploy(name, path)              load + warm up in a background thread,
+                                  then swap atomically; requests keep using
+                                  the previous version until the swap
+
+A ref is a plain dict {"name", "model_path", "version"} so it can cross
+a process boundary. At most MODEL_REGISTRY_MAX detectors stay loaded;
+the least recently used non-default one is evicted. Replaced / evicted
+detectors are closed after MODEL_DRAIN_S so in-flight requests finish.
+
+MODELS='{"v2": "ml/yolo/v2.pt"}' and SITE_MODELS='{"Site B": "v2"}'
+seed the registry at startup. Weights deployed through the API must
+live under MODEL_DIR (see allowed_path).
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+
+DEFAULT_MODEL = "default"
+
+
+class ModelRegistry:
+    def __init__(
+        self,
+        factory: Callable[[str], object],
+        default_path: str = None,
+        max_models: int = None,
+        drain_s: float = None,
+        model_dir: str = None,
+    ):
+        """factory(model_path) → unloaded detector exposing load() / warmup() / batcher"""
+        self.factory = factory
+        self.model_dir = os.path.realpath(model_dir or os.getenv("MODEL_DIR", "ml/yolo"))
+        self.max_models = max_models or int(os.getenv("MODEL_REGISTRY_MAX", "3"))
+        self.drain_s = drain_s if drain_s is not None else float(os.getenv("MODEL_DRAIN_S", "30"))
+
+        default_path = default_path or os.getenv("YOLO_MODEL_PATH", "ml/yolo/construction_model.pt")
+        # Active configuration: name → (model_path, version)
+        self._models: Dict[str, Tuple[str, int]] = {DEFAULT_MODEL: (default_path, 1)}
+        self._sites: Dict[str, str] = {}
+        # Loaded detectors, LRU order: name → (version, detector, last_used)
+        self._loaded: "OrderedDict[str, list]" = OrderedDict()
+        self._loaded[DEFAULT_MODEL] = [1, factory(default_path), time.time()]
+        self._loading: Dict[str, dict] = {}
+        self._failed: Dict[str, dict] = {}
+        self._version = 1
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self.swaps = 0
+        self.evictions = 0
+
+        for name, path in json.loads(os.getenv("MODELS", "{}")).items():
+            self._version += 1
+            self._models[name] = (path, self._version)
+        for site, name in json.loads(os.getenv("SITE_MODELS", "{}")).items():
+            self._sites[site] = name
+
+    # ── Routing ───────────────────────────────
+    def resolve(self, site: str = None, name: str = None) -> dict:
+        """Raises ValueError for an unknown model name"""
+        with self._lock:
+            name = name or self._sites.get(site) or DEFAULT_MODEL
+            if name not in self._models:
+                raise ValueError(f"Unknown model '{name}'. Registered: {', '.join(sorted(self._models))}")
+            path, version = self._models[name]
+        return {"name": name, "model_path": path, "version": version}
+
+    def default(self):
+        """Current default detector (not necessarily loaded yet)"""
+        return self.get(self.resolve(), load=False)
+
+    def get(self, ref: dict, load: bool = True):
+        name, version = ref["name"], ref["version"]
+        with self._lock:
+            entry = self._loaded.get(name)
+            if entry is not None and entry[0] >= version:
+                entry[2] = time.time()
+                self._loaded.move_to_end(name)
+                return entry[1]
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Not loaded here yet (first use, evicted, or a newer version that
+        # this process has not seen) — load outside the registry lock
+        with load_lock:
+            with self._lock:
+                entry = self._loaded.get(name)
+                if entry is not None and entry[0] >= version:
+                    return entry[1]
+            detector = self.factory(ref["model_path"])
+            if load:
+                detector.load()
+            self._install(name, ref["model_path"], version, detector)
+            return detector
+
+    def loaded(self) -> List[Tuple[str, object]]:
+        with self._lock:
+            return [(name, entry[1]) for name, entry in self._loaded.items()]
+
+    # ── Deploy / swap ─────────────────────────
+    def allowed_path(self, model_path: str) -> str:
+        """
+        Resolved model_path if it is a file inside model_dir (symlinks
+        followed). Raises PermissionError outside it, FileNotFoundError
+        when there is no such file.
+        """
+        path = os.path.realpath(model_path)
+        if os.path.commonpath([path, self.model_dir]) != self.model_dir:
+            raise PermissionError(f"Model path must be inside the models directory {self.model_dir}")
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Model file not found: {model_path}")
+        return path
+
+    def deploy(self, name: str, model_path: str, sites: List[str] = None, background: bool = True) -> dict:
+        """Load model_path under name (new or replacing) and route sites to it"""
+        with self._lock:
+            if name in self._loading:
+                raise ValueError(f"Model '{name}' is already loading")
+            self._version += 1
+            version = self._version
+            self._loading[name] = {"model_path": model_path, "version": version, "started_at": time.time()}
+
+        def run():
+            try:
+                detector = self.factory(model_path)
+                detector.load()
+                detector.warmup()
+                self._install(name, model_path, version, detector, sites)
+                with self._lock:
+                    self._loading.pop(name, None)
+                    self._failed.pop(name, None)
+            except Exception as e:
+                with self._lock:
+                    self._failed[name] = {**self._loading.pop(name), "error": str(e)}
+                print(f"Model deploy '{name}' failed: {e}")
+
+        if background:
+            threading.Thread(target=run, name=f"model-deploy-{name}", daemon=True).start()
+        else:
+            run()
+        return {"name": name, "model_path": model_path, "version": version, "status": "loading" if background else "ready"}
+
+    def _install(self, name: str, model_path: str, version: int, detector, sites: List[str] = None):
+        """Atomic swap: config, routing and the loaded detector change together"""
+        retired = []
+        with self._lock:
+            current = self._models.get(name)
+            if current is None or current[1] <= version:
+                self._models[name] = (model_path, version)
+            previous = self._loaded.get(name)
+            if previous is not None:
+                if previous[0] >= version:
+                    return  # a newer version won the race
+                retired.append(previous[1])
+                self.swaps += 1
+            self._loaded[name] = [version, detector, time.time()]
+            self._loaded.move_to_end(name)
+            for site in sites or []:
+                self._sites[site] = name
+
+            while len(self._loaded) > self.max_models:
+                victim = next((n for n in self._loaded if n not in (DEFAULT_MODEL, name)), None)
+                if victim is None:
+                    break
+                retired.append(self._loaded.pop(victim)[1])
+                self.evictions += 1
+
+        for old in retired:
+            self._retire(old)
+
+    def _retire(self, detector):
+        """Close after a grace period so requests already holding it can finish"""
+        batcher = getattr(detector, "batcher", None)
+        if batcher is None:
+            return
+        timer = threading.Timer(self.drain_s, batcher.close)
+        timer.daemon = True
+        timer.start()
+
+    # ── Introspection / lifecycle ─────────────
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            return {
+                "max_models": self.max_models,
+                "loaded": {
+                    name: {
+                        "version": version,
+                        "model_path": getattr(det, "model_path", None),
+                        "idle_s": round(now - last_used, 1),
+                        "mock": getattr(det, "loaded", False) and getattr(det, "model", None) is None,
+                    }
+                    for name, (version, det, last_used) in self._loaded.items()
+                },
+                "models": {name: {"model_path": p, "version": v} for name, (p, v) in self._models.items()},
+                "sites": dict(self._sites),
+                "loading": {name: dict(info) for name, info in self._loading.items()},
+                "failed": {name: dict(info) for name, info in self._failed.items()},
+                "swaps": self.swaps,
+                "evictions": self.evictions,
+            }
+
+    def close(self):
+        for _, detector in self.loaded():
+            batcher = getattr(detector, "batcher", None)
+            if batcher is not None:
+                batcher.close()
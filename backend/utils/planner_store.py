@@ -0,0 +1,131 @@
+# backend/utils/planner_store.py
+"""
+Saved incremental-planner state per (site, route).
+
+States are the JSON dicts from IncrementalPlanner.to_state(). The most
+recent PLANNER_MAX_ROUTES stay in memory (LRU). When PLANNER_STATE_DIR
+is set, every state is also written there as one JSON file, so planners
+survive a restart and are shared by all workers of one host: the file
+is the source of truth, and a memory copy is only served while the
+file's mtime / size still match what this process last read or wrote.
+
+Replans of one route are serialised within a process (lock()); two
+workers replanning the same route at once each save a valid state and
+the last write wins.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class PlannerStore:
+    def __init__(self, max_routes: int = None, state_dir: str = None):
+        self.max_routes = max_routes or int(os.getenv("PLANNER_MAX_ROUTES", "500"))
+        self.state_dir = state_dir if state_dir is not None else os.getenv("PLANNER_STATE_DIR", "")
+        # (site, route) → (state, file version or None without a state_dir)
+        self._states: "OrderedDict[Tuple[str, str], tuple]" = OrderedDict()
+        # (site, route) → [asyncio.Lock, users]; only held while a request uses the route
+        self._locks = {}
+        self._lock = threading.Lock()
+        if self.state_dir:
+            os.makedirs(self.state_dir, exist_ok=True)
+
+    def _path(self, site: str, route: str) -> str:
+        digest = hashlib.sha1(f"{site}\0{route}".encode("utf-8")).hexdigest()
+        return os.path.join(self.state_dir, f"{digest}.json")
+
+    @staticmethod
+    def _version(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    @contextlib.asynccontextmanager
+    async def lock(self, site: str, route: str):
+        """
+        async with store.lock(site, route): serialises replans and deletes
+        of one route; different routes run in parallel. The lock is
+        dropped once no request is using or waiting for it.
+        """
+        key = (site, route)
+        with self._lock:
+            entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+            entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    def get(self, site: str, route: str) -> Optional[dict]:
+        key = (site, route)
+        if not self.state_dir:
+            with self._lock:
+                entry = self._states.get(key)
+                if entry is None:
+                    return None
+                self._states.move_to_end(key)
+                return entry[0]
+
+        path = self._path(site, route)
+        version = self._version(path)
+        if version is None:
+            # Deleted (possibly by another worker)
+            with self._lock:
+                self._states.pop(key, None)
+            return None
+        with self._lock:
+            entry = self._states.get(key)
+            if entry is not None and entry[1] == version:
+                self._states.move_to_end(key)
+                return entry[0]
+        try:
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        self._remember(key, state, version)
+        return state
+
+    def put(self, site: str, route: str, state: dict):
+        version = None
+        if self.state_dir:
+            path = self._path(site, route)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp, path)
+            version = self._version(path)
+        self._remember((site, route), state, version)
+
+    async def delete(self, site: str, route: str) -> bool:
+        """Forget a route once no replan of it is running"""
+        async with self.lock(site, route):
+            with self._lock:
+                found = self._states.pop((site, route), None) is not None
+            if self.state_dir and os.path.exists(self._path(site, route)):
+                os.remove(self._path(site, route))
+                found = True
+        return found
+
+    def _remember(self, key: Tuple[str, str], state: dict, version: Optional[Tuple[int, int]]):
+        with self._lock:
+            self._states[key] = (state, version)
+            self._states.move_to_end(key)
+            while len(self._states) > self.max_routes:
+                self._states.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._states)
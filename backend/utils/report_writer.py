@@ -0,0 +1,252 @@
+# backend/utils/report_writer.py
+"""
+Write-behind queue for detection_reports.
+
+Rows are enqueued by the request handlers and flushed by a background
+thread as multi-row inserts (REPORT_BATCH_SIZE rows or every
+REPORT_FLUSH_INTERVAL_S seconds). If Supabase is unreachable the batch
+is appended to a local JSONL spool (REPORT_SPOOL_PATH) and replayed in
+order once inserts succeed again — no report is dropped.
+
+Only temporary failures (network, timeouts, server errors) are spooled.
+A row the database rejects outright — bad data, a constraint or schema
+mismatch (SQLSTATE classes 22 / 23 / 42, PostgREST PGRST errors) — would
+fail the same way on every retry, so the batch is split until the
+rejected rows are isolated; those go to REPORT_DEAD_LETTER_PATH with the
+error, and the rest of the batch is written.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+from backend.utils.supabase_client import save_reports
+
+# SQLSTATE classes that no retry can fix: data exception, integrity
+# constraint violation, syntax error / undefined table or column
+PERMANENT_SQLSTATE_CLASSES = ("22", "23", "42")
+
+
+def is_permanent_error(error: Exception) -> bool:
+    """True when the store rejected the rows themselves, not the connection"""
+    code = getattr(error, "code", None)
+    if not isinstance(code, str):
+        return False
+    return code.startswith("PGRST") or code[:2] in PERMANENT_SQLSTATE_CLASSES
+
+
+class InsertInterrupted(Exception):
+    """
+    A temporary error stopped ReportWriter._insert part-way through. The
+    first `done` rows are finished (written or dead-lettered; `written`
+    of them inserted) and must not be sent again.
+    """
+
+    def __init__(self, done: int, written: int, error: Exception):
+        self.done = done
+        self.written = written
+        self.error = error
+        super().__init__(str(error))
+
+
+class ReportWriter:
+    def __init__(
+        self,
+        batch_size: int = None,
+        flush_interval_s: float = None,
+        spool_path: str = None,
+        insert_fn=None,
+        dead_letter_path: str = None,
+    ):
+        self.batch_size = batch_size or int(os.getenv("REPORT_BATCH_SIZE", "50"))
+        self.flush_interval_s = flush_interval_s or float(os.getenv("REPORT_FLUSH_INTERVAL_S", "1.0"))
+        self.spool_path = spool_path or os.getenv("REPORT_SPOOL_PATH", "report_spool.jsonl")
+        self.dead_letter_path = dead_letter_path or os.getenv("REPORT_DEAD_LETTER_PATH", "report_dead_letter.jsonl")
+        self.retry_interval_s = float(os.getenv("REPORT_RETRY_INTERVAL_S", "5.0"))
+        self.insert_fn = insert_fn or save_reports
+
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._retry_at = 0.0  # no store round trips before this while it is down
+
+        # Stats
+        self.written = 0
+        self.batches = 0
+        self.spooled = 0
+        self.replayed = 0
+        self.dead_lettered = 0
+        self.last_error = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="report-writer", daemon=True)
+            self._thread.start()
+
+    def enqueue(self, row: dict):
+        self._queue.put(row)
+
+    def enqueue_many(self, rows: list):
+        for row in rows:
+            self._queue.put(row)
+
+    # ── Background loop ───────────────────────
+    def _drain(self, block: bool) -> list:
+        rows = []
+        deadline = time.monotonic() + self.flush_interval_s
+        while len(rows) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if not block or timeout <= 0:
+                try:
+                    rows.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    break
+            try:
+                rows.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return rows
+
+    def _loop(self):
+        while not self._stop.is_set():
+            rows = self._drain(block=True)
+            self._flush(rows)
+        # Final drain on shutdown
+        while True:
+            rows = self._drain(block=False)
+            if not rows:
+                break
+            self._flush(rows)
+
+    def _flush(self, rows: list):
+        # Spooled rows go first so inserts stay in arrival order
+        if os.path.exists(self.spool_path):
+            if time.monotonic() < self._retry_at or not self._replay_spool():
+                self._spool(rows)
+                return
+        if not rows:
+            return
+        try:
+            written = self._insert(rows)
+        except InsertInterrupted as e:
+            self.last_error = str(e)
+            self._retry_at = time.monotonic() + self.retry_interval_s
+            remaining = rows[e.done:]
+            print(f"Supabase batch insert warning: {e} — spooling {len(remaining)} report(s)")
+            self._spool(remaining)
+            written = e.written
+        with self._lock:
+            self.written += written
+            if written:
+                self.batches += 1
+
+    def _insert(self, rows: list) -> int:
+        """
+        Insert rows, dead-lettering the ones the store rejects permanently.
+        Returns how many were written. A temporary error raises
+        InsertInterrupted with the prefix of rows already finished.
+        """
+        try:
+            self.insert_fn(rows)
+            return len(rows)
+        except Exception as e:
+            if not is_permanent_error(e):
+                raise InsertInterrupted(0, 0, e) from e
+            if len(rows) == 1:
+                self._dead_letter(rows[0], e)
+                return 0
+        # One bad row fails the whole multi-row insert — bisect to find it.
+        # Halves go in order, so what is finished is always a prefix.
+        mid = len(rows) // 2
+        first = self._insert(rows[:mid])
+        try:
+            return first + self._insert(rows[mid:])
+        except InsertInterrupted as e:
+            raise InsertInterrupted(mid + e.done, first + e.written, e.error) from e.error
+
+    def _dead_letter(self, row: dict, error: Exception):
+        self.last_error = str(error)
+        print(f"Supabase rejected a report permanently: {error} — moved to {self.dead_letter_path}")
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"row": row, "error": str(error), "ts": time.time()}, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        with self._lock:
+            self.dead_lettered += 1
+
+    # ── Spool (append-only JSONL) ─────────────
+    def _spool(self, rows: list):
+        if not rows:
+            return
+        with open(self.spool_path, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        with self._lock:
+            self.spooled += len(rows)
+
+    def _replay_spool(self) -> bool:
+        """Insert spooled rows in batches. Returns True once the spool is empty."""
+        with open(self.spool_path, "r", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+        sent = written = 0
+        try:
+            for i in range(0, len(rows), self.batch_size):
+                chunk = rows[i:i + self.batch_size]
+                written += self._insert(chunk)
+                sent += len(chunk)  # includes dead-lettered rows: they leave the spool too
+        except InsertInterrupted as e:
+            # Keep only the chunk's unfinished tail
+            sent += e.done
+            written += e.written
+            self.last_error = str(e)
+            self._retry_at = time.monotonic() + self.retry_interval_s
+        finally:
+            # Rewrite what is left (atomically) so a crash never duplicates or loses rows
+            remaining = rows[sent:]
+            if remaining:
+                tmp = self.spool_path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    for row in remaining:
+                        f.write(json.dumps(row, default=str) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.spool_path)
+            else:
+                os.remove(self.spool_path)
+            with self._lock:
+                self.replayed += written
+                if written:
+                    self.batches += 1
+                    self.written += written
+
+        if written:
+            print(f"✅ Replayed {written} spooled report(s) to Supabase")
+        return sent == len(rows)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "written": self.written,
+                "batches": self.batches,
+                "spooled": self.spooled,
+                "replayed": self.replayed,
+                "dead_lettered": self.dead_lettered,
+                "spool_pending": os.path.exists(self.spool_path),
+                "last_error": self.last_error,
+            }
+
+    def close(self, timeout: float = 10.0):
+        """Stop the writer after flushing everything still queued."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=timeout)
+            self._thread = None
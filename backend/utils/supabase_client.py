@@ -3,8 +3,13 @@ import os
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
+from backend.utils import metrics
+
 load_dotenv()
 
+SUPABASE_SECONDS = metrics.histogram("supabase_request_seconds", "Supabase call latency by operation")
+SUPABASE_ERRORS = metrics.counter("supabase_errors_total", "Failed Supabase calls by operation")
+
 _client: Client = None
 
 def get_supabase() -> Client:
@@ -18,6 +23,7 @@ def get_supabase() -> Client:
     return _client
 
 
+@metrics.timed(SUPABASE_SECONDS, SUPABASE_ERRORS, op="insert")
 def save_report(report_data: dict) -> dict:
     """Insert a detection report into Supabase"""
     sb = get_supabase()
@@ -25,6 +31,7 @@ def save_report(report_data: dict) -> dict:
     return result.data[0] if result.data else {}
 
 
+@metrics.timed(SUPABASE_SECONDS, SUPABASE_ERRORS, op="select")
 def get_reports(site_name: str = None, limit: int = 50) -> list:
     """Fetch recent detection reports"""
     sb = get_supabase()
@@ -35,6 +42,7 @@ def get_reports(site_name: str = None, limit: int = 50) -> list:
     return result.data or []
 
 
+@metrics.timed(SUPABASE_SECONDS, SUPABASE_ERRORS, op="update")
 def update_report_status(report_id: int, status: str) -> dict:
     """Update status of a report"""
     sb = get_supabase()
@@ -45,3 +53,13 @@ def update_report_status(report_id: int, status: str) -> dict:
         .execute()
     )
     return result.data[0] if result.data else {}
+
+
+@metrics.timed(SUPABASE_SECONDS, SUPABASE_ERRORS, op="insert_many")
+def save_reports(rows: list) -> list:
+    """Insert many detection reports in one multi-row round trip"""
+    if not rows:
+        return []
+    sb = get_supabase()
+    result = sb.table("detection_reports").insert(rows).execute()
+    return result.data or []
@@ -200,14 +200,27 @@ def draw_astar_grid(path_result, obstacle_nodes, cols=20, rows=10, width=640, he
     return img
 
 
-def call_analyze_api(image_bytes, cad_coords, site_name, engineer):
+def call_views_api(view_bytes, cad_coords, site_name, engineer, timeout_s=300):
+    """Submit all four views (top/front/left/right) as one job, then poll its status until it finishes"""
     try:
-        files = {"site_photo": ("photo.jpg", image_bytes, "image/jpeg")}
+        files = {name: (f"{name}.jpg", data, "image/jpeg") for name, data in view_bytes.items()}
         data  = {"cad_data": json.dumps(cad_coords), "site_name": site_name, "engineer": engineer or ""}
-        resp  = requests.post(f"{FASTAPI_URL}/api/v1/analyze", files=files, data=data, timeout=30)
-        if resp.status_code == 200:
-            return resp.json(), None
-        return None, f"API Error {resp.status_code}: {resp.text}"
+        resp  = requests.post(f"{FASTAPI_URL}/api/v1/jobs/views", files=files, data=data, timeout=30)
+        if resp.status_code != 202:
+            return None, f"API Error {resp.status_code}: {resp.text}"
+        status_url = f"{FASTAPI_URL}{resp.json()['status_url']}"
+        deadline   = time.time() + timeout_s
+        while time.time() < deadline:
+            job = requests.get(status_url, timeout=10).json()
+            if job["status"] == "done":
+                return job["result"], None
+            if job["status"] == "failed":
+                error = job["error"]
+                if isinstance(error, dict):  # quality gate: message + reason codes
+                    error = f"{error['message']} ({error.get('view', 'photo')})"
+                return None, f"Analysis failed: {error}"
+            time.sleep(0.5)
+        return None, f"Analysis timed out after {timeout_s}s"
     except Exception as e:
         return None, str(e)
 
@@ -217,44 +230,30 @@ def mock_analysis(cad_coords, image_bytes=b""):
     Image-aware mock analysis:
     - Different images → different detection offsets (image hash drives seed)
     - Same image → reproducible output
-    - Simulates YOLO detecting actual positions from the uploaded photo
+    - Detections come from ml.yolo.synthetic, the same generator the mock
+      detector and the load test use
     """
     import hashlib
+    from ml.astar.session import reroute_mismatches
+    from ml.yolo.synthetic import perturb_layout
 
     # Hash the uploaded image so different photos give different seeds
     img_hash = int(hashlib.sha256(image_bytes).hexdigest(), 16) if image_bytes else 0
+    truth, cad_index = perturb_layout(cad_coords, img_hash % (2 ** 32), error_rate=0.5, max_offset_px=64)
 
     mismatches = []
-    for idx, elem in enumerate(cad_coords):
-        # Mix CAD element properties + image hash for a unique-per-image seed
-        raw_seed = elem["x"] * 7 + elem["y"] * 13 + idx * 31 + (img_hash % 10000)
-        seed = raw_seed % 1000  # 0–999 range for variety
-
-        # Image drives HOW MUCH each element appears shifted (simulates YOLO detection)
-        img_factor = (img_hash >> (idx * 4)) & 0xFF   # different bits per element
-        shift_mag_x = 15 + (img_factor % 50)          # 15–64 px shift magnitude
-        shift_mag_y = 5  + (img_factor % 20)          # 5–24 px shift magnitude
-        sign_x = 1 if (seed % 2 == 0) else -1
-        sign_y = 1 if ((seed // 3) % 2 == 0) else -1
-        shift_x = sign_x * shift_mag_x
-        shift_y = sign_y * shift_mag_y
-
-        det_x   = elem["x"] + shift_x
-        det_y   = elem["y"] + shift_y
+    for det, idx in zip(truth.to_dicts(), cad_index.tolist()):
+        elem    = cad_coords[idx]
+        det_x   = det["detected_x"]
+        det_y   = det["detected_y"]
+        shift_x = det_x - elem["x"]
+        shift_y = det_y - elem["y"]
         offset  = round(math.sqrt(shift_x**2 + shift_y**2) * 0.166, 2)
-        is_err  = abs(shift_x) > 20   # flag as critical if > 20px deviation
-
-        from ml.astar.pathfinder import AStarPathfinder, compute_reroute
-        pf = AStarPathfinder(20, 10)
-        obstacles   = pf.get_obstacle_nodes_from_mismatch(det_x, det_y)
-        path_result = compute_reroute(obstacles)
-
-        # Confidence score also varies per image (simulates varying YOLO confidence)
-        conf = round(0.70 + (img_factor % 28) * 0.01, 3)
+        is_err  = math.hypot(shift_x, shift_y) > 20   # flag as critical if > 20px deviation
 
         mismatches.append({
             "object_type":    elem["object_type"],
-            "confidence":     conf,
+            "confidence":     det["confidence"],
             "detected_x":     det_x,
             "detected_y":     det_y,
             "expected_x":     elem["x"],
@@ -263,11 +262,12 @@ def mock_analysis(cad_coords, image_bytes=b""):
             "delta_y":        shift_y,
             "offset_inches":  offset,
             "is_error":       is_err,
-            "bbox":           {"x1": det_x-40, "y1": det_y-60, "x2": det_x+40, "y2": det_y+60},
-            "reroute":        path_result if is_err else None,
-            "obstacle_nodes": obstacles if is_err else [],
+            "bbox":           det["bbox"],
         })
 
+    # One shared obstacle grid for every shifted element, one solve (adds reroute / obstacle_nodes)
+    mismatches = reroute_mismatches(mismatches)
+
     return {
         "status":             "ok",
         "total_detections":   len(mismatches),
@@ -567,7 +567,12 @@ with tab_check:
         if use_mock:
             result = mock_analysis(st.session_state.cad_elements, image_bytes)
         else:
-            result, err = call_analyze_api(image_bytes, st.session_state.cad_elements, site_name, engineer)
+            views = {"top": uploaded_top, "front": uploaded_front, "left": uploaded_left, "right": uploaded_right}
+            view_bytes = {}
+            for name, upload in views.items():
+                upload.seek(0)
+                view_bytes[name] = upload.read()
+            result, err = call_views_api(view_bytes, st.session_state.cad_elements, site_name, engineer)
             if err:
                 st.error(err); st.stop()
 
@@ -739,13 +744,12 @@ with tab_alerts:
 
         from ml.astar.pathfinder import AStarPathfinder, compute_reroute
 
-        # Pick the first error's reroute, or run a demo
+        # Errors share one reroute around all shifted elements; pick it, or run a demo
         reroute_data    = None
-        obstacle_nodes  = []
+        obstacle_nodes  = [o for m in errors for o in m.get("obstacle_nodes", [])]
         for m in errors:
             if m.get("reroute") and m["reroute"].get("success"):
                 reroute_data   = m["reroute"]
-                obstacle_nodes = m.get("obstacle_nodes", [])
                 break
 
         if reroute_data is None:
@@ -0,0 +1,82 @@
+# ml/astar/array_astar.py
+"""
+Array-backed A* for floor-scale grids (thousands of cells per side).
+
+Same result as AStarPathfinder.find_path, but without per-cell objects:
+  - occupancy is the flat uint8 array of OccupancyGrid
+  - cells are integer indices (row * cols + col)
+  - g-scores and parents live in preallocated int arrays
+  - the open set holds (f, h, idx) tuples; stale entries are skipped
+    when popped instead of being de-duplicated on push
+Ties on f are broken towards the goal (lower h), which keeps the number
+of expanded cells close to the path length on open floors.
+"""
+
+import heapq
+import time
+from array import array
+
+from ml.astar.grid import OccupancyGrid
+
+_UNSEEN = 2 ** 31 - 1
+
+
+class ArrayAStarPathfinder(OccupancyGrid):
+    """4-connected, unit-cost A* over integer cell indices"""
+
+    def find_path(
+        self,
+        start_col: int, start_row: int,
+        end_col: int, end_row: int
+    ) -> dict:
+        """
+        Run A* algorithm.
+        Returns: path (list of nodes), nodes_explored, compute_ms
+        """
+        start_time = time.time()
+        if not (self.in_bounds(start_col, start_row) and self.in_bounds(end_col, end_row)):
+            return self._result(None, 0, start_time)
+
+        cols, rows = self.cols, self.rows
+        n = cols * rows
+        # bytes indexing yields plain ints — far cheaper than NumPy scalars in the loop
+        blocked = self.occupancy.tobytes()
+        g = array("i", [_UNSEEN]) * n
+        parent = array("i", [-1]) * n
+        closed = bytearray(n)
+
+        start = start_row * cols + start_col
+        goal = end_row * cols + end_col
+        g[start] = 0
+        h = abs(start_col - end_col) + abs(start_row - end_row)
+        open_set = [(h, h, start)]
+        push, pop = heapq.heappush, heapq.heappop
+        nodes_explored = 0
+
+        while open_set:
+            _, _, idx = pop(open_set)
+            if closed[idx]:
+                continue  # stale entry, a cheaper one was expanded already
+            closed[idx] = 1
+            nodes_explored += 1
+            if idx == goal:
+                return self._result(self._trace(parent, goal), nodes_explored, start_time)
+
+            row, col = divmod(idx, cols)
+            tentative_g = g[idx] + 1
+            for nidx, ncol, nrow in (
+                (idx + 1, col + 1, row),
+                (idx - 1, col - 1, row),
+                (idx + cols, col, row + 1),
+                (idx - cols, col, row - 1),
+            ):
+                if not (0 <= ncol < cols and 0 <= nrow < rows):
+                    continue
+                if blocked[nidx] or closed[nidx] or tentative_g >= g[nidx]:
+                    continue
+                g[nidx] = tentative_g
+                parent[nidx] = idx
+                h = abs(ncol - end_col) + abs(nrow - end_row)
+                push(open_set, (tentative_g + h, h, nidx))
+
+        return self._result(None, nodes_explored, start_time)
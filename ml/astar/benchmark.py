@@ -0,0 +1,134 @@
+# ml/astar/benchmark.py
+"""
+Pathfinding scaling benchmark.
+
+Routes left-centre → right-centre across square-ish floors of growing
+size, scattered with rectangular "structural element" obstacles, and
+reports time and expanded cells per engine as JSON.
+
+  python -m ml.astar.benchmark
+  python -m ml.astar.benchmark --sizes 100x100,500x500,2000x2000 --engines array --density 0.15
+
+The classic engine is skipped above --classic-max-cells; it allocates a
+Python object per expansion and takes minutes on floor-scale grids.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import List, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import numpy as np
+
+from ml.astar.pathfinder import ENGINES, create_pathfinder
+
+DEFAULT_SIZES = "20x10,100x100,250x250,500x500,1000x1000,2000x2000"
+
+
+def _parse_sizes(text: str) -> List[Tuple[int, int]]:
+    sizes = []
+    for item in text.split(","):
+        cols, _, rows = item.strip().lower().partition("x")
+        sizes.append((int(cols), int(rows or cols)))
+    return sizes
+
+
+def make_obstacles(cols: int, rows: int, density: float, seed: int) -> np.ndarray:
+    """
+    (rows, cols) bool mask of random rectangles covering roughly `density`
+    of the floor. The start / end rows at the left and right edges stay
+    free so every run has a route to find.
+    """
+    rng = np.random.default_rng(seed)
+    mask = np.zeros((rows, cols), dtype=bool)
+    max_w, max_h = max(1, cols // 20), max(1, rows // 10)
+    target = density * cols * rows
+    while mask.sum() < target:
+        batch = 64
+        w = rng.integers(1, max_w + 1, batch)
+        h = rng.integers(1, max_h + 1, batch)
+        c = rng.integers(0, cols, batch)
+        r = rng.integers(0, rows, batch)
+        for k in range(batch):
+            mask[r[k]:r[k] + h[k], c[k]:c[k] + w[k]] = True
+    mask[:, 0] = False
+    mask[:, -1] = False
+    return mask
+
+
+def run(sizes: List[Tuple[int, int]], engines: List[str], density: float, seed: int,
+        repeat: int, classic_max_cells: int) -> dict:
+    results = []
+    for cols, rows in sizes:
+        mask = make_obstacles(cols, rows, density, seed)
+        rr, cc = np.nonzero(mask)
+        obstacles = [{"col": c, "row": r} for r, c in zip(rr.tolist(), cc.tolist())]
+        start, end = (0, rows // 2), (cols - 1, rows // 2)
+
+        for engine in engines:
+            row = {"engine": engine, "cols": cols, "rows": rows, "cells": cols * rows,
+                   "obstacles": len(obstacles)}
+            if engine == "classic" and cols * rows > classic_max_cells:
+                results.append({**row, "skipped": True})
+                continue
+
+            t0 = time.perf_counter()
+            pf = create_pathfinder(cols, rows, engine)
+            pf.set_obstacles_from_list(obstacles)
+            setup_ms = (time.perf_counter() - t0) * 1000
+
+            timings = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                result = pf.find_path(start[0], start[1], end[0], end[1])
+                timings.append((time.perf_counter() - t0) * 1000)
+
+            results.append({
+                **row,
+                "setup_ms": round(setup_ms, 2),
+                "find_ms_median": round(statistics.median(timings), 2),
+                "find_ms_min": round(min(timings), 2),
+                "success": result["success"],
+                "path_length": result["path_length"],
+                "nodes_explored": result["nodes_explored"],
+            })
+            print(json.dumps(results[-1]), file=sys.stderr)
+
+    return {
+        "config": {"engines": engines, "density": density, "seed": seed, "repeat": repeat},
+        "results": results,
+    }
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Benchmark pathfinding engines by grid size")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated COLSxROWS list")
+    parser.add_argument("--engines", default=",".join(ENGINES),
+                        help=f"comma-separated subset of: {', '.join(ENGINES)}")
+    parser.add_argument("--density", type=float, default=0.2, help="fraction of cells blocked")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--classic-max-cells", type=int, default=250_000)
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    unknown = set(engines) - set(ENGINES)
+    if unknown:
+        parser.error(f"unknown engine(s): {', '.join(sorted(unknown))}")
+
+    report = run(_parse_sizes(args.sizes), engines, args.density, args.seed, args.repeat, args.classic_max_cells)
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+# ml/astar/incremental.py
+"""
+Incremental replanning for routes whose obstacles change between
+inspections (Lifelong Planning A*, the fixed-start form of D* Lite).
+
+An IncrementalPlanner keeps its search state (g / rhs per cell and the
+open queue) between calls. When a structural element moves, only the
+cells whose blocked state flipped are updated and the previous solution
+is repaired; cells the change does not affect are never expanded again.
+nodes_explored in each result counts the cells expanded by that call, so
+a small change shows up as a small number.
+
+The state serialises to a JSON-safe dict (to_state / from_state) so the
+backend can keep one planner per site and route and resume it in the
+next request, possibly in another worker process.
+
+  state = None
+  result, state = replan(state, 200, 100, start, end, obstacle_nodes=today)
+"""
+
+import base64
+import heapq
+import time
+import zlib
+from array import array
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from ml.astar.grid import OccupancyGrid
+
+_INF = 2 ** 31 - 1
+STATE_VERSION = 1
+
+
+def _pack(data: bytes) -> str:
+    return base64.b64encode(zlib.compress(data)).decode("ascii")
+
+
+def _unpack(text: str) -> bytes:
+    return zlib.decompress(base64.b64decode(text))
+
+
+class IncrementalPlanner(OccupancyGrid):
+    """4-connected, unit-cost LPA* from a fixed start to a fixed end"""
+
+    def __init__(self, cols: int = 20, rows: int = 10, start: dict = None, end: dict = None):
+        super().__init__(cols, rows)
+        self.start = start or {"col": 0, "row": rows // 2}
+        self.end = end or {"col": cols - 1, "row": rows // 2}
+        self.plans = 0
+        self.changed_cells = 0  # blocked cells flipped since the last plan()
+        self._reset_search()
+
+    # ── Obstacles ─────────────────────────────
+    def set_obstacle(self, col: int, row: int):
+        self.update_obstacles(added=[{"col": col, "row": row}])
+
+    def set_obstacles_from_list(self, obstacles: List[dict]):
+        self.update_obstacles(added=obstacles)
+
+    def update_obstacles(self, added: List[dict] = None, removed: List[dict] = None) -> int:
+        """Block / unblock cells and queue the affected ones; returns how many flipped"""
+        changed = []
+        for nodes, value in ((removed or [], 0), (added or [], 1)):
+            for node in nodes:
+                col, row = node["col"], node["row"]
+                if not self.in_bounds(col, row):
+                    continue
+                idx = row * self.cols + col
+                if self.occupancy[idx] != value:
+                    self.occupancy[idx] = value
+                    changed.append(idx)
+        if changed:
+            blocked = self.occupancy.tobytes()
+            # A cell's blocked state only changes the cost of moving into it
+            for idx in set(changed):
+                self._update_vertex(idx, blocked)
+        self.changed_cells += len(changed)
+        return len(changed)
+
+    def replace_obstacles(self, obstacles: List[dict]) -> int:
+        """Make `obstacles` the full obstacle set (e.g. today's inspection), applying only the difference"""
+        target = np.zeros_like(self.occupancy)
+        if obstacles:
+            cells = np.array([[o["col"], o["row"]] for o in obstacles], dtype=np.int64)
+            inside = (cells[:, 0] >= 0) & (cells[:, 0] < self.cols) & (cells[:, 1] >= 0) & (cells[:, 1] < self.rows)
+            target[cells[inside, 1] * self.cols + cells[inside, 0]] = 1
+        diff = np.nonzero(target != self.occupancy)[0]
+        if not len(diff):
+            return 0
+        to_nodes = lambda idx: [{"col": int(i % self.cols), "row": int(i // self.cols)} for i in idx]
+        return self.update_obstacles(
+            added=to_nodes(diff[target[diff] == 1]),
+            removed=to_nodes(diff[target[diff] == 0]),
+        )
+
+    # ── Search ────────────────────────────────
+    def find_path(
+        self,
+        start_col: int, start_row: int,
+        end_col: int, end_row: int
+    ) -> dict:
+        """Plan between new endpoints (starts a fresh search if they changed)"""
+        if (start_col, start_row, end_col, end_row) != (
+            self.start["col"], self.start["row"], self.end["col"], self.end["row"]
+        ):
+            self.start = {"col": start_col, "row": start_row}
+            self.end = {"col": end_col, "row": end_row}
+            self._reset_search()
+        return self.plan()
+
+    def plan(self) -> dict:
+        """
+        Repair (or on first use, compute) the shortest route.
+        Returns the find_path result plus "incremental" (previous search
+        reused) and "changed_cells" (obstacle flips since the last plan).
+        """
+        start_time = time.time()
+        incremental = self.plans > 0
+        changed = self.changed_cells
+        if not (self.in_bounds(self.start["col"], self.start["row"])
+                and self.in_bounds(self.end["col"], self.end["row"])):
+            result = self._result(None, 0, start_time)
+        else:
+            blocked = self.occupancy.tobytes()
+            explored = self._compute_shortest_path(blocked)
+            result = self._result(self._extract_path(blocked), explored, start_time)
+        self.plans += 1
+        self.changed_cells = 0
+        result["incremental"] = incremental
+        result["changed_cells"] = changed
+        return result
+
+    def _reset_search(self):
+        n = self.cols * self.rows
+        self.g = array("i", [_INF]) * n
+        self.rhs = array("i", [_INF]) * n
+        self._heap: List[Tuple[int, int, int]] = []
+        self._queued = {}  # idx → key currently valid for it; heap entries with another key are stale
+        self.plans = 0
+        self._start_idx = self.start["row"] * self.cols + self.start["col"]
+        self._goal_idx = self.end["row"] * self.cols + self.end["col"]
+        if self.in_bounds(self.start["col"], self.start["row"]):
+            self.rhs[self._start_idx] = 0
+            self._push(self._start_idx)
+
+    def _key(self, idx: int) -> Tuple[int, int]:
+        m = min(self.g[idx], self.rhs[idx])
+        if m >= _INF:
+            return _INF, _INF
+        row, col = divmod(idx, self.cols)
+        return m + abs(col - self.end["col"]) + abs(row - self.end["row"]), m
+
+    def _push(self, idx: int):
+        key = self._key(idx)
+        self._queued[idx] = key
+        heapq.heappush(self._heap, (key[0], key[1], idx))
+
+    def _top(self) -> Optional[Tuple[int, int, int]]:
+        heap = self._heap
+        while heap and self._queued.get(heap[0][2]) != heap[0][:2]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def _neighbors(self, idx: int) -> List[int]:
+        cols = self.cols
+        row, col = divmod(idx, cols)
+        out = []
+        if col + 1 < cols:
+            out.append(idx + 1)
+        if col > 0:
+            out.append(idx - 1)
+        if row + 1 < self.rows:
+            out.append(idx + cols)
+        if row > 0:
+            out.append(idx - cols)
+        return out
+
+    def _update_vertex(self, idx: int, blocked: bytes):
+        if idx != self._start_idx:
+            if blocked[idx]:
+                self.rhs[idx] = _INF
+            else:
+                best = min(self.g[p] for p in self._neighbors(idx))
+                self.rhs[idx] = _INF if best >= _INF else best + 1
+        self._queued.pop(idx, None)
+        if self.g[idx] != self.rhs[idx]:
+            self._push(idx)
+
+    def _compute_shortest_path(self, blocked: bytes) -> int:
+        goal = self._goal_idx
+        g, rhs = self.g, self.rhs
+        explored = 0
+        while True:
+            top = self._top()
+            if top is None or (top[:2] >= self._key(goal) and rhs[goal] == g[goal]):
+                return explored
+            heapq.heappop(self._heap)
+            idx = top[2]
+            del self._queued[idx]
+            explored += 1
+            if g[idx] > rhs[idx]:
+                g[idx] = rhs[idx]
+            else:
+                g[idx] = _INF
+                self._update_vertex(idx, blocked)
+            for s in self._neighbors(idx):
+                self._update_vertex(s, blocked)
+
+    def _extract_path(self, blocked: bytes) -> Optional[List[dict]]:
+        """Walk back from the goal along decreasing g"""
+        cols = self.cols
+        goal, start = self._goal_idx, self._start_idx
+        if self.g[goal] >= _INF:
+            return None
+        cells = [goal]
+        idx = goal
+        while idx != start:
+            idx = min(self._neighbors(idx), key=lambda p: self.g[p])
+            if self.g[idx] >= _INF or len(cells) > self.g[goal]:
+                return None  # inconsistent state; callers should reset
+            cells.append(idx)
+        cells.reverse()
+        return [{"col": i % cols, "row": i // cols} for i in cells]
+
+    # ── Persistence ───────────────────────────
+    def to_state(self) -> dict:
+        """JSON-safe snapshot of obstacles and search state"""
+        return {
+            "version": STATE_VERSION,
+            "cols": self.cols,
+            "rows": self.rows,
+            "start": dict(self.start),
+            "end": dict(self.end),
+            "plans": self.plans,
+            "changed_cells": self.changed_cells,
+            "occupancy": _pack(self.occupancy.tobytes()),
+            "g": _pack(self.g.tobytes()),
+            "rhs": _pack(self.rhs.tobytes()),
+            "queue": [[idx, k1, k2] for idx, (k1, k2) in self._queued.items()],
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "IncrementalPlanner":
+        if state.get("version") != STATE_VERSION:
+            raise ValueError(f"Unsupported planner state version {state.get('version')}")
+        planner = cls(state["cols"], state["rows"], state["start"], state["end"])
+        planner.occupancy = np.frombuffer(_unpack(state["occupancy"]), dtype=np.uint8).copy()
+        planner.g = array("i")
+        planner.g.frombytes(_unpack(state["g"]))
+        planner.rhs = array("i")
+        planner.rhs.frombytes(_unpack(state["rhs"]))
+        planner._queued = {idx: (k1, k2) for idx, k1, k2 in state["queue"]}
+        planner._heap = [(k1, k2, idx) for idx, k1, k2 in state["queue"]]
+        heapq.heapify(planner._heap)
+        planner.plans = state["plans"]
+        planner.changed_cells = state["changed_cells"]
+        n = planner.cols * planner.rows
+        if len(planner.occupancy) != n or len(planner.g) != n or len(planner.rhs) != n:
+            raise ValueError("Planner state does not match its grid size")
+        return planner
+
+
+def replan(
+    state: Optional[dict],
+    cols: int,
+    rows: int,
+    start: dict,
+    end: dict,
+    obstacle_nodes: List[dict] = None,
+    added: List[dict] = None,
+    removed: List[dict] = None,
+) -> Tuple[dict, dict]:
+    """
+    Resume the planner in `state` (or start one if there is none, or the
+    grid / endpoints changed), apply the obstacle changes and plan.
+    obstacle_nodes, when given, is the complete obstacle set; added /
+    removed are applied on top. → (result, new_state)
+    """
+    planner = None
+    if state is not None:
+        same = (state.get("cols"), state.get("rows"), state.get("start"), state.get("end")) == (cols, rows, start, end)
+        if same:
+            planner = IncrementalPlanner.from_state(state)
+    resumed = planner is not None
+    if planner is None:
+        planner = IncrementalPlanner(cols, rows, start, end)
+
+    if obstacle_nodes is not None:
+        planner.replace_obstacles(obstacle_nodes)
+    planner.update_obstacles(added=added, removed=removed)
+
+    result = planner.plan()
+    result["resumed"] = resumed
+    return result, planner.to_state()
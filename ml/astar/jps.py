@@ -0,0 +1,150 @@
+# ml/astar/jps.py
+"""
+Jump Point Search for 4-connected, unit-cost grids.
+
+Instead of pushing every neighbour, the search "jumps" in a straight
+line until it reaches a cell where something changes (the goal, or a
+cell with a forced neighbour), and only those jump points go on the open
+set. Paths are as short as A*'s; on open floors the open set shrinks to
+a handful of cells, which nodes_explored makes visible.
+
+4-connected rules (no diagonal moves, as for pipe routing):
+  horizontal jump → stop where a wall above/below ends behind us
+  vertical jump   → stop where a wall left/right ends behind us, or
+                    where a horizontal jump from this cell would stop
+  successors      → straight on + both perpendicular directions
+
+Cells are addressed in a grid padded by one blocked cell on every side
+so the inner loops need no bounds checks.
+"""
+
+import heapq
+import time
+from array import array
+
+import numpy as np
+
+from ml.astar.grid import OccupancyGrid
+
+_UNSEEN = 2 ** 31 - 1
+
+
+class JPSPathfinder(OccupancyGrid):
+    """Same find_path interface and path lengths as AStarPathfinder"""
+
+    def find_path(
+        self,
+        start_col: int, start_row: int,
+        end_col: int, end_row: int
+    ) -> dict:
+        """
+        Run Jump Point Search.
+        Returns: path (list of nodes), nodes_explored (jump points
+        expanded), compute_ms
+        """
+        start_time = time.time()
+        if not (self.in_bounds(start_col, start_row) and self.in_bounds(end_col, end_row)):
+            return self._result(None, 0, start_time)
+
+        cols, rows = self.cols, self.rows
+        width = cols + 2
+        n = width * (rows + 2)
+        # 1 = walkable, with a blocked border
+        walk = np.pad(self.occupancy.reshape(rows, cols) == 0, 1).astype(np.uint8).tobytes()
+
+        g = array("i", [_UNSEEN]) * n
+        parent = array("i", [-1]) * n
+        closed = bytearray(n)
+
+        start = (start_row + 1) * width + start_col + 1
+        goal = (end_row + 1) * width + end_col + 1
+        g[start] = 0
+        h = abs(start_col - end_col) + abs(start_row - end_row)
+        open_set = [(h, h, start)]
+        push, pop = heapq.heappush, heapq.heappop
+        nodes_explored = 0
+
+        def jump_horizontal(idx: int, step: int) -> int:
+            while True:
+                idx += step
+                if not walk[idx]:
+                    return -1
+                if idx == goal:
+                    return idx
+                if (walk[idx - width] and not walk[idx - width - step]) or \
+                        (walk[idx + width] and not walk[idx + width - step]):
+                    return idx
+
+        def jump_vertical(idx: int, step: int) -> int:
+            while True:
+                idx += step
+                if not walk[idx]:
+                    return -1
+                if idx == goal:
+                    return idx
+                if (walk[idx - 1] and not walk[idx - 1 - step]) or \
+                        (walk[idx + 1] and not walk[idx + 1 - step]):
+                    return idx
+                if jump_horizontal(idx, 1) >= 0 or jump_horizontal(idx, -1) >= 0:
+                    return idx
+
+        while open_set:
+            _, _, idx = pop(open_set)
+            if closed[idx]:
+                continue
+            closed[idx] = 1
+            nodes_explored += 1
+            if idx == goal:
+                return self._result(self._trace_jumps(parent, goal, width), nodes_explored, start_time)
+
+            row, col = divmod(idx, width)
+            p = parent[idx]
+            if p < 0:
+                directions = (1, -1, width, -width)
+            else:
+                prow, pcol = divmod(p, width)
+                if prow == row:   # arrived horizontally
+                    step = 1 if col > pcol else -1
+                    directions = (step, width, -width)
+                else:             # arrived vertically
+                    step = width if row > prow else -width
+                    directions = (step, 1, -1)
+
+            for step in directions:
+                if step in (1, -1):
+                    jp = jump_horizontal(idx, step)
+                else:
+                    jp = jump_vertical(idx, step)
+                if jp < 0 or closed[jp]:
+                    continue
+                jrow, jcol = divmod(jp, width)
+                tentative_g = g[idx] + abs(jcol - col) + abs(jrow - row)
+                if tentative_g >= g[jp]:
+                    continue
+                g[jp] = tentative_g
+                parent[jp] = idx
+                h = abs(jcol - 1 - end_col) + abs(jrow - 1 - end_row)
+                push(open_set, (tentative_g + h, h, jp))
+
+        return self._result(None, nodes_explored, start_time)
+
+    @staticmethod
+    def _trace_jumps(parent, goal: int, width: int) -> list:
+        """Expand the straight segments between jump points into single steps"""
+        jumps = []
+        idx = goal
+        while idx >= 0:
+            jumps.append(divmod(idx, width))
+            idx = parent[idx]
+        jumps.reverse()
+
+        row, col = jumps[0]
+        path = [{"col": col - 1, "row": row - 1}]
+        for jrow, jcol in jumps[1:]:
+            dr = (jrow > row) - (jrow < row)
+            dc = (jcol > col) - (jcol < col)
+            while (row, col) != (jrow, jcol):
+                row += dr
+                col += dc
+                path.append({"col": col - 1, "row": row - 1})
+        return path
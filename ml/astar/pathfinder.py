@@ -2,11 +2,29 @@
 """
 A* (A-Star) Pathfinding Algorithm
 Used to reroute MEP (pipes/wires) around shifted structural elements.
+
+Engines (PATHFIND_ENGINE or compute_reroute(engine=...)):
+  classic → AStarPathfinder below (Node objects, list-of-lists grid)
+  array   → ArrayAStarPathfinder (flat NumPy occupancy, integer cells);
+            same results, scales to floor plans of millions of cells
+  jps     → JPSPathfinder (4-connected Jump Point Search); same path
+            lengths, only jump points are expanded (see nodes_explored)
+
+The default is array (it used to be classic). Path lengths match, but
+ties between equally short routes can break differently; set
+PATHFIND_ENGINE=classic to reproduce earlier routes cell for cell.
 """
 
 import heapq
+import os
 import time
-from typing import List, Tuple, Optional
+from typing import List, Optional
+
+from ml.astar.array_astar import ArrayAStarPathfinder
+from ml.astar.grid import obstacle_nodes_for_pixel
+from ml.astar.jps import JPSPathfinder
+
+PATHFIND_ENGINE = os.getenv("PATHFIND_ENGINE", "array").lower()
 
 
 class Node:
@@ -162,18 +180,25 @@ class AStarPathfinder:
         Convert pixel coordinates of a shifted element
         to grid obstacle nodes.
         """
-        cell_w = img_width / self.cols
-        cell_h = img_height / self.rows
+        return obstacle_nodes_for_pixel(detected_x, detected_y, self.cols, self.rows, img_width, img_height)
+
+
+ENGINES = {
+    "classic": AStarPathfinder,
+    "array": ArrayAStarPathfinder,
+    "jps": JPSPathfinder,
+}
+
+
+def resolve_engine(engine: str = None) -> str:
+    engine = (engine or PATHFIND_ENGINE).lower()
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown pathfinding engine '{engine}'. Use one of: {', '.join(ENGINES)}")
+    return engine
 
-        col = int(detected_x / cell_w)
-        row = int(detected_y / cell_h)
 
-        # Mark a 3x5 block as obstacle (pillar footprint)
-        obstacles = []
-        for dc in range(-1, 3):
-            for dr in range(-2, 6):
-                obstacles.append({"col": col + dc, "row": row + dr})
-        return obstacles
+def create_pathfinder(cols: int = 20, rows: int = 10, engine: str = None):
+    return ENGINES[resolve_engine(engine)](cols, rows)
 
 
 # Convenience function for direct use
@@ -182,16 +207,20 @@ def compute_reroute(
     start: dict = None,
     end: dict = None,
     cols: int = 20,
-    rows: int = 10
+    rows: int = 10,
+    engine: str = None
 ) -> dict:
     """
     Main entry: given obstacle positions, compute new MEP route.
     Default: pipe goes from left-center to right-center of floor plan.
     """
-    pf = AStarPathfinder(cols, rows)
+    engine = resolve_engine(engine)
+    pf = create_pathfinder(cols, rows, engine)
     pf.set_obstacles_from_list(obstacle_nodes)
 
     s = start or {"col": 0, "row": rows // 2}
     e = end   or {"col": cols - 1, "row": rows // 2}
 
-    return pf.find_path(s["col"], s["row"], e["col"], e["row"])
+    result = pf.find_path(s["col"], s["row"], e["col"], e["row"])
+    result["engine"] = engine
+    return result
@@ -0,0 +1,280 @@
+# ml/astar/router.py
+"""
+Batch multi-net MEP router (negotiated congestion, PathFinder-style).
+
+Many nets — pipes, conduits, ducts — are routed on one floor grid so
+that no two of them share a cell:
+  1. every net is routed with A* where entering a cell costs
+         1 + (1 + history) * (1 + pres_fac * usage) - 1
+     summed over the cells the net's footprint would cover, divided by
+     the net's priority (high-priority nets care less about congestion
+     and keep their direct routes)
+  2. cells claimed by more than one net are "overused": their history
+     cost grows and pres_fac is multiplied by pres_mult
+  3. every net is ripped up and rerouted against the new costs, in
+     priority order, until nothing is overused, max_iterations runs out
+     or the ROUTER_TIME_BUDGET_MS budget is spent
+
+Requests are capped at ROUTER_MAX_NETS nets on a grid of at most
+ROUTER_MAX_CELLS cells, since every iteration reroutes every net.
+
+A net of width w claims a w x w square of cells around every path cell,
+and its path must keep that whole footprint clear of obstacles. The part
+of a footprint beyond the grid edge is ignored, so wide nets can start
+and end on the floor boundary.
+"""
+
+import heapq
+import os
+import time
+from array import array
+from typing import List
+
+import numpy as np
+
+from ml.astar.grid import OccupancyGrid
+
+ROUTER_MAX_ITERATIONS = int(os.getenv("ROUTER_MAX_ITERATIONS", "50"))
+ROUTER_PRES_FAC = float(os.getenv("ROUTER_PRES_FAC", "0.3"))
+ROUTER_PRES_MULT = float(os.getenv("ROUTER_PRES_MULT", "1.5"))
+ROUTER_HIST_FAC = float(os.getenv("ROUTER_HIST_FAC", "1.0"))
+ROUTER_MAX_WIDTH = int(os.getenv("ROUTER_MAX_WIDTH", "9"))
+ROUTER_MAX_NETS = int(os.getenv("ROUTER_MAX_NETS", "32"))
+ROUTER_MAX_CELLS = int(os.getenv("ROUTER_MAX_CELLS", "40000"))
+ROUTER_TIME_BUDGET_MS = float(os.getenv("ROUTER_TIME_BUDGET_MS", "10000"))
+
+
+def _offsets(width: int) -> range:
+    """Footprint offsets along one axis, centred on the path cell"""
+    lo = -((width - 1) // 2)
+    return range(lo, lo + width)
+
+
+def _box_sum(values: np.ndarray, width: int) -> np.ndarray:
+    """Sum of `values` (rows, cols) over each cell's width x width footprint (off-grid cells count 0)"""
+    rows, cols = values.shape
+    padded = np.zeros((rows + 2 * width, cols + 2 * width), dtype=values.dtype)
+    padded[width:width + rows, width:width + cols] = values
+    out = np.zeros_like(values)
+    for dr in _offsets(width):
+        for dc in _offsets(width):
+            out += padded[width + dr:width + dr + rows, width + dc:width + dc + cols]
+    return out
+
+
+class NegotiatedRouter(OccupancyGrid):
+    def __init__(
+        self,
+        cols: int = 20,
+        rows: int = 10,
+        max_iterations: int = None,
+        pres_fac: float = None,
+        pres_mult: float = None,
+        hist_fac: float = None,
+    ):
+        super().__init__(cols, rows)
+        if max_iterations is not None and max_iterations < 1:
+            raise ValueError("max_iterations must be at least 1")
+        self.max_iterations = ROUTER_MAX_ITERATIONS if max_iterations is None else max_iterations
+        self.pres_fac = ROUTER_PRES_FAC if pres_fac is None else pres_fac
+        self.pres_mult = ROUTER_PRES_MULT if pres_mult is None else pres_mult
+        self.hist_fac = ROUTER_HIST_FAC if hist_fac is None else hist_fac
+
+    def _check_nets(self, nets: List[dict]) -> List[dict]:
+        """Validate and normalise nets; raises ValueError"""
+        if not nets:
+            raise ValueError("At least one net is required")
+        if len(nets) > ROUTER_MAX_NETS:
+            raise ValueError(f"At most {ROUTER_MAX_NETS} nets can be routed in one batch")
+        if self.cols * self.rows > ROUTER_MAX_CELLS:
+            raise ValueError(f"Grid has {self.cols * self.rows} cells; the batch router allows at most {ROUTER_MAX_CELLS}")
+        out = []
+        for k, net in enumerate(nets):
+            width = 1 if net.get("width") is None else int(net["width"])
+            priority = 1.0 if net.get("priority") is None else float(net["priority"])
+            if not 1 <= width <= ROUTER_MAX_WIDTH:
+                raise ValueError(f"Net {k}: width must be between 1 and {ROUTER_MAX_WIDTH}")
+            if priority <= 0:
+                raise ValueError(f"Net {k}: priority must be positive")
+            for end in ("start", "end"):
+                if not self.in_bounds(net[end]["col"], net[end]["row"]):
+                    raise ValueError(f"Net {k}: {end} is outside the {self.cols}x{self.rows} grid")
+            out.append({
+                "id": net.get("id") or f"net-{k}",
+                "start": net["start"],
+                "end": net["end"],
+                "width": width,
+                "priority": priority,
+            })
+        return out
+
+    def route(self, nets: List[dict]) -> dict:
+        """
+        nets: [{"id", "start": {col, row}, "end": {col, row}, "priority", "width"}]
+        Returns per-net paths plus iterations, overused cells and runtime.
+        """
+        start_time = time.time()
+        nets = self._check_nets(nets)
+        cols, rows = self.cols, self.rows
+        n = cols * rows
+        occupancy = self.occupancy.reshape(rows, cols).astype(np.int32)
+        blocked = {
+            w: (_box_sum(occupancy, w) > 0).astype(np.uint8).tobytes()
+            for w in {net["width"] for net in nets}
+        }
+
+        usage = np.zeros(n, dtype=np.int32)
+        history = np.zeros(n, dtype=np.float64)
+        pres_fac = self.pres_fac
+        paths: List[list] = [None] * len(nets)
+        claims: List[np.ndarray] = [None] * len(nets)
+        reroutes = [0] * len(nets)
+        order = sorted(range(len(nets)), key=lambda i: -nets[i]["priority"])
+        nodes_explored = 0
+        iterations = 0
+        overused = np.zeros(n, dtype=bool)
+
+        for iterations in range(1, self.max_iterations + 1):
+            if iterations == 1:
+                pending = order
+            else:
+                # Rip up and reroute every routable net (rerouting only the
+                # conflicting ones just moves the congestion around); nets
+                # with no path at all stay failed
+                pending = [i for i in order if claims[i] is not None]
+
+            for i in pending:
+                net = nets[i]
+                if claims[i] is not None:
+                    usage[claims[i]] -= 1
+                    reroutes[i] += 1
+                extra = ((1 + history) * (1 + pres_fac * usage) - 1) / net["priority"]
+                step = 1 + _box_sum(extra.reshape(rows, cols), net["width"]).ravel()
+                path, explored = self._astar(net, step.tolist(), blocked[net["width"]])
+                nodes_explored += explored
+                paths[i] = path
+                claims[i] = self._claim(path, net["width"]) if path else None
+                if claims[i] is not None:
+                    usage[claims[i]] += 1
+
+            overused = usage > 1
+            if not overused.any():
+                break
+            history += self.hist_fac * np.where(overused, usage - 1, 0)
+            pres_fac *= self.pres_mult
+            if (time.time() - start_time) * 1000 > ROUTER_TIME_BUDGET_MS:
+                break
+
+        results = []
+        for i, net in enumerate(nets):
+            path = paths[i] or []
+            conflicts = int(overused[claims[i]].sum()) if claims[i] is not None else 0
+            results.append({
+                "id": net["id"],
+                "success": bool(path) and conflicts == 0,
+                "path": [{"col": idx % cols, "row": idx // cols} for idx in path],
+                "path_length": len(path),
+                "width": net["width"],
+                "priority": net["priority"],
+                "reroutes": reroutes[i],
+                "conflicts": conflicts,
+            })
+
+        overused_cells = int(overused.sum())
+        unroutable = sum(1 for p in paths if not p)
+        compute_ms = round((time.time() - start_time) * 1000, 2)
+        if unroutable:
+            message = f"{unroutable} of {len(nets)} nets have no path — check obstacles, widths or grid boundaries."
+        elif overused_cells:
+            message = f"Congestion not resolved after {iterations} iterations, {compute_ms}ms: {overused_cells} cells shared."
+        else:
+            message = f"Routed {len(nets)} nets without overlap in {iterations} iterations, {compute_ms}ms"
+        return {
+            "success": not unroutable and not overused_cells,
+            "nets": results,
+            "iterations": iterations,
+            "overused_cells": overused_cells,
+            "nodes_explored": nodes_explored,
+            "compute_ms": compute_ms,
+            "message": message,
+        }
+
+    def _claim(self, path: List[int], width: int) -> np.ndarray:
+        """Unique flat indices covered by the net's footprint along its path"""
+        idx = np.asarray(path, dtype=np.int64)
+        r, c = idx // self.cols, idx % self.cols
+        cells = []
+        for dr in _offsets(width):
+            for dc in _offsets(width):
+                rr, cc = r + dr, c + dc
+                inside = (rr >= 0) & (rr < self.rows) & (cc >= 0) & (cc < self.cols)
+                cells.append(rr[inside] * self.cols + cc[inside])
+        return np.unique(np.concatenate(cells))
+
+    def _astar(self, net: dict, step: list, blocked: bytes):
+        """Weighted 4-connected A*; step[idx] is the cost of entering idx (>= 1)"""
+        cols, rows = self.cols, self.rows
+        end_col, end_row = net["end"]["col"], net["end"]["row"]
+        start = net["start"]["row"] * cols + net["start"]["col"]
+        goal = end_row * cols + end_col
+        if blocked[start] or blocked[goal]:
+            return [], 0
+
+        n = cols * rows
+        g = array("d", [float("inf")]) * n
+        parent = array("i", [-1]) * n
+        closed = bytearray(n)
+        g[start] = 0.0
+        h = abs(net["start"]["col"] - end_col) + abs(net["start"]["row"] - end_row)
+        open_set = [(h, h, start)]
+        push, pop = heapq.heappush, heapq.heappop
+        explored = 0
+
+        while open_set:
+            _, _, idx = pop(open_set)
+            if closed[idx]:
+                continue
+            closed[idx] = 1
+            explored += 1
+            if idx == goal:
+                path = []
+                while idx >= 0:
+                    path.append(idx)
+                    idx = parent[idx]
+                path.reverse()
+                return path, explored
+
+            row, col = divmod(idx, cols)
+            base = g[idx]
+            for nidx, ncol, nrow in (
+                (idx + 1, col + 1, row),
+                (idx - 1, col - 1, row),
+                (idx + cols, col, row + 1),
+                (idx - cols, col, row - 1),
+            ):
+                if not (0 <= ncol < cols and 0 <= nrow < rows):
+                    continue
+                if blocked[nidx] or closed[nidx]:
+                    continue
+                tentative_g = base + step[nidx]
+                if tentative_g >= g[nidx]:
+                    continue
+                g[nidx] = tentative_g
+                parent[nidx] = idx
+                h = abs(ncol - end_col) + abs(nrow - end_row)
+                push(open_set, (tentative_g + h, h, nidx))
+
+        return [], explored
+
+
+def route_nets(
+    nets: List[dict],
+    obstacle_nodes: List[dict] = None,
+    cols: int = 20,
+    rows: int = 10,
+    max_iterations: int = None,
+) -> dict:
+    """Main entry for batch routing: obstacles + nets → non-overlapping routes"""
+    router = NegotiatedRouter(cols, rows, max_iterations)
+    router.set_obstacles_from_list(obstacle_nodes or [])
+    return router.route(nets)
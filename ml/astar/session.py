@@ -0,0 +1,138 @@
+# ml/astar/session.py
+"""
+Per-analysis routing session.
+
+Every shifted element of one analysis is rasterised into a single
+obstacle grid, once; every required route is then solved against that
+grid. Reroutes therefore avoid all shifted elements (not only the one
+that triggered them), and identical routes are solved only once.
+
+When the combined footprints cut the start off from the end (several
+errors on a small floor), reroute_mismatches falls back to solving each
+error against its own footprint only. Those results carry
+"scope": "element" and "blocked_by_combined": True, so callers know the
+route ignores the other shifted elements.
+
+  session = RoutingSession()
+  for m in errors:
+      session.add_element(m["detected_x"], m["detected_y"])
+  results = session.solve([session.default_route()])
+"""
+
+import time
+from typing import Callable, List, Tuple
+
+from ml.astar.grid import obstacle_nodes_for_pixel
+from ml.astar.pathfinder import create_pathfinder, resolve_engine
+
+Route = Tuple[dict, dict]
+
+
+class RoutingSession:
+    def __init__(
+        self,
+        cols: int = 20,
+        rows: int = 10,
+        engine: str = None,
+        img_width: int = 640,
+        img_height: int = 640,
+    ):
+        self.cols = cols
+        self.rows = rows
+        self.engine = resolve_engine(engine)
+        self.img_width = img_width
+        self.img_height = img_height
+        self.pathfinder = create_pathfinder(cols, rows, self.engine)
+        self.obstacle_nodes: List[dict] = []
+        self._pending: List[dict] = []
+        self._solved = {}
+        self.solves = 0  # find_path calls actually made
+
+    def add_element(self, detected_x: int, detected_y: int) -> List[dict]:
+        """Queue a shifted element's footprint; returns its obstacle nodes"""
+        nodes = obstacle_nodes_for_pixel(
+            detected_x, detected_y, self.cols, self.rows, self.img_width, self.img_height
+        )
+        self.add_obstacles(nodes)
+        return nodes
+
+    def add_obstacles(self, nodes: List[dict]):
+        """Queue grid obstacle nodes directly"""
+        self.obstacle_nodes.extend(nodes)
+        self._pending.extend(nodes)
+        self._solved.clear()  # the grid changed, earlier answers no longer hold
+
+    def default_route(self) -> Route:
+        """Left-centre → right-centre of the floor plan (as compute_reroute)"""
+        return {"col": 0, "row": self.rows // 2}, {"col": self.cols - 1, "row": self.rows // 2}
+
+    def solve(self, routes: List[Route]) -> List[dict]:
+        """One find_path result per route, all against the same obstacle grid"""
+        if self._pending:
+            self.pathfinder.set_obstacles_from_list(self._pending)
+            self._pending = []
+        results = []
+        for start, end in routes:
+            key = (start["col"], start["row"], end["col"], end["row"])
+            if key not in self._solved:
+                result = self.pathfinder.find_path(*key)
+                result["engine"] = self.engine
+                self._solved[key] = result
+                self.solves += 1
+            results.append(self._solved[key])
+        return results
+
+
+def reroute_mismatches(
+    mismatches: List[dict],
+    cols: int = 20,
+    rows: int = 10,
+    engine: str = None,
+    emit: Callable[[dict], None] = None,
+) -> List[dict]:
+    """
+    Add "reroute" and "obstacle_nodes" to every mismatch (None / [] when
+    it is not an error). All error elements share one grid and one solve;
+    if that grid has no route, each error is solved on its own footprint.
+    """
+    emit = emit or (lambda event: None)
+    t0 = time.perf_counter()
+    session = RoutingSession(cols, rows, engine)
+    footprints = [
+        session.add_element(m["detected_x"], m["detected_y"]) if m["is_error"] else []
+        for m in mismatches
+    ]
+    errors = sum(1 for m in mismatches if m["is_error"])
+    routes = [session.default_route()] * errors
+    combined = session.solve(routes)
+    fallback = 0
+
+    results = []
+    solved = iter(combined)
+    per_element = {}
+    for m, nodes in zip(mismatches, footprints):
+        path_result = None
+        if m["is_error"]:
+            path_result = {**next(solved), "scope": "combined", "blocked_by_combined": False}
+            if not path_result["success"] and errors > 1:
+                key = tuple((n["col"], n["row"]) for n in nodes)
+                if key not in per_element:
+                    own = RoutingSession(cols, rows, session.engine)
+                    own.add_obstacles(nodes)
+                    per_element[key] = own.solve([own.default_route()])[0]
+                path_result = {**per_element[key], "scope": "element", "blocked_by_combined": True}
+                fallback += 1
+        results.append({**m, "reroute": path_result, "obstacle_nodes": nodes})
+
+    if errors:
+        emit({
+            "stage": "astar",
+            "ms": round((time.perf_counter() - t0) * 1000, 2),
+            "routes": errors,
+            "solved": session.solves + len(per_element),
+            "fallback": fallback,
+            "obstacle_nodes": len(session.obstacle_nodes),
+            "success": all(r["reroute"]["success"] for r in results if r["reroute"]),
+            "engine": session.engine,
+        })
+    return results
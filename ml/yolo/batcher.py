@@ -0,0 +1,115 @@
+"""
+Dynamic micro-batching for YOLO inference.
+Concurrent single-frame requests are collected for up to
+BATCH_MAX_SIZE frames or BATCH_MAX_WAIT_MS milliseconds,
+run as one batched model call, and scattered back.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        infer_fn: Callable[[List[np.ndarray]], list],
+        max_batch_size: int = None,
+        max_wait_ms: float = None,
+    ):
+        self.infer_fn = infer_fn
+        self.max_batch_size = max_batch_size or int(os.getenv("BATCH_MAX_SIZE", "8"))
+        self.max_wait_ms = max_wait_ms if max_wait_ms is not None else float(os.getenv("BATCH_MAX_WAIT_MS", "10"))
+
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # Stats
+        self._batches = 0
+        self._frames = 0
+        self._infer_ms = 0.0
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="yolo-batcher", daemon=True)
+                    self._thread.start()
+
+    def submit(self, frame: np.ndarray) -> Future:
+        """Queue one preprocessed frame. The future resolves to that frame's result."""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((frame, future))
+        return future
+
+    def _collect(self) -> list:
+        """Block for the first frame, then fill the batch until size or deadline."""
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # re-signal shutdown after this batch
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                return
+
+            frames = [frame for frame, _ in batch]
+            start = time.perf_counter()
+            try:
+                results = self.infer_fn(frames)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            with self._lock:
+                self._batches += 1
+                self._frames += len(batch)
+                self._infer_ms += elapsed_ms
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        with self._lock:
+            avg_size = self._frames / self._batches if self._batches else 0.0
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "batches": self._batches,
+                "frames": self._frames,
+                "avg_batch_size": round(avg_size, 2),
+                "avg_fill": round(avg_size / self.max_batch_size, 3),
+                "avg_batch_ms": round(self._infer_ms / self._batches, 2) if self._batches else 0.0,
+                "queue_depth": self._queue.qsize(),
+            }
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -0,0 +1,185 @@
+"""
+Content-addressed detection cache.
+Key = SHA-256(image bytes) + model path + confidence threshold,
+so /analyze followed by /analyze/annotated-image for the same photo
+skips decode, denoise and YOLO entirely.
+
+Tier 1: in-memory LRU bounded by DETECTION_CACHE_MAX_BYTES
+Tier 2: optional on-disk store in DETECTION_CACHE_DIR bounded by
+        DETECTION_CACHE_DISK_MAX_BYTES (oldest files evicted first).
+        Disk usage is tracked with a running byte counter; the directory
+        is only scanned at startup and when the counter passes the cap,
+        and eviction then goes down to 90% of it so scans stay rare.
+
+Values are DetectionSet.to_json() dicts.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# Disk eviction frees space down to this fraction of the cap
+_DISK_LOW_WATER = 0.9
+
+
+class DetectionCache:
+    def __init__(
+        self,
+        max_bytes: int = None,
+        disk_dir: str = None,
+        disk_max_bytes: int = None,
+    ):
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("DETECTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        self.disk_dir = disk_dir or os.getenv("DETECTION_CACHE_DIR") or None
+        self.disk_max_bytes = disk_max_bytes if disk_max_bytes is not None else int(os.getenv("DETECTION_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._disk_bytes = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+
+    @staticmethod
+    def make_key(image_bytes: bytes, *parts) -> str:
+        """SHA-256 of the image plus everything that changes the result"""
+        h = hashlib.sha256(image_bytes)
+        for part in parts:
+            h.update(b"\0")
+            h.update(str(part).encode("utf-8"))
+        return h.hexdigest()
+
+    # ── Memory tier ───────────────────────────
+    def _put_memory(self, key: str, payload: str):
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._entries[key] = payload
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    # ── Disk tier ─────────────────────────────
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        try:
+            with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                payload = f.read()
+            os.utime(self._disk_path(key))  # bump recency for eviction
+            return payload
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, payload: str):
+        path = self._disk_path(key)
+        tmp = path + ".tmp"
+        try:
+            try:
+                replaced = os.stat(path).st_size
+            except OSError:
+                replaced = 0
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(payload)
+            size = os.stat(tmp).st_size
+            os.replace(tmp, path)
+            with self._lock:
+                self._disk_bytes += size - replaced
+                over = self._disk_bytes > self.disk_max_bytes
+            if over:
+                self._evict_disk()
+        except OSError as e:
+            print(f"Detection cache disk write warning: {e}")
+
+    def _scan_disk(self) -> list:
+        """(mtime, size, path) of every cached file"""
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.disk_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        return files
+
+    def _evict_disk(self):
+        """Oldest files first, down to the low-water mark; resyncs the byte counter"""
+        files = sorted(self._scan_disk())
+        total = sum(size for _, size, _ in files)
+        target = self.disk_max_bytes * _DISK_LOW_WATER
+        evicted = 0
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                evicted += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+            self.evictions += evicted
+
+    # ── Public API ────────────────────────────
+    def get(self, key: str) -> Optional[dict]:
+        """Cached DetectionSet JSON dict, or None"""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(payload)
+
+        if self.disk_dir:
+            payload = self._read_disk(key)
+            if payload is not None:
+                with self._lock:
+                    self._put_memory(key, payload)
+                    self.disk_hits += 1
+                return json.loads(payload)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, detections: dict):
+        """detections: DetectionSet.to_json()"""
+        payload = json.dumps(detections)
+        with self._lock:
+            self._put_memory(key, payload)
+        if self.disk_dir:
+            self._write_disk(key, payload)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_dir": self.disk_dir,
+                "disk_bytes": self._disk_bytes,
+            }
@@ -0,0 +1,130 @@
+"""
+Columnar (struct-of-arrays) detection results.
+Engines hand back NumPy arrays and they stay arrays through tiling, NMS
+and CAD matching — per-detection dicts are only built at the JSON
+boundary with to_dicts().
+"""
+
+from typing import List, Optional
+
+import numpy as np
+
+CONSTRUCTION_CLASSES = ["Pillar", "Beam", "Column", "Wall", "Slab", "Footing"]
+_CLASS_IDS = {name.lower(): i for i, name in enumerate(CONSTRUCTION_CLASSES)}
+
+
+def class_name(cls_id: int) -> str:
+    return CONSTRUCTION_CLASSES[cls_id] if 0 <= cls_id < len(CONSTRUCTION_CLASSES) else f"Class_{cls_id}"
+
+
+def class_id(name: str) -> int:
+    key = name.lower()
+    if key in _CLASS_IDS:
+        return _CLASS_IDS[key]
+    if key.startswith("class_") and key[6:].isdigit():
+        return int(key[6:])
+    raise ValueError(f"Unknown object type '{name}'")
+
+
+class DetectionSet:
+    """
+    N detections as parallel arrays:
+      xyxy  (N, 4) int32   — box corners in the 640x640 frame
+      conf  (N,)   float32
+      cls   (N,)   int64   — index into CONSTRUCTION_CLASSES
+      native_xyxy (N, 4) int32, optional — box in source-image pixels
+    """
+
+    __slots__ = ("xyxy", "conf", "cls", "native_xyxy")
+
+    def __init__(self, xyxy: np.ndarray, conf: np.ndarray, cls: np.ndarray, native_xyxy: Optional[np.ndarray] = None):
+        self.xyxy = np.asarray(xyxy, dtype=np.int32).reshape(-1, 4)
+        self.conf = np.asarray(conf, dtype=np.float32).reshape(-1)
+        self.cls = np.asarray(cls, dtype=np.int64).reshape(-1)
+        self.native_xyxy = None if native_xyxy is None else np.asarray(native_xyxy, dtype=np.int32).reshape(-1, 4)
+
+    @classmethod
+    def empty(cls) -> "DetectionSet":
+        return cls(np.zeros((0, 4)), np.zeros(0), np.zeros(0))
+
+    @classmethod
+    def concat(cls, sets: List["DetectionSet"]) -> "DetectionSet":
+        if not sets:
+            return cls.empty()
+        native = None
+        if all(s.native_xyxy is not None for s in sets):
+            native = np.concatenate([s.native_xyxy for s in sets])
+        return cls(
+            np.concatenate([s.xyxy for s in sets]),
+            np.concatenate([s.conf for s in sets]),
+            np.concatenate([s.cls for s in sets]),
+            native,
+        )
+
+    @classmethod
+    def from_dicts(cls, detections: List[dict]) -> "DetectionSet":
+        if not detections:
+            return cls.empty()
+        xyxy = [[d["bbox"]["x1"], d["bbox"]["y1"], d["bbox"]["x2"], d["bbox"]["y2"]] for d in detections]
+        return cls(
+            xyxy,
+            [d["confidence"] for d in detections],
+            [class_id(d["object_type"]) for d in detections],
+        )
+
+    def __len__(self) -> int:
+        return len(self.conf)
+
+    def __getitem__(self, index) -> "DetectionSet":
+        """Boolean mask / index array selection"""
+        return DetectionSet(
+            self.xyxy[index], self.conf[index], self.cls[index],
+            None if self.native_xyxy is None else self.native_xyxy[index],
+        )
+
+    @property
+    def centers(self) -> np.ndarray:
+        """(N, 2) integer box centres — same rounding as the dict path"""
+        return np.stack([
+            (self.xyxy[:, 0] + self.xyxy[:, 2]) // 2,
+            (self.xyxy[:, 1] + self.xyxy[:, 3]) // 2,
+        ], axis=1)
+
+    @property
+    def object_types(self) -> List[str]:
+        return [class_name(c) for c in self.cls.tolist()]
+
+    # ── Serialisation ─────────────────────────
+    def to_json(self) -> dict:
+        out = {"xyxy": self.xyxy.tolist(), "conf": self.conf.tolist(), "cls": self.cls.tolist()}
+        if self.native_xyxy is not None:
+            out["native_xyxy"] = self.native_xyxy.tolist()
+        return out
+
+    @classmethod
+    def from_json(cls, data: dict) -> "DetectionSet":
+        return cls(data["xyxy"], data["conf"], data["cls"], data.get("native_xyxy"))
+
+    def to_dicts(self) -> List[dict]:
+        """Per-detection dicts for API responses (the only place they are built)"""
+        centers = self.centers.tolist()
+        boxes = self.xyxy.tolist()
+        native = self.native_xyxy.tolist() if self.native_xyxy is not None else None
+        out = []
+        for k, ((x1, y1, x2, y2), (cx, cy), score, cls_id) in enumerate(
+            zip(boxes, centers, self.conf.tolist(), self.cls.tolist())
+        ):
+            d = {
+                "object_type": class_name(cls_id),
+                "confidence": round(score, 3),
+                "detected_x": cx,
+                "detected_y": cy,
+                "bbox": {"x1": x1, "y1": y1, "x2": x2, "y2": y2},
+                "bbox_width": x2 - x1,
+                "bbox_height": y2 - y1,
+            }
+            if native is not None:
+                nx1, ny1, nx2, ny2 = native[k]
+                d["native_bbox"] = {"x1": nx1, "y1": ny1, "x2": nx2, "y2": ny2}
+            out.append(d)
+        return out
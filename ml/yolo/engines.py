@@ -0,0 +1,185 @@
+"""
+Pluggable inference engines behind ConstructionDetector.
+
+  ultralytics → PyTorch eager via ultralytics.YOLO (.pt weights)
+  onnxruntime → ONNX Runtime CPU (.onnx, FP32 or INT8 QDQ)
+  openvino    → OpenVINO CPU (.xml IR, or .onnx read directly)
+
+The engine is picked from INFERENCE_ENGINE, else from the suffix of
+YOLO_MODEL_PATH. Every engine takes a list of preprocessed 640x640 BGR
+frames and returns, per frame, (xyxy float32 (N,4), conf float32 (N,),
+cls int64 (N,)) NumPy arrays.
+"""
+
+import importlib.util
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+ENGINES = ("ultralytics", "onnxruntime", "openvino")
+
+# Same defaults ultralytics uses for NMS
+NMS_IOU = float(os.getenv("ENGINE_NMS_IOU", "0.7"))
+MAX_DETECTIONS = int(os.getenv("ENGINE_MAX_DETECTIONS", "300"))
+
+EngineOutput = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+_ENGINE_PACKAGES = {"ultralytics": "ultralytics", "onnxruntime": "onnxruntime", "openvino": "openvino"}
+
+
+def engine_for_path(model_path: str) -> str:
+    """INFERENCE_ENGINE if set, otherwise guessed from the weights file suffix"""
+    explicit = os.getenv("INFERENCE_ENGINE")
+    if explicit:
+        explicit = explicit.lower()
+        if explicit not in ENGINES:
+            raise ValueError(f"INFERENCE_ENGINE must be one of: {', '.join(ENGINES)}")
+        return explicit
+    if model_path.endswith(".onnx"):
+        return "onnxruntime"
+    if model_path.endswith(".xml") or model_path.rstrip("/").endswith("_openvino_model"):
+        return "openvino"
+    return "ultralytics"
+
+
+def engine_available(engine: str) -> bool:
+    return importlib.util.find_spec(_ENGINE_PACKAGES[engine]) is not None
+
+
+def create_engine(model_path: str, engine: str = None):
+    engine = engine or engine_for_path(model_path)
+    if engine == "onnxruntime":
+        return OnnxRuntimeEngine(model_path)
+    if engine == "openvino":
+        return OpenVinoEngine(model_path)
+    return UltralyticsEngine(model_path)
+
+
+# ─────────────────────────────────────────
+# PyTorch (ultralytics)
+# ─────────────────────────────────────────
+
+class UltralyticsEngine:
+    name = "ultralytics"
+
+    def __init__(self, model_path: str):
+        from ultralytics import YOLO
+        self.model_path = model_path
+        self.model = YOLO(model_path)
+
+    def infer(self, frames: List[np.ndarray], conf: float) -> List[EngineOutput]:
+        results = self.model(frames, conf=conf, verbose=False)
+        outputs = []
+        for r in results:
+            # One device→host copy per tensor, not per box
+            boxes = r.boxes
+            outputs.append((
+                boxes.xyxy.cpu().numpy().astype(np.float32),
+                boxes.conf.cpu().numpy().astype(np.float32),
+                boxes.cls.cpu().numpy().astype(np.int64),
+            ))
+        return outputs
+
+
+# ─────────────────────────────────────────
+# Exported graphs (raw YOLOv8 head → NMS here)
+# ─────────────────────────────────────────
+
+def _to_blob(frames: List[np.ndarray]) -> np.ndarray:
+    """BGR HWC uint8 frames → RGB NCHW float32 in [0, 1] (ultralytics convention)"""
+    batch = np.stack(frames)[..., ::-1].transpose(0, 3, 1, 2)
+    return np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+
+
+def _nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        iw = np.maximum(0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+        ih = np.maximum(0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+        inter = iw * ih
+        order = rest[inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9) <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def decode_yolov8(raw: np.ndarray, conf: float) -> EngineOutput:
+    """
+    One image of raw YOLOv8 output, shape (4 + num_classes, anchors):
+    cx, cy, w, h followed by per-class scores. Class-aware NMS via box offsets.
+    """
+    preds = raw.T
+    scores_all = preds[:, 4:]
+    cls = scores_all.argmax(axis=1)
+    scores = scores_all[np.arange(len(cls)), cls]
+    mask = scores >= conf
+    if not mask.any():
+        return np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int64)
+
+    preds, cls, scores = preds[mask], cls[mask], scores[mask]
+    cx, cy, w, h = preds[:, 0], preds[:, 1], preds[:, 2], preds[:, 3]
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+    offsets = cls[:, None].astype(np.float32) * 4096.0  # keep classes apart in NMS
+    keep = _nms(boxes + offsets, scores, NMS_IOU)[:MAX_DETECTIONS]
+    return boxes[keep].astype(np.float32), scores[keep].astype(np.float32), cls[keep].astype(np.int64)
+
+
+class OnnxRuntimeEngine:
+    name = "onnxruntime"
+
+    def __init__(self, model_path: str):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = int(os.getenv("ONNX_THREADS", "0"))
+        if threads:
+            options.intra_op_num_threads = threads
+
+        available = ort.get_available_providers()
+        requested = [p for p in os.getenv("ONNX_PROVIDERS", "").split(",") if p]
+        providers = [p for p in requested if p in available] or ["CPUExecutionProvider"]
+
+        self.model_path = model_path
+        self.session = ort.InferenceSession(model_path, options, providers=providers)
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Static exports have batch dimension 1; dynamic ones use a symbolic name
+        self.dynamic_batch = not isinstance(model_input.shape[0], int)
+
+    def infer(self, frames: List[np.ndarray], conf: float) -> List[EngineOutput]:
+        blob = _to_blob(frames)
+        if self.dynamic_batch:
+            raw = self.session.run(None, {self.input_name: blob})[0]
+        else:
+            raw = np.concatenate([self.session.run(None, {self.input_name: blob[i:i + 1]})[0] for i in range(len(blob))])
+        return [decode_yolov8(raw[i], conf) for i in range(len(frames))]
+
+
+class OpenVinoEngine:
+    name = "openvino"
+
+    def __init__(self, model_path: str):
+        import openvino as ov
+
+        if os.path.isdir(model_path):
+            xml = [f for f in os.listdir(model_path) if f.endswith(".xml")]
+            model_path = os.path.join(model_path, xml[0])
+        core = ov.Core()
+        self.model_path = model_path
+        self.compiled = core.compile_model(core.read_model(model_path), "CPU", {"PERFORMANCE_HINT": "THROUGHPUT"})
+        self.output = self.compiled.output(0)
+
+    def infer(self, frames: List[np.ndarray], conf: float) -> List[EngineOutput]:
+        blob = _to_blob(frames)
+        outputs = []
+        for i in range(len(blob)):
+            raw = self.compiled(blob[i:i + 1])[self.output]
+            outputs.append(decode_yolov8(raw[0], conf))
+        return outputs
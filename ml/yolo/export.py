@@ -0,0 +1,228 @@
+"""
+Export construction_model.pt for CPU inference engines and check parity.
+
+  # FP32 ONNX (dynamic batch)
+  python -m ml.yolo.export onnx --weights ml/yolo/construction_model.pt
+
+  # + INT8 static quantisation calibrated on real site photos
+  python -m ml.yolo.export onnx --weights ml/yolo/construction_model.pt \\
+      --int8 --calibration-dir data/calibration
+
+  # OpenVINO IR
+  python -m ml.yolo.export openvino --weights ml/yolo/construction_model.pt
+
+  # Compare detections of an exported model against the PyTorch engine
+  python -m ml.yolo.export parity --reference ml/yolo/construction_model.pt \\
+      --candidate ml/yolo/construction_model.int8.onnx --images data/calibration
+
+Serve an export by pointing YOLO_MODEL_PATH at it (engine is chosen from
+the suffix, or INFERENCE_ENGINE).
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def _list_images(folder: str, limit: int = None) -> List[str]:
+    paths = sorted(
+        os.path.join(folder, f) for f in os.listdir(folder)
+        if f.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    if not paths:
+        raise SystemExit(f"No images found in {folder}")
+    return paths[:limit] if limit else paths
+
+
+def _preprocessed_frames(paths: List[str], profile: str = None) -> List[np.ndarray]:
+    """Frames exactly as the serving path builds them (decode → resize → enhance)"""
+    from ml.yolo.detector import ConstructionDetector
+
+    prep = ConstructionDetector(model_path="__preprocess_only__", lazy=True)
+    frames = []
+    for path in paths:
+        with open(path, "rb") as f:
+            frames.append(prep.preprocess(f.read(), profile))
+    return frames
+
+
+# ─────────────────────────────────────────
+# Export
+# ─────────────────────────────────────────
+
+def export_onnx(weights: str, out: str = None, dynamic: bool = True) -> str:
+    from ultralytics import YOLO
+
+    exported = YOLO(weights).export(format="onnx", imgsz=640, dynamic=dynamic, simplify=True)
+    if out and os.path.abspath(out) != os.path.abspath(exported):
+        os.replace(exported, out)
+        exported = out
+    print(f"✅ ONNX export: {exported}")
+    return exported
+
+
+def export_openvino(weights: str) -> str:
+    from ultralytics import YOLO
+
+    exported = YOLO(weights).export(format="openvino", imgsz=640)
+    print(f"✅ OpenVINO export: {exported}")
+    return exported
+
+
+def quantize_int8(onnx_path: str, calibration_dir: str, out: str = None, limit: int = 200, profile: str = None) -> str:
+    """Static INT8 (QDQ) quantisation using site photos for activation ranges"""
+    from onnxruntime.quantization import (
+        CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType, quantize_static,
+    )
+    import onnxruntime as ort
+
+    out = out or onnx_path.replace(".onnx", ".int8.onnx")
+    input_name = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    frames = _preprocessed_frames(_list_images(calibration_dir, limit), profile)
+
+    class _Reader(CalibrationDataReader):
+        def __init__(self):
+            self._iter = iter(frames)
+
+        def get_next(self):
+            frame = next(self._iter, None)
+            if frame is None:
+                return None
+            blob = frame[..., ::-1].transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+            return {input_name: np.ascontiguousarray(blob)}
+
+    quantize_static(
+        onnx_path,
+        out,
+        _Reader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        calibrate_method=CalibrationMethod.MinMax,
+    )
+    print(f"✅ INT8 model: {out} (calibrated on {len(frames)} images)")
+    return out
+
+
+# ─────────────────────────────────────────
+# Parity check
+# ─────────────────────────────────────────
+
+def _iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between (N,4) and (M,4) xyxy boxes"""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def parity(reference: str, candidate: str, images: str, conf: float = 0.5,
+           iou_threshold: float = 0.5, limit: int = None, profile: str = None) -> dict:
+    """
+    Run both engines on the same preprocessed frames and greedily match
+    same-class boxes by IoU. Reports recall in both directions plus
+    centre-offset and confidence drift of matched pairs.
+    """
+    from ml.yolo.engines import create_engine
+
+    frames = _preprocessed_frames(_list_images(images, limit), profile)
+    ref_engine, cand_engine = create_engine(reference), create_engine(candidate)
+
+    ref_total = cand_total = matched = 0
+    centre_offsets, conf_deltas = [], []
+    for frame in frames:
+        (rb, rc, rk), = ref_engine.infer([frame], conf)
+        (cb, cc, ck), = cand_engine.infer([frame], conf)
+        ref_total += len(rb)
+        cand_total += len(cb)
+        if not len(rb) or not len(cb):
+            continue
+
+        ious = _iou(rb, cb)
+        ious[rk[:, None] != ck[None, :]] = 0.0
+        while True:
+            i, j = np.unravel_index(ious.argmax(), ious.shape)
+            if ious[i, j] < iou_threshold:
+                break
+            matched += 1
+            rc_xy = (rb[i, :2] + rb[i, 2:]) / 2
+            cc_xy = (cb[j, :2] + cb[j, 2:]) / 2
+            centre_offsets.append(float(np.linalg.norm(rc_xy - cc_xy)))
+            conf_deltas.append(float(abs(rc[i] - cc[j])))
+            ious[i, :] = 0.0
+            ious[:, j] = 0.0
+
+    report = {
+        "reference": reference,
+        "candidate": candidate,
+        "images": len(frames),
+        "reference_detections": ref_total,
+        "candidate_detections": cand_total,
+        "matched": matched,
+        "recall_vs_reference": round(matched / ref_total, 4) if ref_total else 1.0,
+        "precision_vs_reference": round(matched / cand_total, 4) if cand_total else 1.0,
+        "mean_centre_offset_px": round(float(np.mean(centre_offsets)), 3) if centre_offsets else 0.0,
+        "max_centre_offset_px": round(float(np.max(centre_offsets)), 3) if centre_offsets else 0.0,
+        "mean_confidence_delta": round(float(np.mean(conf_deltas)), 4) if conf_deltas else 0.0,
+    }
+    return report
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Export YOLO weights for CPU engines / check parity")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_onnx = sub.add_parser("onnx", help="export .pt → .onnx (optionally INT8)")
+    p_onnx.add_argument("--weights", default=os.getenv("YOLO_MODEL_PATH", "ml/yolo/construction_model.pt"))
+    p_onnx.add_argument("--out")
+    p_onnx.add_argument("--static-batch", action="store_true", help="fix batch size to 1")
+    p_onnx.add_argument("--int8", action="store_true", help="also write a statically quantised INT8 model")
+    p_onnx.add_argument("--calibration-dir", help="folder of site photos for INT8 calibration")
+    p_onnx.add_argument("--calibration-limit", type=int, default=200)
+    p_onnx.add_argument("--profile", help="preprocess profile used for calibration frames")
+
+    p_ov = sub.add_parser("openvino", help="export .pt → OpenVINO IR")
+    p_ov.add_argument("--weights", default=os.getenv("YOLO_MODEL_PATH", "ml/yolo/construction_model.pt"))
+
+    p_par = sub.add_parser("parity", help="compare an exported model with the PyTorch engine")
+    p_par.add_argument("--reference", default=os.getenv("YOLO_MODEL_PATH", "ml/yolo/construction_model.pt"))
+    p_par.add_argument("--candidate", required=True)
+    p_par.add_argument("--images", required=True, help="folder of test photos")
+    p_par.add_argument("--conf", type=float, default=float(os.getenv("CONFIDENCE_THRESHOLD", "0.5")))
+    p_par.add_argument("--iou", type=float, default=0.5)
+    p_par.add_argument("--limit", type=int)
+    p_par.add_argument("--profile")
+    p_par.add_argument("--min-recall", type=float, default=0.95, help="exit non-zero below this recall")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "onnx":
+        onnx_path = export_onnx(args.weights, args.out, dynamic=not args.static_batch)
+        if args.int8:
+            if not args.calibration_dir:
+                parser.error("--int8 needs --calibration-dir")
+            quantize_int8(onnx_path, args.calibration_dir, limit=args.calibration_limit, profile=args.profile)
+    elif args.command == "openvino":
+        export_openvino(args.weights)
+    else:
+        report = parity(args.reference, args.candidate, args.images, args.conf, args.iou, args.limit, args.profile)
+        print(json.dumps(report, indent=2))
+        if report["recall_vs_reference"] < args.min_recall:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
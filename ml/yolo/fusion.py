@@ -0,0 +1,81 @@
+"""
+Fusing detections of the same physical element seen in several images
+(video frames, or the Top/Front/Left/Right views of one inspection).
+
+Images are assumed to be registered to the CAD frame, as in the
+single-photo path. Each image's detections are assigned one-to-one to
+already-known elements of the same class within gate_px (same solver as
+CAD matching); unassigned detections start new elements. An element's
+box and confidence are the mean over the images that saw it.
+"""
+
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+from ml.yolo.detections import DetectionSet
+from ml.yolo.matching import match_by_class
+
+VIEW_NAMES = ("top", "front", "left", "right")
+
+VIEW_FUSION_GATE_PX = float(os.getenv("VIEW_FUSION_GATE_PX", "40"))
+VIEW_MIN_VIEWS = int(os.getenv("VIEW_MIN_VIEWS", "1"))
+
+
+class ElementTracker:
+    """Accumulates per-image DetectionSets into cross-image elements"""
+
+    def __init__(self, gate_px: float):
+        self.gate_px = gate_px
+        self.xyxy_sum = np.zeros((0, 4), dtype=np.float64)
+        self.conf_sum = np.zeros(0, dtype=np.float64)
+        self.cls = np.zeros(0, dtype=np.int64)
+        self.hits = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.hits)
+
+    def _element_set(self) -> DetectionSet:
+        return DetectionSet(np.round(self.xyxy_sum / self.hits[:, None]), self.conf_sum / self.hits, self.cls)
+
+    def add(self, detections: DetectionSet):
+        if len(detections) == 0:
+            return
+        elements = self._element_set()
+        det_to_el, _ = match_by_class(
+            detections.object_types, detections.centers,
+            elements.object_types, elements.centers,
+            gate=self.gate_px,
+        )
+        hit = np.nonzero(det_to_el >= 0)[0]
+        targets = det_to_el[hit]
+        self.xyxy_sum[targets] += detections.xyxy[hit]
+        self.conf_sum[targets] += detections.conf[hit]
+        self.hits[targets] += 1
+
+        new = np.nonzero(det_to_el < 0)[0]
+        self.xyxy_sum = np.concatenate([self.xyxy_sum, detections.xyxy[new].astype(np.float64)])
+        self.conf_sum = np.concatenate([self.conf_sum, detections.conf[new].astype(np.float64)])
+        self.cls = np.concatenate([self.cls, detections.cls[new]])
+        self.hits = np.concatenate([self.hits, np.ones(len(new), dtype=np.int64)])
+
+    def result(self, min_hits: int = 1) -> Tuple[DetectionSet, np.ndarray]:
+        """(averaged elements seen in >= min_hits images, their image counts)"""
+        if not len(self):
+            return DetectionSet.empty(), np.zeros(0, dtype=np.int64)
+        keep = self.hits >= min_hits
+        return self._element_set()[keep], self.hits[keep]
+
+
+def fuse_views(
+    view_sets: List[DetectionSet],
+    gate_px: float = None,
+    min_views: int = None,
+) -> Tuple[DetectionSet, np.ndarray]:
+    """Per-view detections → one fused DetectionSet plus views-seen per element"""
+    tracker = ElementTracker(VIEW_FUSION_GATE_PX if gate_px is None else gate_px)
+    for detections in view_sets:
+        tracker.add(detections)
+    min_views = VIEW_MIN_VIEWS if min_views is None else min_views
+    return tracker.result(min(min_views, max(len(view_sets), 1)))
@@ -0,0 +1,147 @@
+"""
+Header-aware image decoding.
+Reads width/height from the JPEG SOF / PNG IHDR header without decoding
+(other formats through Pillow's lazy Image.open, which only parses the
+header), rejects oversized inputs (decompression bombs) and inputs whose
+size cannot be read cheaply, and picks
+cv2.IMREAD_REDUCED_COLOR_2/4/8 so libjpeg decodes directly at a
+fraction of the sensor resolution when only 640x640 is needed.
+dhash()/hamming() give a cheap perceptual fingerprint for spotting
+near-duplicate frames.
+"""
+
+import io
+import os
+import struct
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Default upper bound on decoded pixels (100 MP)
+MAX_INPUT_PIXELS = int(os.getenv("MAX_INPUT_PIXELS", str(100_000_000)))
+
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# JPEG start-of-frame markers that carry the frame dimensions
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    i = 2
+    n = len(data)
+    while i + 4 <= n:
+        if data[i] != 0xFF:
+            i += 1
+            continue
+        marker = data[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:  # no payload
+            i += 2
+            continue
+        seg_len = struct.unpack(">H", data[i + 2:i + 4])[0]
+        if marker in _SOF_MARKERS and i + 9 <= n:
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        i += 2 + seg_len
+    return None
+
+
+def _pil_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """Header-only size for WebP / TIFF / BMP / GIF / ... via Pillow, if installed"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            return im.size
+    except Exception:  # unidentified format, truncated header, Pillow's own bomb guard
+        return None
+
+
+def read_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    """(width, height) from the file header, or None if the format is unknown"""
+    if data[:2] == b"\xff\xd8":
+        return _jpeg_size(data)
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        width, height = struct.unpack(">II", data[16:24])
+        return width, height
+    return _pil_size(data)
+
+
+def is_jpeg(data: bytes) -> bool:
+    return data[:2] == b"\xff\xd8"
+
+
+def check_pixel_budget(data: bytes, max_pixels: int = None) -> Tuple[int, int]:
+    """
+    Raise ValueError if the header declares more than max_pixels, or if
+    the size cannot be read from the header (an unknown format would
+    otherwise be decoded at full size unchecked). Returns (w, h).
+    """
+    max_pixels = max_pixels or MAX_INPUT_PIXELS
+    dims = read_dimensions(data)
+    if dims is None:
+        raise ValueError("Unsupported or unreadable image format: the image size could not be read from its header.")
+    if dims[0] * dims[1] > max_pixels:
+        raise ValueError(
+            f"Image too large: {dims[0]}x{dims[1]} exceeds the {max_pixels:,} pixel limit."
+        )
+    return dims
+
+
+def choose_reduction(width: int, height: int, target: int = 640) -> int:
+    """Largest of 8/4/2 that still leaves both sides >= target (1 = full decode)"""
+    for factor, _ in _REDUCED_FLAGS:
+        if width // factor >= target and height // factor >= target:
+            return factor
+    return 1
+
+
+def decode_for_target(data: bytes, target: int = 640, max_pixels: int = None) -> np.ndarray:
+    """
+    Decode at the smallest libjpeg scale that still covers target x target.
+    Non-JPEG inputs are decoded at full size (after the pixel check).
+    Raises ValueError for oversized or unreadable inputs.
+    """
+    dims = check_pixel_budget(data, max_pixels)
+    flag = cv2.IMREAD_COLOR
+    if is_jpeg(data):
+        factor = choose_reduction(dims[0], dims[1], target)
+        flag = dict(_REDUCED_FLAGS).get(factor, cv2.IMREAD_COLOR)
+
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+    if img is None:
+        raise ValueError("Could not decode image. Check format (JPG/PNG).")
+    return img
+
+
+def decode_full(data: bytes, max_pixels: int = None) -> np.ndarray:
+    """Full-resolution decode, still guarded by the pixel budget"""
+    check_pixel_budget(data, max_pixels)
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Could not decode image. Check format (JPG/PNG).")
+    return img
+
+
+def dhash(img: np.ndarray, size: int = 8) -> int:
+    """
+    64-bit difference hash of a BGR or grayscale frame: sign of the
+    horizontal gradient on a (size+1) x size thumbnail.
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    thumb = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
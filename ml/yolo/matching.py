@@ -0,0 +1,92 @@
+"""
+CAD-to-detection assignment.
+
+For each object class, build the detection × CAD-element distance matrix
+in NumPy and solve the assignment:
+  hungarian → optimal (scipy.optimize.linear_sum_assignment), used when
+              scipy is installed and the class has ≤ MATCH_HUNGARIAN_MAX
+              elements on either side
+  greedy    → globally nearest pairs first, O(k log k) over gated pairs
+Pairs further apart than MATCH_GATE_PX are never matched.
+"""
+
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+MATCH_GATE_PX = float(os.getenv("MATCH_GATE_PX", "200"))
+MATCH_METHOD = os.getenv("MATCH_METHOD", "hungarian").lower()
+MATCH_HUNGARIAN_MAX = int(os.getenv("MATCH_HUNGARIAN_MAX", "2000"))
+
+
+def distance_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Euclidean distances between (N,2) and (M,2) point sets → (N,M)"""
+    diff = a[:, None, :].astype(np.float64) - b[None, :, :].astype(np.float64)
+    return np.sqrt((diff ** 2).sum(axis=2))
+
+
+def _greedy(dist: np.ndarray, gate: float) -> List[Tuple[int, int]]:
+    rows, cols = np.nonzero(dist <= gate)
+    order = np.argsort(dist[rows, cols], kind="stable")
+    used_r = np.zeros(dist.shape[0], dtype=bool)
+    used_c = np.zeros(dist.shape[1], dtype=bool)
+    pairs = []
+    for r, c in zip(rows[order].tolist(), cols[order].tolist()):
+        if used_r[r] or used_c[c]:
+            continue
+        used_r[r] = used_c[c] = True
+        pairs.append((r, c))
+    return pairs
+
+
+def _hungarian(dist: np.ndarray, gate: float) -> List[Tuple[int, int]]:
+    # Gated pairs get a cost no real pair can beat, then are dropped
+    cost = np.where(dist <= gate, dist, gate * 10 + dist.max() + 1)
+    rows, cols = linear_sum_assignment(cost)
+    return [(r, c) for r, c in zip(rows.tolist(), cols.tolist()) if dist[r, c] <= gate]
+
+
+def assign(det_xy: np.ndarray, cad_xy: np.ndarray, gate: float = None, method: str = None) -> List[Tuple[int, int]]:
+    """Matched (detection_index, cad_index) pairs for one object class"""
+    if len(det_xy) == 0 or len(cad_xy) == 0:
+        return []
+    gate = MATCH_GATE_PX if gate is None else gate
+    method = (method or MATCH_METHOD).lower()
+    dist = distance_matrix(det_xy, cad_xy)
+    if (
+        method == "hungarian"
+        and SCIPY_AVAILABLE
+        and max(dist.shape) <= MATCH_HUNGARIAN_MAX
+    ):
+        return _hungarian(dist, gate)
+    return _greedy(dist, gate)
+
+
+def match_by_class(
+    det_types: List[str], det_xy: np.ndarray,
+    cad_types: List[str], cad_xy: np.ndarray,
+    gate: float = None, method: str = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (cad_index_for_each_detection, matched_mask_for_each_cad).
+    Unmatched detections get -1. Classes compare case-insensitively.
+    """
+    det_keys = np.array([t.lower() for t in det_types], dtype=object)
+    cad_keys = np.array([t.lower() for t in cad_types], dtype=object)
+    det_to_cad = np.full(len(det_types), -1, dtype=np.int64)
+    cad_matched = np.zeros(len(cad_types), dtype=bool)
+
+    for key in set(det_keys.tolist()) & set(cad_keys.tolist()):
+        d_idx = np.nonzero(det_keys == key)[0]
+        c_idx = np.nonzero(cad_keys == key)[0]
+        for i, j in assign(det_xy[d_idx], cad_xy[c_idx], gate, method):
+            det_to_cad[d_idx[i]] = c_idx[j]
+            cad_matched[c_idx[j]] = True
+    return det_to_cad, cad_matched
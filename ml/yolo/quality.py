@@ -0,0 +1,146 @@
+"""
+Pre-inference image quality gate.
+
+Runs on the decoded 640x640 frame, before denoise / CLAHE / YOLO:
+  blurry       → variance of the Laplacian below QUALITY_BLUR_MIN
+  underexposed → more than QUALITY_DARK_MAX_FRAC of pixels below QUALITY_DARK_LEVEL
+  overexposed  → more than QUALITY_BRIGHT_MAX_FRAC of pixels above QUALITY_BRIGHT_LEVEL
+  duplicate    → dHash within QUALITY_DUP_HAMMING bits of one of the last
+                 QUALITY_HISTORY uploads for the same site that was
+                 detected with the same variant (model, mode, profile,
+                 threshold, CAD — the detection cache key minus the image)
+
+Blur / exposure failures raise ImageQualityError with the reason codes.
+Duplicates are short-circuited: the detections of the earlier upload are
+returned instead of running inference again.
+"""
+
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from ml.yolo.imageio import dhash, hamming
+
+QUALITY_GATE = os.getenv("QUALITY_GATE", "1").lower() not in ("0", "false", "no", "off")
+QUALITY_BLUR_MIN = float(os.getenv("QUALITY_BLUR_MIN", "60"))
+QUALITY_DARK_LEVEL = int(os.getenv("QUALITY_DARK_LEVEL", "30"))
+QUALITY_DARK_MAX_FRAC = float(os.getenv("QUALITY_DARK_MAX_FRAC", "0.7"))
+QUALITY_BRIGHT_LEVEL = int(os.getenv("QUALITY_BRIGHT_LEVEL", "235"))
+QUALITY_BRIGHT_MAX_FRAC = float(os.getenv("QUALITY_BRIGHT_MAX_FRAC", "0.7"))
+QUALITY_DUP_HAMMING = int(os.getenv("QUALITY_DUP_HAMMING", "4"))
+QUALITY_HISTORY = int(os.getenv("QUALITY_HISTORY", "50"))
+QUALITY_MAX_SITES = int(os.getenv("QUALITY_MAX_SITES", "1000"))
+
+REASON_CODES = ("blurry", "underexposed", "overexposed", "duplicate")
+
+
+class ImageQualityError(ValueError):
+    """Upload rejected by the quality gate; .report holds scores and reason codes"""
+
+    def __init__(self, report: dict):
+        self.report = report
+        super().__init__(f"Image rejected by quality gate: {', '.join(report['reasons'])}")
+
+    def __reduce__(self):
+        # Rebuild from the report when crossing the process inference pool
+        return type(self), (self.report,)
+
+
+class QualityGate:
+    def __init__(self, enabled: bool = None):
+        self.enabled = QUALITY_GATE if enabled is None else enabled
+        # site → deque of (hash, variant, detections_json); sites evicted LRU
+        self._history: "OrderedDict[str, deque]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.passed = 0
+        self.rejected = {code: 0 for code in REASON_CODES}
+        self.skipped = 0  # uploads that never reached inference
+
+    def score(self, img: np.ndarray) -> dict:
+        """Blur and exposure measurements for a BGR frame"""
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+        total = hist.sum() or 1.0
+        return {
+            "blur_score": round(float(cv2.Laplacian(gray, cv2.CV_64F).var()), 2),
+            "dark_frac": round(float(hist[:QUALITY_DARK_LEVEL].sum() / total), 4),
+            "bright_frac": round(float(hist[QUALITY_BRIGHT_LEVEL + 1:].sum() / total), 4),
+            "mean_luma": round(float(gray.mean()), 2),
+            "hash": dhash(gray),
+        }
+
+    def check(self, img: np.ndarray, site: str = None, variant: str = None) -> dict:
+        """
+        Score the frame and raise ImageQualityError on blur / exposure.
+        Returns the report; report["duplicate_of"] holds the earlier
+        upload's detections (JSON form) when it is a near-duplicate
+        detected with the same variant. Without a site or variant there
+        is no duplicate check.
+        """
+        report = self.score(img)
+        reasons = []
+        if report["blur_score"] < QUALITY_BLUR_MIN:
+            reasons.append("blurry")
+        if report["dark_frac"] > QUALITY_DARK_MAX_FRAC:
+            reasons.append("underexposed")
+        if report["bright_frac"] > QUALITY_BRIGHT_MAX_FRAC:
+            reasons.append("overexposed")
+        report["reasons"] = reasons
+        report["duplicate_of"] = None if reasons else self._find_duplicate(site, report["hash"], variant)
+        if report["duplicate_of"] is not None:
+            reasons.append("duplicate")
+
+        with self._lock:
+            self.checked += 1
+            if reasons:
+                self.skipped += 1
+                for code in reasons:
+                    self.rejected[code] += 1
+            else:
+                self.passed += 1
+
+        if reasons and reasons != ["duplicate"]:
+            raise ImageQualityError(report)
+        return report
+
+    def _find_duplicate(self, site: Optional[str], image_hash: int, variant: Optional[str]) -> Optional[dict]:
+        if site is None or variant is None:
+            return None
+        with self._lock:
+            history = self._history.get(site)
+            if not history:
+                return None
+            self._history.move_to_end(site)
+            for previous_hash, previous_variant, detections in reversed(history):
+                if previous_variant == variant and hamming(previous_hash, image_hash) <= QUALITY_DUP_HAMMING:
+                    return detections
+        return None
+
+    def remember(self, site: Optional[str], image_hash: int, detections: dict, variant: str = None):
+        """Record a processed upload so later near-duplicates with the same variant can reuse it"""
+        if site is None or variant is None:
+            return
+        with self._lock:
+            history = self._history.get(site)
+            if history is None:
+                history = self._history[site] = deque(maxlen=QUALITY_HISTORY)
+            self._history.move_to_end(site)
+            history.append((image_hash, variant, detections))
+            while len(self._history) > QUALITY_MAX_SITES:
+                self._history.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "checked": self.checked,
+                "passed": self.passed,
+                "rejected": dict(self.rejected),
+                "inference_skipped": self.skipped,
+                "sites": len(self._history),
+            }
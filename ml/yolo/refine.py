@@ -0,0 +1,145 @@
+"""
+CAD-guided region-of-interest refinement.
+
+Stage 1 is the normal coarse pass on the 640x640 frame. Stage 2 cuts
+native-resolution crops around every CAD element's expected box and
+around coarse detections below REFINE_LOW_CONF, resizes each crop to the
+model input and runs them all as one batched inference. Refined boxes
+are mapped back to the 640 frame and replace the coarse box of the
+same-class detection they match (within REFINE_GATE_PX); refined
+detections with no coarse counterpart are added. Much cheaper than full
+tiling because only the regions the CAD says matter are re-inspected.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple
+
+import cv2
+import numpy as np
+
+from ml.yolo.detections import DetectionSet
+from ml.yolo.imageio import decode_full
+from ml.yolo.matching import match_by_class
+from ml.yolo.tiling import FRAME_SIZE, merge_detections
+
+REFINE_MARGIN = float(os.getenv("REFINE_MARGIN", "2.0"))
+REFINE_MIN_ROI_PX = int(os.getenv("REFINE_MIN_ROI_PX", "64"))
+REFINE_LOW_CONF = float(os.getenv("REFINE_LOW_CONF", "0.6"))
+REFINE_MAX_ROIS = int(os.getenv("REFINE_MAX_ROIS", "64"))
+REFINE_GATE_PX = float(os.getenv("REFINE_GATE_PX", "30"))
+
+# Box used for CAD elements that carry no width/height (same as draw_detections)
+_DEFAULT_W, _DEFAULT_H = 80, 120
+
+
+def roi_boxes(cad_coords: List[dict], coarse: DetectionSet, margin: float = REFINE_MARGIN) -> np.ndarray:
+    """(K, 4) float xyxy regions in the 640 frame: CAD boxes + low-confidence detections"""
+    cad = np.array([
+        [c["x"], c["y"], c.get("width") or _DEFAULT_W, c.get("height") or _DEFAULT_H]
+        for c in cad_coords
+    ], dtype=np.float64).reshape(-1, 4)
+    low = coarse[coarse.conf < REFINE_LOW_CONF]
+    det = np.concatenate([
+        low.centers.astype(np.float64),
+        (low.xyxy[:, 2:] - low.xyxy[:, :2]).astype(np.float64),
+    ], axis=1) if len(low) else np.zeros((0, 4))
+
+    cxcywh = np.concatenate([cad, det])[:REFINE_MAX_ROIS]
+    half = np.maximum(cxcywh[:, 2:] * margin, REFINE_MIN_ROI_PX) / 2
+    boxes = np.concatenate([cxcywh[:, :2] - half, cxcywh[:, :2] + half], axis=1)
+    return np.clip(boxes, 0, FRAME_SIZE)
+
+
+def refine_detections(
+    coarse: DetectionSet,
+    refined: DetectionSet,
+    native_scale: np.ndarray,
+    gate_px: float = REFINE_GATE_PX,
+) -> Tuple[DetectionSet, int, int]:
+    """
+    Replace matched coarse boxes (and confidences) with refined ones and
+    append refined detections nothing coarse matched. → (set, replaced, added)
+    """
+    coarse_to_ref, ref_used = match_by_class(
+        coarse.object_types, coarse.centers,
+        refined.object_types, refined.centers,
+        gate=gate_px,
+    )
+    hit = np.nonzero(coarse_to_ref >= 0)[0]
+    src = coarse_to_ref[hit]
+
+    xyxy = coarse.xyxy.copy()
+    conf = coarse.conf.copy()
+    native = np.round(coarse.xyxy * native_scale)  # coarse-only boxes, upscaled
+    xyxy[hit] = refined.xyxy[src]
+    conf[hit] = refined.conf[src]
+    native[hit] = refined.native_xyxy[src]
+
+    extra = refined[~ref_used]
+    updated = DetectionSet(xyxy, conf, coarse.cls, native_xyxy=native)
+    return DetectionSet.concat([updated, extra]), len(hit), len(extra)
+
+
+def detect_refined(
+    detector,
+    image_bytes: bytes,
+    cad_coords: List[dict],
+    profile: str = None,
+    on_stage: Callable[[dict], None] = None,
+) -> DetectionSet:
+    """Coarse 640 pass + one batched native-resolution pass over CAD-guided ROIs"""
+    emit = on_stage or (lambda event: None)
+
+    t0 = time.perf_counter()
+    img = decode_full(image_bytes)
+    height, width = img.shape[:2]
+    t1 = time.perf_counter()
+    emit({"stage": "decode", "ms": round((t1 - t0) * 1000, 2), "width": width, "height": height})
+
+    frame = detector.enhance(cv2.resize(img, (FRAME_SIZE, FRAME_SIZE)), profile)
+    t2 = time.perf_counter()
+    emit({"stage": "preprocess", "ms": round((t2 - t1) * 1000, 2), "profile": profile})
+
+    coarse = detector._infer_batch([frame])[0]
+    t3 = time.perf_counter()
+    emit({"stage": "inference", "ms": round((t3 - t2) * 1000, 2), "detections": len(coarse)})
+
+    rois = roi_boxes(cad_coords, coarse)
+    scale = np.array([width, height, width, height], dtype=np.float64) / FRAME_SIZE
+    native_rois = np.round(rois * scale).astype(np.int64)
+    native_rois[:, :2] = np.minimum(native_rois[:, :2], [width - 1, height - 1])
+    native_rois[:, 2:] = np.maximum(native_rois[:, 2:], native_rois[:, :2] + 1)
+
+    def prepare(box):
+        x0, y0, x1, y1 = box
+        return detector.enhance(cv2.resize(img[y0:y1, x0:x1], (FRAME_SIZE, FRAME_SIZE)), profile)
+
+    if len(native_rois):
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+            crops = list(pool.map(prepare, native_rois.tolist()))
+        results = detector._infer_batch(crops)
+    else:
+        results = []
+
+    sets = []
+    for (x0, y0, x1, y1), dets in zip(native_rois.tolist(), results):
+        # Crop-input pixels → global native pixels
+        crop_scale = np.array([x1 - x0, y1 - y0, x1 - x0, y1 - y0], dtype=np.float32) / FRAME_SIZE
+        offset = np.array([x0, y0, x0, y0], dtype=np.float32)
+        sets.append(DetectionSet(np.round(dets.xyxy * crop_scale + offset), dets.conf, dets.cls))
+    native = merge_detections(DetectionSet.concat(sets))
+    refined = DetectionSet(
+        np.round(native.xyxy / scale), native.conf, native.cls, native_xyxy=native.xyxy,
+    )
+
+    detections, replaced, added = refine_detections(coarse, refined, scale)
+    emit({
+        "stage": "refine",
+        "ms": round((time.perf_counter() - t3) * 1000, 2),
+        "rois": len(native_rois),
+        "refined": replaced,
+        "added": added,
+    })
+    return detections
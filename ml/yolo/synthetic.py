@@ -0,0 +1,203 @@
+"""
+Seeded synthetic construction scenes for demos, the mock detector and
+benchmarks. The same seed and parameters always give the same scene.
+
+  generate_scene(seed, elements=500)  → CAD layout + ground-truth detections
+  perturb_layout(cad, seed)           → ground truth for an existing layout
+  render_scene(scene, size=(w, h))    → JPEG bytes, tagged with the scene
+                                        parameters in a JPEG COM segment
+  read_tag(jpeg_bytes)                → those parameters, or None
+
+All coordinates are in the 640x640 CAD frame; render_scene scales them
+to the requested image size, so large renders exercise tiled / refine
+modes. The mock detector regenerates ground truth from the tag instead
+of guessing, so mock runs against rendered scenes are exact.
+"""
+
+import hashlib
+import json
+import math
+import struct
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ml.yolo.detections import DetectionSet, class_id
+
+FRAME_SIZE = 640
+TAG_PREFIX = b"constructai-synthetic:"
+
+# Nominal element footprints in the 640 frame (w, h) and how often each appears
+CLASS_SIZES = {
+    "Pillar": (50, 70),
+    "Beam": (300, 30),
+    "Column": (40, 60),
+    "Wall": (200, 20),
+    "Slab": (160, 120),
+    "Footing": (80, 80),
+}
+CLASS_WEIGHTS = {"Pillar": 0.3, "Beam": 0.15, "Column": 0.25, "Wall": 0.1, "Slab": 0.05, "Footing": 0.15}
+
+# BGR fill per class when rendering
+_CLASS_COLORS = {
+    "Pillar": (90, 90, 200),
+    "Beam": (60, 160, 220),
+    "Column": (200, 120, 60),
+    "Wall": (150, 150, 150),
+    "Slab": (110, 180, 110),
+    "Footing": (70, 70, 120),
+}
+
+ERROR_MIN_PX = 25    # error offsets start safely above the 20 px threshold
+CORRECT_MAX_PX = 8   # correctly placed elements wobble by at most this
+
+
+def generate_layout(seed: int, elements: int) -> List[dict]:
+    """CAD layout of `elements` non-overlapping elements on a jittered grid"""
+    rng = np.random.default_rng(seed)
+    cols = max(1, math.ceil(math.sqrt(elements)))
+    rows = max(1, math.ceil(elements / cols))
+    cell_w, cell_h = FRAME_SIZE / cols, FRAME_SIZE / rows
+
+    names = list(CLASS_WEIGHTS)
+    weights = np.array([CLASS_WEIGHTS[n] for n in names])
+    types = rng.choice(len(names), size=elements, p=weights / weights.sum())
+    cells = rng.permutation(cols * rows)[:elements]
+    jitter = rng.uniform(-0.1, 0.1, size=(elements, 2))
+
+    cad = []
+    for k in range(elements):
+        name = names[types[k]]
+        w0, h0 = CLASS_SIZES[name]
+        # Shrink to fit the cell, keeping the aspect ratio
+        fit = min(1.0, 0.7 * cell_w / w0, 0.7 * cell_h / h0)
+        w, h = max(2, int(w0 * fit)), max(2, int(h0 * fit))
+        r, c = divmod(int(cells[k]), cols)
+        cad.append({
+            "object_type": name,
+            "x": int((c + 0.5 + jitter[k, 0]) * cell_w),
+            "y": int((r + 0.5 + jitter[k, 1]) * cell_h),
+            "width": w,
+            "height": h,
+        })
+    return cad
+
+
+def perturb_layout(
+    cad: List[dict],
+    seed: int,
+    error_rate: float = 0.3,
+    max_offset_px: float = 60.0,
+    missing_rate: float = 0.0,
+    extra_rate: float = 0.0,
+) -> Tuple[DetectionSet, np.ndarray]:
+    """
+    Ground-truth "as built" detections for a CAD layout.
+    Returns (detections, cad_index) — cad_index is -1 for extras that
+    are not in the CAD at all.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(cad)
+    if n == 0:
+        return DetectionSet.empty(), np.zeros(0, dtype=np.int64)
+
+    xy = np.array([[c["x"], c["y"]] for c in cad], dtype=np.float64)
+    wh = np.array([[c.get("width") or 80, c.get("height") or 120] for c in cad], dtype=np.float64)
+    cls = np.array([class_id(c["object_type"]) for c in cad], dtype=np.int64)
+
+    is_error = rng.random(n) < error_rate
+    magnitude = np.where(
+        is_error,
+        rng.uniform(ERROR_MIN_PX, max(max_offset_px, ERROR_MIN_PX + 1), n),
+        rng.uniform(0, CORRECT_MAX_PX, n),
+    )
+    angle = rng.uniform(0, 2 * np.pi, n)
+    centers = xy + np.stack([np.cos(angle), np.sin(angle)], axis=1) * magnitude[:, None]
+    built = rng.random(n) >= missing_rate
+    index = np.nonzero(built)[0]
+
+    n_extra = int(rng.binomial(n, extra_rate)) if extra_rate > 0 else 0
+    if n_extra:
+        src = rng.integers(0, n, n_extra)
+        centers = np.concatenate([centers[index], rng.uniform(0, FRAME_SIZE, (n_extra, 2))])
+        wh = np.concatenate([wh[index], wh[src]])
+        cls = np.concatenate([cls[index], cls[src]])
+        cad_index = np.concatenate([index, np.full(n_extra, -1)])
+    else:
+        centers, wh, cls, cad_index = centers[index], wh[index], cls[index], index
+
+    centers = np.clip(centers, 0, FRAME_SIZE - 1)
+    xyxy = np.round(np.concatenate([centers - wh / 2, centers + wh / 2], axis=1))
+    conf = rng.uniform(0.70, 0.98, len(cls))
+    return DetectionSet(xyxy, conf, cls), cad_index.astype(np.int64)
+
+
+def generate_scene(
+    seed: int,
+    elements: int = 500,
+    error_rate: float = 0.3,
+    max_offset_px: float = 60.0,
+    missing_rate: float = 0.0,
+    extra_rate: float = 0.0,
+) -> dict:
+    """CAD layout + ground truth. Parameters are kept so the scene can be rebuilt."""
+    params = {
+        "seed": int(seed),
+        "elements": int(elements),
+        "error_rate": error_rate,
+        "max_offset_px": max_offset_px,
+        "missing_rate": missing_rate,
+        "extra_rate": extra_rate,
+    }
+    cad = generate_layout(seed, elements)
+    truth, cad_index = perturb_layout(cad, seed + 1, error_rate, max_offset_px, missing_rate, extra_rate)
+    return {"params": params, "cad": cad, "truth": truth, "cad_index": cad_index}
+
+
+def render_scene(scene: dict, size: Tuple[int, int] = (FRAME_SIZE, FRAME_SIZE), quality: int = 90) -> bytes:
+    """Draw the ground truth over a noisy concrete-like background → tagged JPEG"""
+    width, height = size
+    rng = np.random.default_rng(scene["params"]["seed"] + 2)
+    img = (110 + rng.normal(0, 18, size=(height, width, 1))).clip(0, 255).astype(np.uint8).repeat(3, axis=2)
+
+    truth = scene["truth"]
+    scale = np.array([width, height, width, height], dtype=np.float64) / FRAME_SIZE
+    boxes = np.round(truth.xyxy * scale).astype(int).tolist()
+    for (x1, y1, x2, y2), name in zip(boxes, truth.object_types):
+        cv2.rectangle(img, (x1, y1), (x2, y2), _CLASS_COLORS.get(name, (128, 128, 128)), -1)
+        cv2.rectangle(img, (x1, y1), (x2, y2), (30, 30, 30), max(1, width // 640))
+
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("Could not encode synthetic scene")
+    return _add_tag(buf.tobytes(), scene["params"])
+
+
+def _add_tag(jpeg: bytes, params: dict) -> bytes:
+    payload = TAG_PREFIX + json.dumps(params, sort_keys=True).encode("utf-8")
+    # COM segment right after SOI; length includes its own two bytes
+    return jpeg[:2] + b"\xff\xfe" + struct.pack(">H", len(payload) + 2) + payload + jpeg[2:]
+
+
+def read_tag(data: bytes) -> Optional[dict]:
+    """Scene parameters embedded by render_scene, or None for real photos"""
+    if data[:4] != b"\xff\xd8\xff\xfe" or len(data) < 6:
+        return None
+    length = struct.unpack(">H", data[4:6])[0]
+    payload = data[6:4 + length]
+    if not payload.startswith(TAG_PREFIX):
+        return None
+    return json.loads(payload[len(TAG_PREFIX):])
+
+
+def scene_for_image(data: bytes, default_elements: int = 3) -> dict:
+    """
+    Scene behind an image: rebuilt from the tag if it was rendered here,
+    otherwise a scene seeded from the image content (stable per image).
+    """
+    params = read_tag(data)
+    if params is not None:
+        return generate_scene(**params)
+    seed = int.from_bytes(hashlib.sha256(data).digest()[:8], "big")
+    return generate_scene(seed, default_elements)
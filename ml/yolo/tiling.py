@@ -0,0 +1,147 @@
+"""
+Tiled (sliced) inference for high-resolution site imagery.
+
+The full-resolution photo is cut into overlapping TILE_SIZE tiles,
+tiles are preprocessed in parallel across cores, run through the model
+in batches of TILE_BATCH_SIZE, mapped back to global coordinates and
+de-duplicated with per-class NMS. Final boxes are expressed in the same
+640x640 frame as the single-shot path so compare_with_cad is unchanged.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple
+
+import cv2
+import numpy as np
+
+from ml.yolo.detections import DetectionSet
+from ml.yolo.imageio import decode_full
+
+TILE_SIZE = int(os.getenv("TILE_SIZE", "640"))
+TILE_OVERLAP = float(os.getenv("TILE_OVERLAP", "0.2"))
+TILE_BATCH_SIZE = int(os.getenv("TILE_BATCH_SIZE", "8"))
+TILE_NMS_IOU = float(os.getenv("TILE_NMS_IOU", "0.5"))
+
+FRAME_SIZE = 640  # coordinate frame shared with the CAD layout
+
+
+def make_tiles(width: int, height: int, tile: int = TILE_SIZE, overlap: float = TILE_OVERLAP) -> List[Tuple[int, int, int, int]]:
+    """(x0, y0, x1, y1) windows covering the image with the given fractional overlap"""
+    def starts(length: int) -> List[int]:
+        if length <= tile:
+            return [0]
+        stride = max(1, int(tile * (1 - overlap)))
+        points = list(range(0, length - tile, stride))
+        points.append(length - tile)  # last tile flush with the edge
+        return points
+
+    return [
+        (x, y, min(x + tile, width), min(y + tile, height))
+        for y in starts(height)
+        for x in starts(width)
+    ]
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Greedy non-maximum suppression. boxes: (N, 4) xyxy. Returns kept indices."""
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        iw = np.maximum(0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+        ih = np.maximum(0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+        inter = iw * ih
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def merge_detections(detections: DetectionSet, iou_threshold: float = TILE_NMS_IOU) -> DetectionSet:
+    """Per-class NMS over detections whose boxes are in global coordinates"""
+    if len(detections) == 0:
+        return detections
+    keep = []
+    boxes = detections.xyxy.astype(np.float32)
+    for cls_id in np.unique(detections.cls):
+        idx = np.nonzero(detections.cls == cls_id)[0]
+        keep.append(idx[nms(boxes[idx], detections.conf[idx], iou_threshold)])
+    return detections[np.sort(np.concatenate(keep))]
+
+
+def detect_tiled(
+    detector,
+    image_bytes: bytes,
+    profile: str = None,
+    on_stage: Callable[[dict], None] = None,
+    tile_size: int = TILE_SIZE,
+    overlap: float = TILE_OVERLAP,
+) -> DetectionSet:
+    """Run detector's model over overlapping native-resolution tiles"""
+    emit = on_stage or (lambda event: None)
+
+    t0 = time.perf_counter()
+    img = decode_full(image_bytes)
+    height, width = img.shape[:2]
+    windows = make_tiles(width, height, tile_size, overlap)
+    t1 = time.perf_counter()
+    emit({"stage": "decode", "ms": round((t1 - t0) * 1000, 2), "width": width, "height": height})
+
+    def prepare(window):
+        start = time.perf_counter()
+        x0, y0, x1, y1 = window
+        tile = cv2.resize(img[y0:y1, x0:x1], (FRAME_SIZE, FRAME_SIZE))
+        return detector.enhance(tile, profile), round((time.perf_counter() - start) * 1000, 2)
+
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+        prepared = list(pool.map(prepare, windows))
+    t2 = time.perf_counter()
+    emit({"stage": "preprocess", "ms": round((t2 - t1) * 1000, 2), "profile": profile, "tiles": len(windows)})
+
+    tile_stats = []
+    global_sets = []
+    for start in range(0, len(windows), TILE_BATCH_SIZE):
+        chunk = windows[start:start + TILE_BATCH_SIZE]
+        frames = [prepared[start + k][0] for k in range(len(chunk))]
+        batch_start = time.perf_counter()
+        results = detector._infer_batch(frames)
+        per_tile_ms = (time.perf_counter() - batch_start) * 1000 / len(chunk)
+
+        for k, ((x0, y0, x1, y1), dets) in enumerate(zip(chunk, results)):
+            # Tile-input pixels → global native pixels
+            scale = np.array([(x1 - x0), (y1 - y0), (x1 - x0), (y1 - y0)], dtype=np.float32) / FRAME_SIZE
+            offset = np.array([x0, y0, x0, y0], dtype=np.float32)
+            global_sets.append(DetectionSet(np.round(dets.xyxy * scale + offset), dets.conf, dets.cls))
+            tile_stats.append({
+                "window": [x0, y0, x1, y1],
+                "preprocess_ms": prepared[start + k][1],
+                "inference_ms": round(per_tile_ms, 2),
+                "detections": len(dets),
+            })
+
+    raw = DetectionSet.concat(global_sets)
+    merged = merge_detections(raw)
+
+    # Global native pixels → shared 640x640 frame (native box kept alongside)
+    frame_scale = np.array([FRAME_SIZE / width, FRAME_SIZE / height] * 2, dtype=np.float32)
+    detections = DetectionSet(
+        np.round(merged.xyxy * frame_scale),
+        merged.conf,
+        merged.cls,
+        native_xyxy=merged.xyxy,
+    )
+    emit({
+        "stage": "inference",
+        "ms": round((time.perf_counter() - t2) * 1000, 2),
+        "detections": len(detections),
+        "raw_detections": len(raw),
+        "tiles": tile_stats,
+    })
+    return detections
@@ -0,0 +1,258 @@
+"""
+Drone video ingestion.
+
+Frames are streamed from the container with cv2.VideoCapture (FFmpeg
+backend) and never held in memory all at once:
+  1. sample   → every VIDEO_SAMPLE_EVERY_S seconds ("time"), or whenever the
+                scene changes by more than VIDEO_SCENE_THRESHOLD ("scene")
+  2. dedup    → drop frames whose dHash is within VIDEO_DEDUP_HAMMING bits
+                of the last kept frame (drone hovering)
+  3. detect   → survivors go through ConstructionDetector.detect_frames in
+                batches of VIDEO_BATCH_SIZE; blurry / badly exposed frames
+                are dropped there by the quality gate
+  4. aggregate→ detections of the same class are tracked across frames;
+                elements seen in at least VIDEO_MIN_FRAMES frames are kept
+                with their averaged box
+  5. compare  → one match_with_cad call over the aggregated elements
+
+  python -m ml.yolo.video --video walkthrough.mp4 --cad cad.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable, Iterator, List, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import cv2
+import numpy as np
+
+from ml.yolo.fusion import ElementTracker
+from ml.yolo.imageio import dhash, hamming
+
+SAMPLE_MODES = ("time", "scene")
+
+VIDEO_SAMPLE_MODE = os.getenv("VIDEO_SAMPLE_MODE", "time").lower()
+VIDEO_SAMPLE_EVERY_S = float(os.getenv("VIDEO_SAMPLE_EVERY_S", "1.0"))
+VIDEO_SCENE_THRESHOLD = float(os.getenv("VIDEO_SCENE_THRESHOLD", "30"))
+VIDEO_SCENE_STRIDE = int(os.getenv("VIDEO_SCENE_STRIDE", "5"))
+VIDEO_DEDUP_HAMMING = int(os.getenv("VIDEO_DEDUP_HAMMING", "6"))
+VIDEO_BATCH_SIZE = int(os.getenv("VIDEO_BATCH_SIZE", "8"))
+VIDEO_MAX_FRAMES = int(os.getenv("VIDEO_MAX_FRAMES", "300"))
+VIDEO_TRACK_GATE_PX = float(os.getenv("VIDEO_TRACK_GATE_PX", "30"))
+VIDEO_MIN_FRAMES = int(os.getenv("VIDEO_MIN_FRAMES", "2"))
+
+_SCENE_THUMB = (64, 36)
+
+
+def resolve_sample_mode(mode: str = None) -> str:
+    mode = (mode or VIDEO_SAMPLE_MODE).lower()
+    if mode not in SAMPLE_MODES:
+        raise ValueError(f"Unknown sample mode '{mode}'. Use one of: {', '.join(SAMPLE_MODES)}")
+    return mode
+
+
+def _scene_thumb(frame: np.ndarray) -> np.ndarray:
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, _SCENE_THUMB, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+def sample_frames(
+    path: str,
+    mode: str = None,
+    every_s: float = None,
+    scene_threshold: float = None,
+    stats: dict = None,
+) -> Iterator[Tuple[int, float, np.ndarray]]:
+    """
+    Yield (frame_index, timestamp_s, BGR frame) for sampled frames.
+    Skipped frames are only grab()bed, so they are demuxed but not
+    converted to BGR.
+    """
+    mode = resolve_sample_mode(mode)
+    every_s = every_s or VIDEO_SAMPLE_EVERY_S
+    scene_threshold = VIDEO_SCENE_THRESHOLD if scene_threshold is None else scene_threshold
+    stats = stats if stats is not None else {}
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError("Could not open video. Check format (MP4/MOV).")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    stats.update(fps=round(fps, 2), frames_read=0, frames_sampled=0)
+
+    step = max(1, int(round(every_s * fps))) if mode == "time" else max(1, VIDEO_SCENE_STRIDE)
+    last_thumb = None
+    index = -1
+    try:
+        while cap.grab():
+            index += 1
+            stats["frames_read"] += 1
+            if index % step:
+                continue
+            ok, frame = cap.retrieve()
+            if not ok:
+                continue
+            if mode == "scene":
+                thumb = _scene_thumb(frame)
+                changed = last_thumb is None or np.abs(thumb - last_thumb).mean() > scene_threshold
+                if not changed:
+                    continue
+                last_thumb = thumb
+            stats["frames_sampled"] += 1
+            yield index, index / fps, frame
+    finally:
+        cap.release()
+
+
+def deduplicate(frames: Iterator[Tuple[int, float, np.ndarray]], max_hamming: int = None, stats: dict = None):
+    """Drop frames that are perceptually identical to the last frame kept"""
+    max_hamming = VIDEO_DEDUP_HAMMING if max_hamming is None else max_hamming
+    stats = stats if stats is not None else {}
+    stats.setdefault("frames_duplicate", 0)
+    last_hash = None
+    for item in frames:
+        h = dhash(item[2])
+        if last_hash is not None and hamming(h, last_hash) <= max_hamming:
+            stats["frames_duplicate"] += 1
+            continue
+        last_hash = h
+        yield item
+
+
+def analyze_video(
+    detector,
+    path: str,
+    cad_coords: List[dict],
+    sample_mode: str = None,
+    every_s: float = None,
+    profile: str = None,
+    on_stage: Callable[[dict], None] = None,
+) -> dict:
+    """
+    Sample → dedup → batched detection → cross-frame aggregation →
+    one CAD comparison. Returns the match result plus per-stage counters.
+    """
+    emit = on_stage or (lambda event: None)
+    profile = detector.resolve_profile(profile)
+    stats = {}
+    tracker = ElementTracker(VIDEO_TRACK_GATE_PX)
+
+    t0 = time.perf_counter()
+    decode_s = 0.0
+    detect_s = 0.0
+    batches = 0
+    frames_detected = 0
+    frames_rejected = 0
+    batch = []
+
+    def flush():
+        nonlocal detect_s, batches, frames_detected, frames_rejected
+        start = time.perf_counter()
+        results = detector.detect_frames(batch, profile)
+        for dets in results:
+            tracker.add(dets)
+        detect_s += time.perf_counter() - start
+        batches += 1
+        frames_detected += len(results)
+        frames_rejected += len(batch) - len(results)
+        batch.clear()
+
+    frames = deduplicate(sample_frames(path, sample_mode, every_s, stats=stats), stats=stats)
+    mark = time.perf_counter()
+    for _, _, frame in frames:
+        decode_s += time.perf_counter() - mark
+        batch.append(frame)
+        if len(batch) >= VIDEO_BATCH_SIZE:
+            flush()
+        if frames_detected + frames_rejected + len(batch) >= VIDEO_MAX_FRAMES:
+            break
+        mark = time.perf_counter()
+    if batch:
+        flush()
+    frames.close()
+
+    emit({
+        "stage": "video_decode",
+        "ms": round(decode_s * 1000, 2),
+        "fps": stats.get("fps"),
+        "frames_read": stats.get("frames_read", 0),
+        "frames_sampled": stats.get("frames_sampled", 0),
+        "frames_duplicate": stats.get("frames_duplicate", 0),
+    })
+    emit({
+        "stage": "inference",
+        "ms": round(detect_s * 1000, 2),
+        "frames": frames_detected,
+        "frames_rejected": frames_rejected,
+        "batches": batches,
+        "profile": profile,
+    })
+
+    t1 = time.perf_counter()
+    # A short clip may only yield one usable frame — don't discard everything
+    min_frames = min(VIDEO_MIN_FRAMES, max(frames_detected, 1))
+    elements, hits = tracker.result(min_frames)
+    emit({
+        "stage": "aggregate",
+        "ms": round((time.perf_counter() - t1) * 1000, 2),
+        "tracks": len(tracker),
+        "elements": len(elements),
+    })
+
+    t2 = time.perf_counter()
+    mismatches, missing = detector.match_with_cad(elements, cad_coords)
+    emit({
+        "stage": "cad_compare",
+        "ms": round((time.perf_counter() - t2) * 1000, 2),
+        "mismatches": len(mismatches),
+        "missing": len(missing),
+    })
+
+    element_dicts = elements.to_dicts()
+    for d, n in zip(element_dicts, hits.tolist()):
+        d["frames_seen"] = n
+
+    return {
+        "elements": element_dicts,
+        "mismatches": mismatches,
+        "missing": missing,
+        "frames": {
+            "read": stats.get("frames_read", 0),
+            "sampled": stats.get("frames_sampled", 0),
+            "duplicate": stats.get("frames_duplicate", 0),
+            "detected": frames_detected,
+            "rejected": frames_rejected,
+            "batches": batches,
+        },
+        "sample_mode": resolve_sample_mode(sample_mode),
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000, 2),
+    }
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Analyze drone video against CAD coordinates")
+    parser.add_argument("--video", required=True)
+    parser.add_argument("--cad", required=True, help="JSON file with a list of CAD elements")
+    parser.add_argument("--sample-mode", choices=SAMPLE_MODES, default=None)
+    parser.add_argument("--every-s", type=float, default=None, help="seconds between samples in time mode")
+    parser.add_argument("--profile", help="preprocess profile")
+    parser.add_argument("--model", default=os.getenv("YOLO_MODEL_PATH", "ml/yolo/construction_model.pt"))
+    args = parser.parse_args(argv)
+
+    from ml.yolo.detector import ConstructionDetector
+
+    with open(args.cad) as f:
+        cad_coords = json.load(f)
+    detector = ConstructionDetector(model_path=args.model)
+    result = analyze_video(
+        detector, args.video, cad_coords, args.sample_mode, args.every_s, args.profile,
+        on_stage=lambda e: print(json.dumps(e), file=sys.stderr),
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# tests/test_cache.py
+import os
+
+from ml.yolo.cache import DetectionCache
+
+PAYLOAD = {"xyxy": [[0, 0, 10, 10]] * 20, "conf": [0.9] * 20, "cls": [0] * 20}
+
+
+def test_round_trip_through_disk_tier(tmp_path):
+    cache = DetectionCache(max_bytes=1 << 20, disk_dir=str(tmp_path))
+    cache.put("k", PAYLOAD)
+    fresh = DetectionCache(max_bytes=1 << 20, disk_dir=str(tmp_path))
+    assert fresh.get("k") == PAYLOAD
+    assert fresh.stats()["disk_hits"] == 1
+
+
+def test_disk_tier_stays_under_cap_without_scanning_every_put(tmp_path, monkeypatch):
+    cache = DetectionCache(max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=4000)
+    scans = []
+    real_scan = cache._scan_disk
+    monkeypatch.setattr(cache, "_scan_disk", lambda: scans.append(1) or real_scan())
+
+    for i in range(50):
+        cache.put(f"k{i}", PAYLOAD)
+        total = sum(os.path.getsize(tmp_path / n) for n in os.listdir(tmp_path))
+        assert total <= 4000
+        assert cache.stats()["disk_bytes"] == total
+
+    assert 0 < len(scans) < 50
+    assert cache.get("k49") == PAYLOAD
@@ -0,0 +1,34 @@
+# tests/test_imageio.py
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from ml.yolo.imageio import check_pixel_budget, decode_for_target, read_dimensions
+
+
+def _encode(ext, w=120, h=80):
+    ok, buf = cv2.imencode(ext, np.full((h, w, 3), 127, dtype=np.uint8))
+    assert ok
+    return buf.tobytes()
+
+
+@pytest.mark.parametrize("ext", [".jpg", ".png"])
+def test_header_dimensions(ext):
+    assert read_dimensions(_encode(ext)) == (120, 80)
+
+
+@pytest.mark.parametrize("ext", [".bmp", ".tiff"])
+def test_other_formats_cannot_bypass_the_pixel_budget(ext):
+    with pytest.raises(ValueError):
+        decode_for_target(_encode(ext), max_pixels=1000)
+
+
+def test_unreadable_header_is_rejected():
+    with pytest.raises(ValueError):
+        check_pixel_budget(b"not an image at all")
+
+
+def test_other_formats_within_budget_decode_with_pillow():
+    pytest.importorskip("PIL")
+    assert decode_for_target(_encode(".bmp")).shape == (80, 120, 3)
@@ -0,0 +1,38 @@
+# tests/test_inference_pool.py
+import asyncio
+import os
+
+from backend.utils.inference_pool import InferencePool
+
+
+def _marker() -> str:
+    return os.path.join(os.environ["WORKER_MARKER_DIR"], str(os.getpid()))
+
+
+def _mark_warm():
+    open(_marker(), "w").close()
+
+
+def _is_warm() -> bool:
+    return os.path.exists(_marker())
+
+
+def test_process_workers_run_initializer_before_ready(tmp_path, monkeypatch):
+    # Worker processes inherit the environment
+    monkeypatch.setenv("WORKER_MARKER_DIR", str(tmp_path))
+    pool = InferencePool(kind="process", max_workers=2, initializer=_mark_warm)
+    try:
+        assert pool.start_workers(timeout_s=60) == 2
+        assert len(os.listdir(tmp_path)) == 2
+        assert pool.stats()["workers_ready"] == 2
+
+        async def run():
+            return await asyncio.gather(*(pool.run(_is_warm) for _ in range(4)))
+
+        assert all(warm for warm, _ in asyncio.run(run()))
+    finally:
+        pool.shutdown()
+
+
+def test_thread_pool_start_workers_is_a_no_op():
+    assert InferencePool(kind="thread", max_workers=2).start_workers() == 0
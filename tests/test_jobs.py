@@ -0,0 +1,46 @@
+# tests/test_jobs.py
+import json
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+
+
+def _flat_photo() -> bytes:
+    # A uniform frame has no edges at all: the quality gate rejects it as blurry
+    _, buf = cv2.imencode(".jpg", np.full((640, 640, 3), 128, dtype=np.uint8))
+    return buf.tobytes()
+
+
+def test_quality_rejection_in_a_job_carries_the_reason_codes():
+    cad = [{"object_type": "Pillar", "x": 100, "y": 100, "width": 40, "height": 80}]
+    with TestClient(app) as client:
+        resp = client.post(
+            "/api/v1/jobs",
+            files={"site_photo": ("photo.jpg", _flat_photo(), "image/jpeg")},
+            data={"cad_data": json.dumps(cad), "site_name": "Test site"},
+        )
+        assert resp.status_code == 202
+        status_url = resp.json()["status_url"]
+
+        deadline = time.time() + 30
+        job = client.get(status_url).json()
+        while job["status"] not in ("done", "failed") and time.time() < deadline:
+            time.sleep(0.1)
+            job = client.get(status_url).json()
+
+        # Let the background model load finish so it is not killed mid-load at exit
+        while client.get("/ready").json()["stage"] not in ("ready", "failed") and time.time() < deadline:
+            time.sleep(0.1)
+
+    assert job["status"] == "failed"
+    assert "blurry" in job["error"]["reason_codes"]
+    assert "blur_score" in job["error"]["quality"]
@@ -0,0 +1,114 @@
+# tests/test_matching.py
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ml.yolo.detections import DetectionSet
+
+
+@pytest.fixture
+def detector():
+    pytest.importorskip("cv2")
+    from ml.yolo.detector import ConstructionDetector
+    return ConstructionDetector(lazy=True)
+
+
+def _dets(boxes, types):
+    from ml.yolo.detections import class_id
+    return DetectionSet(np.array(boxes), np.full(len(boxes), 0.9), np.array([class_id(t) for t in types]))
+
+
+def test_fractional_cad_is_rounded_at_the_response_boundary(detector):
+    dets = _dets([[90, 90, 110, 110]], ["Pillar"])
+    cad = [
+        {"object_type": "Pillar", "x": 100.4, "y": 130.6, "width": 20, "height": 20},
+        {"object_type": "Beam", "x": 300.5, "y": 300.5, "width": 40.5, "height": 10},
+    ]
+    mismatches, missing = detector.match_with_cad(dets, cad)
+
+    m = mismatches[0]
+    assert (m["expected_x"], m["expected_y"]) == (100, 131)
+    assert all(isinstance(m[k], int) for k in ("expected_x", "expected_y", "delta_x", "delta_y"))
+    # Offset measured against the unrounded CAD point
+    assert m["offset_inches"] == round(np.hypot(0.4, 30.6) * 0.166, 2)
+    assert isinstance(missing[0]["expected_x"], int) and isinstance(missing[0]["width"], int)
+
+    # Drawing takes the rounded points without cv2 errors
+    import cv2
+    _, buf = cv2.imencode(".jpg", np.full((640, 640, 3), 128, dtype=np.uint8))
+    assert detector.draw_detections(buf.tobytes(), mismatches, missing)
+
+
+def _brute_force_cost(dist, gate):
+    """Best total distance among assignments that match as many gated pairs as possible"""
+    import itertools
+    if dist.shape[0] > dist.shape[1]:
+        dist = dist.T
+    n, m = dist.shape
+    best = (0, 0.0)
+    for perm in itertools.permutations(range(m), n):
+        pairs = [(i, j) for i, j in enumerate(perm) if dist[i, j] <= gate]
+        key = (len(pairs), -sum(dist[i, j] for i, j in pairs))
+        best = max(best, key)
+    return best[0], -best[1]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_hungarian_assignment_is_optimal(seed):
+    pytest.importorskip("scipy")
+    from ml.yolo.matching import assign, distance_matrix
+
+    rng = np.random.default_rng(seed)
+    det = rng.uniform(0, 640, size=(rng.integers(1, 6), 2))
+    cad = rng.uniform(0, 640, size=(rng.integers(1, 6), 2))
+    pairs = assign(det, cad, gate=250, method="hungarian")
+
+    dist = distance_matrix(det, cad)
+    assert len({i for i, _ in pairs}) == len({j for _, j in pairs}) == len(pairs)
+    count, cost = _brute_force_cost(dist, 250)
+    assert len(pairs) == count
+    assert sum(dist[i, j] for i, j in pairs) == pytest.approx(cost)
+
+
+@pytest.mark.parametrize("method", ["hungarian", "greedy"])
+def test_assignment_is_gated_and_one_to_one(method):
+    from ml.yolo.matching import assign
+
+    det = np.array([[0, 0], [10, 0], [500, 500]])
+    cad = np.array([[5, 0], [300, 300]])
+    pairs = assign(det, cad, gate=50, method=method)
+
+    assert len(pairs) == 1 and pairs[0][1] == 0
+    assert assign(det, np.zeros((0, 2)), gate=50, method=method) == []
+
+
+def test_greedy_takes_the_globally_nearest_pair_first():
+    from ml.yolo.matching import assign
+
+    det = np.array([[0, 0], [12, 0]])
+    cad = np.array([[10, 0], [-20, 0]])
+    assert sorted(assign(det, cad, gate=100, method="greedy")) == [(0, 1), (1, 0)]
+
+
+def test_match_by_class_keeps_classes_apart_and_ignores_case():
+    from ml.yolo.matching import match_by_class
+
+    det_xy = np.array([[100, 100], [102, 100], [400, 400]])
+    cad_xy = np.array([[101, 100], [400, 401], [900, 900]])
+    det_to_cad, cad_matched = match_by_class(
+        ["Pillar", "beam", "Wall"], det_xy, ["pillar", "Wall", "Beam"], cad_xy, gate=50,
+    )
+
+    assert det_to_cad.tolist() == [0, -1, 1]
+    assert cad_matched.tolist() == [True, True, False]
+
+
+@pytest.mark.parametrize("method", ["hungarian", "greedy"])
+def test_fractional_cad_points_are_not_truncated(method):
+    from ml.yolo.matching import match_by_class
+
+    # Truncating to int64 would put both CAD points at x=10 and tie them
+    det_xy = np.array([[10, 0], [11, 0]])
+    cad_xy = np.array([[10.9, 0.0], [10.2, 0.0]])
+    det_to_cad, _ = match_by_class(["Pillar"] * 2, det_xy, ["Pillar"] * 2, cad_xy, gate=5, method=method)
+    assert det_to_cad.tolist() == [1, 0]
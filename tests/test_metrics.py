@@ -0,0 +1,19 @@
+# tests/test_metrics.py
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+
+
+def test_unmatched_paths_share_one_route_label():
+    client = TestClient(app)
+    for path in ("/wp-login.php", "/.env", "/api/v1/nope/123"):
+        assert client.get(path).status_code == 404
+
+    body = client.get("/metrics").text
+    assert 'route="<unmatched>"' in body
+    assert "wp-login" not in body and "/api/v1/nope" not in body
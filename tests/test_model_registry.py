@@ -0,0 +1,32 @@
+# tests/test_model_registry.py
+import os
+
+import pytest
+
+from backend.utils.model_registry import ModelRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    models = tmp_path / "models"
+    models.mkdir()
+    (models / "v2.pt").write_bytes(b"weights")
+    return ModelRegistry(lambda path: object(), default_path="default.pt", model_dir=str(models))
+
+
+def test_path_inside_model_dir_is_allowed(registry):
+    path = os.path.join(registry.model_dir, "v2.pt")
+    assert registry.allowed_path(path) == path
+
+
+def test_path_outside_model_dir_is_refused(registry, tmp_path):
+    (tmp_path / "elsewhere.pt").write_bytes(b"weights")
+    with pytest.raises(PermissionError):
+        registry.allowed_path(str(tmp_path / "elsewhere.pt"))
+    with pytest.raises(PermissionError):
+        registry.allowed_path(os.path.join(registry.model_dir, "..", "elsewhere.pt"))
+
+
+def test_missing_file_inside_model_dir(registry):
+    with pytest.raises(FileNotFoundError):
+        registry.allowed_path(os.path.join(registry.model_dir, "v3.pt"))
@@ -0,0 +1,144 @@
+# tests/test_pathfinding.py
+import random
+from collections import deque
+
+import pytest
+
+from ml.astar.pathfinder import create_pathfinder
+
+ENGINES = ["array", "jps"]
+
+
+def _random_grid(seed, cols, rows, density=0.3):
+    rng = random.Random(seed)
+    return {(c, r) for c in range(cols) for r in range(rows) if rng.random() < density}
+
+
+def _bfs_cells(blocked, cols, rows, start, end):
+    """Cells on a shortest 4-connected route (the start cell is not checked), or None"""
+    if not (0 <= end[0] < cols and 0 <= end[1] < rows) or end in blocked:
+        return None
+    dist = {start: 1}
+    queue = deque([start])
+    while queue:
+        col, row = queue.popleft()
+        if (col, row) == end:
+            return dist[end]
+        for nxt in ((col + 1, row), (col - 1, row), (col, row + 1), (col, row - 1)):
+            if nxt not in dist and nxt not in blocked and 0 <= nxt[0] < cols and 0 <= nxt[1] < rows:
+                dist[nxt] = dist[(col, row)] + 1
+                queue.append(nxt)
+    return None
+
+
+def _assert_valid_route(path, blocked, start, end):
+    cells = [(p["col"], p["row"]) for p in path]
+    assert cells[0] == start and cells[-1] == end
+    assert not blocked & set(cells[1:])
+    for (c0, r0), (c1, r1) in zip(cells, cells[1:]):
+        assert abs(c0 - c1) + abs(r0 - r1) == 1
+
+
+def _planner(engine, blocked, cols, rows):
+    pf = create_pathfinder(cols, rows, engine)
+    pf.set_obstacles_from_list([{"col": c, "row": r} for c, r in blocked])
+    return pf
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("seed", range(25))
+def test_matches_bfs_on_random_grids(engine, seed):
+    rng = random.Random(1000 + seed)
+    cols, rows = rng.randint(2, 30), rng.randint(2, 30)
+    blocked = _random_grid(seed, cols, rows)
+    pf = _planner(engine, blocked, cols, rows)
+
+    for _ in range(5):
+        start = (rng.randrange(cols), rng.randrange(rows))
+        end = (rng.randrange(cols), rng.randrange(rows))
+        expected = _bfs_cells(blocked, cols, rows, start, end)
+        result = pf.find_path(*start, *end)
+
+        if expected is None:
+            assert not result["success"] and result["path"] == []
+        else:
+            assert result["success"], (start, end)
+            assert result["path_length"] == expected
+            _assert_valid_route(result["path"], blocked, start, end)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_start_equals_end(engine):
+    result = create_pathfinder(10, 10, engine).find_path(4, 4, 4, 4)
+    assert result["success"]
+    assert result["path"] == [{"col": 4, "row": 4}]
+    assert result["path_length"] == 1
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_blocked_or_walled_off_goal_has_no_path(engine):
+    wall = {(5, r) for r in range(10)}
+    pf = _planner(engine, wall | {(2, 2)}, 10, 10)
+
+    assert not pf.find_path(0, 0, 2, 2)["success"]
+    assert not pf.find_path(0, 0, 9, 9)["success"]
+    assert not pf.find_path(0, 0, 10, 0)["success"]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_agrees_with_classic_engine_on_blocked_start(engine):
+    blocked = {(0, 0), (1, 1)}
+    expected = _planner("classic", blocked, 6, 6).find_path(0, 0, 5, 5)
+    result = _planner(engine, blocked, 6, 6).find_path(0, 0, 5, 5)
+    assert result["success"] == expected["success"]
+    assert result["path_length"] == expected["path_length"]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_incremental_replan_matches_bfs_as_obstacles_change(seed):
+    from ml.astar.incremental import replan
+
+    rng = random.Random(2000 + seed)
+    cols, rows = rng.randint(5, 25), rng.randint(5, 25)
+    start, end = (0, rng.randrange(rows)), (cols - 1, rng.randrange(rows))
+    blocked = _random_grid(seed, cols, rows, density=0.25) - {start, end}
+    state = None
+
+    for step in range(6):
+        if step:
+            flips = {(rng.randrange(cols), rng.randrange(rows)) for _ in range(rng.randint(1, 8))} - {start, end}
+            added, removed = flips - blocked, flips & blocked
+            blocked = (blocked | added) - removed
+        else:
+            added, removed = blocked, set()
+        result, state = replan(
+            state, cols, rows,
+            {"col": start[0], "row": start[1]}, {"col": end[0], "row": end[1]},
+            added=[{"col": c, "row": r} for c, r in added],
+            removed=[{"col": c, "row": r} for c, r in removed],
+        )
+
+        expected = _bfs_cells(blocked, cols, rows, start, end)
+        assert result["resumed"] == (step > 0)
+        if expected is None:
+            assert not result["success"]
+        else:
+            assert result["success"] and result["path_length"] == expected
+            _assert_valid_route(result["path"], blocked, start, end)
+
+
+def test_incremental_replan_edge_cases():
+    from ml.astar.incremental import replan
+
+    here = {"col": 3, "row": 3}
+    result, _ = replan(None, 8, 8, here, here)
+    assert result["success"] and result["path"] == [here]
+
+    corner = {"col": 7, "row": 7}
+    result, state = replan(None, 8, 8, here, corner, obstacle_nodes=[corner])
+    assert not result["success"]
+    result, _ = replan(state, 8, 8, here, corner, removed=[corner])
+    assert result["success"] and result["path_length"] == 9
+
+    result, _ = replan(None, 8, 8, here, {"col": 8, "row": 0})
+    assert not result["success"]
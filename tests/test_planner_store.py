@@ -0,0 +1,58 @@
+# tests/test_planner_store.py
+import asyncio
+
+from backend.utils.planner_store import PlannerStore
+
+
+def test_state_written_by_another_worker_is_read_from_disk(tmp_path):
+    a = PlannerStore(max_routes=10, state_dir=str(tmp_path))
+    b = PlannerStore(max_routes=10, state_dir=str(tmp_path))
+    a.put("Site A", "r1", {"plans": 1})
+    assert b.get("Site A", "r1") == {"plans": 1}
+
+    b.put("Site A", "r1", {"plans": 2, "pad": "x"})
+    assert a.get("Site A", "r1") == {"plans": 2, "pad": "x"}
+
+    asyncio.run(b.delete("Site A", "r1"))
+    assert a.get("Site A", "r1") is None
+
+
+def test_locks_only_live_while_in_use():
+    async def run():
+        store = PlannerStore(max_routes=2, state_dir="")
+        for route in ("r1", "r2", "r3"):
+            async with store.lock("Site A", route):
+                assert ("Site A", route) in store._locks
+                store.put("Site A", route, {"route": route})
+        return store
+
+    store = asyncio.run(run())
+    assert len(store) == 2
+    assert store._locks == {}
+    assert store.get("Site A", "r1") is None
+
+
+def test_delete_waits_for_running_replan(tmp_path):
+    store = PlannerStore(max_routes=10, state_dir=str(tmp_path))
+    events = []
+
+    async def replan():
+        async with store.lock("Site A", "r1"):
+            events.append("replan start")
+            await asyncio.sleep(0.05)
+            store.put("Site A", "r1", {"plans": 1})
+            events.append("replan end")
+
+    async def delete():
+        await asyncio.sleep(0.01)
+        events.append("delete called")
+        assert await store.delete("Site A", "r1")
+        events.append("deleted")
+
+    async def run():
+        await asyncio.gather(replan(), delete())
+
+    asyncio.run(run())
+    assert events == ["replan start", "delete called", "replan end", "deleted"]
+    assert store.get("Site A", "r1") is None
+    assert store._locks == {}
@@ -0,0 +1,30 @@
+# tests/test_quality.py
+import pickle
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from ml.yolo.quality import ImageQualityError, QualityGate
+
+
+def _frame(seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(40, 200, size=(640, 640, 3), dtype=np.uint8)
+
+
+def test_duplicate_only_reused_for_same_variant():
+    gate = QualityGate(enabled=True)
+    frame = _frame()
+    first = gate.check(frame, "Site A", "variant-a")
+    gate.remember("Site A", first["hash"], {"dets": 1}, "variant-a")
+
+    assert gate.check(frame, "Site A", "variant-a")["duplicate_of"] == {"dets": 1}
+    assert gate.check(frame, "Site A", "variant-b")["duplicate_of"] is None
+    assert gate.check(frame, "Site A")["duplicate_of"] is None
+
+
+def test_quality_error_survives_pickling():
+    error = ImageQualityError({"reasons": ["blurry"], "image_index": 2})
+    assert pickle.loads(pickle.dumps(error)).report["image_index"] == 2
@@ -0,0 +1,97 @@
+# tests/test_report_writer.py
+import json
+
+import pytest
+
+pytest.importorskip("supabase")
+
+from backend.utils.report_writer import ReportWriter
+
+
+class RejectedRow(Exception):
+    code = "23502"  # not_null_violation
+
+
+def _writer(tmp_path, insert_fn):
+    return ReportWriter(
+        batch_size=10,
+        spool_path=str(tmp_path / "spool.jsonl"),
+        dead_letter_path=str(tmp_path / "dead.jsonl"),
+        insert_fn=insert_fn,
+    )
+
+
+def test_rejected_row_is_dead_lettered_and_rest_written(tmp_path):
+    inserted = []
+
+    def insert(rows):
+        if any(r.get("bad") for r in rows):
+            raise RejectedRow("null value in column")
+        inserted.extend(rows)
+
+    writer = _writer(tmp_path, insert)
+    writer._flush([{"n": 1}, {"n": 2, "bad": True}, {"n": 3}])
+
+    assert [r["n"] for r in inserted] == [1, 3]
+    dead = [json.loads(line) for line in open(tmp_path / "dead.jsonl")]
+    assert [d["row"]["n"] for d in dead] == [2]
+    assert not (tmp_path / "spool.jsonl").exists()
+    assert writer.stats()["dead_lettered"] == 1
+
+
+def test_spool_replay_skips_rejected_rows(tmp_path):
+    inserted = []
+    down = True
+
+    def insert(rows):
+        if down:
+            raise ConnectionError("store unreachable")
+        if any(r.get("bad") for r in rows):
+            raise RejectedRow("null value in column")
+        inserted.extend(rows)
+
+    writer = _writer(tmp_path, insert)
+    writer._flush([{"n": 1}, {"n": 2, "bad": True}])
+    assert (tmp_path / "spool.jsonl").exists()
+
+    down = False
+    writer._retry_at = 0.0
+    writer._flush([{"n": 3}])
+
+    assert [r["n"] for r in inserted] == [1, 3]
+    assert not (tmp_path / "spool.jsonl").exists()
+
+
+class StoreDown(Exception):
+    pass
+
+
+def test_temporary_error_after_bisect_spools_only_unwritten_tail(tmp_path):
+    inserted = []
+    calls = {"n": 0}
+
+    def insert(rows):
+        calls["n"] += 1
+        if any(r.get("bad") for r in rows):
+            raise RejectedRow("null value in column")
+        if rows[0]["n"] >= 3:
+            raise StoreDown("connection reset")
+        inserted.extend(rows)
+
+    writer = _writer(tmp_path, insert)
+    writer._flush([{"n": 1}, {"n": 2, "bad": True}, {"n": 3}, {"n": 4}])
+
+    assert [r["n"] for r in inserted] == [1]
+    spooled = [json.loads(line) for line in open(tmp_path / "spool.jsonl")]
+    assert [r["n"] for r in spooled] == [3, 4]
+    assert writer.stats()["dead_lettered"] == 1
+
+    # Replay hits the same pattern inside one spooled chunk
+    writer._retry_at = 0.0
+    with open(tmp_path / "spool.jsonl", "w") as f:
+        for row in ({"n": 0}, {"n": 2, "bad": True}, {"n": 5}):
+            f.write(json.dumps(row) + "\n")
+    writer._flush([])
+    assert [r["n"] for r in inserted] == [1, 0]
+    spooled = [json.loads(line) for line in open(tmp_path / "spool.jsonl")]
+    assert [r["n"] for r in spooled] == [5]
@@ -0,0 +1,58 @@
+# tests/test_router.py
+import pytest
+
+from ml.astar.router import ROUTER_MAX_ITERATIONS, ROUTER_MAX_NETS, route_nets
+
+
+def _net(start, end, **extra):
+    return {"start": {"col": start[0], "row": start[1]}, "end": {"col": end[0], "row": end[1]}, **extra}
+
+
+def _wall_with_gap(col, gap_rows, rows=20):
+    return [{"col": col, "row": r} for r in range(rows) if r not in gap_rows]
+
+
+def test_three_nets_share_three_cell_gap():
+    """20x20 floor, wall at col 10 with a 3-cell gap: all three nets must squeeze through"""
+    nets = [_net((2, 8), (19, 5)), _net((4, 9), (18, 10)), _net((7, 15), (12, 0))]
+    result = route_nets(nets, _wall_with_gap(10, (5, 6, 7)), 20, 20)
+
+    assert result["success"], result["message"]
+    assert result["iterations"] <= ROUTER_MAX_ITERATIONS
+    assert result["overused_cells"] == 0
+    cells = [(p["col"], p["row"]) for net in result["nets"] for p in net["path"]]
+    assert len(cells) == len(set(cells))
+    gap = {(10, 5), (10, 6), (10, 7)}
+    assert all(gap & {(p["col"], p["row"]) for p in net["path"]} for net in result["nets"])
+
+
+def test_priority_zero_is_rejected():
+    with pytest.raises(ValueError):
+        route_nets([_net((0, 0), (5, 5), priority=0)], cols=10, rows=10)
+
+
+def test_width_zero_is_rejected():
+    with pytest.raises(ValueError):
+        route_nets([_net((0, 0), (5, 5), width=0)], cols=10, rows=10)
+
+
+def test_net_count_is_capped():
+    nets = [_net((0, r % 10), (9, r % 10)) for r in range(ROUTER_MAX_NETS + 1)]
+    with pytest.raises(ValueError):
+        route_nets(nets, cols=10, rows=10)
+
+
+@pytest.mark.parametrize("max_iterations", [0, -3])
+def test_max_iterations_below_one_is_rejected(max_iterations):
+    with pytest.raises(ValueError):
+        route_nets([_net((0, 0), (5, 5))], cols=10, rows=10, max_iterations=max_iterations)
+
+
+def test_batch_request_bounds_max_iterations():
+    pydantic = pytest.importorskip("pydantic")
+    from backend.models.schemas import BatchPathfindRequest
+
+    net = {"start": {"col": 0, "row": 0}, "end": {"col": 1, "row": 1}}
+    with pytest.raises(pydantic.ValidationError):
+        BatchPathfindRequest(nets=[net], max_iterations=-1)
+    assert BatchPathfindRequest(nets=[net]).max_iterations is None
@@ -0,0 +1,29 @@
+# tests/test_schemas.py
+import pytest
+
+pydantic = pytest.importorskip("pydantic")
+
+from backend.models.schemas import (
+    GRID_MAX_SIDE, BatchPathfindRequest, IncrementalPathfindRequest, PathfindRequest,
+)
+
+NODE = {"col": 0, "row": 0}
+
+
+@pytest.mark.parametrize("cols, rows", [(-1, 10), (0, 10), (20, 0), (GRID_MAX_SIDE + 1, 10)])
+def test_incremental_grid_size_is_bounded(cols, rows):
+    with pytest.raises(pydantic.ValidationError):
+        IncrementalPathfindRequest(site_name="A", grid_cols=cols, grid_rows=rows, start=NODE, end=NODE)
+
+
+@pytest.mark.parametrize("cols, rows", [(0, 0), (-5, 10), (GRID_MAX_SIDE + 1, 10)])
+def test_pathfind_grid_size_is_bounded(cols, rows):
+    with pytest.raises(pydantic.ValidationError):
+        PathfindRequest(grid_cols=cols, grid_rows=rows, obstacle_nodes=[], start=NODE, end=NODE)
+    with pytest.raises(pydantic.ValidationError):
+        BatchPathfindRequest(grid_cols=cols, grid_rows=rows, nets=[{"start": NODE, "end": NODE}])
+
+
+def test_grid_at_the_cap_is_accepted():
+    req = PathfindRequest(grid_cols=GRID_MAX_SIDE, grid_rows=1, obstacle_nodes=[], start=NODE, end=NODE)
+    assert req.grid_cols == GRID_MAX_SIDE
@@ -0,0 +1,28 @@
+# tests/test_session.py
+from ml.astar.session import reroute_mismatches
+
+
+def _error(x, y):
+    return {"detected_x": x, "detected_y": y, "is_error": True}
+
+
+def test_single_error_routes_on_combined_grid():
+    (m,) = reroute_mismatches([_error(320, 64)])
+    assert m["reroute"]["success"]
+    assert m["reroute"]["scope"] == "combined"
+    assert not m["reroute"]["blocked_by_combined"]
+
+
+def test_disconnecting_footprints_fall_back_to_per_element_routes():
+    # Three pillars across the 10-row floor wall off left from right together
+    events = []
+    mismatches = [_error(320, 64), _error(320, 320), _error(320, 576), {"detected_x": 0, "detected_y": 0, "is_error": False}]
+    results = reroute_mismatches(mismatches, emit=events.append)
+
+    for m in results[:3]:
+        assert m["reroute"]["success"]
+        assert m["reroute"]["scope"] == "element"
+        assert m["reroute"]["blocked_by_combined"]
+        assert m["reroute"]["path_length"] > 0
+    assert results[3]["reroute"] is None
+    assert events[0]["fallback"] == 3
@@ -0,0 +1,86 @@
+# tests/test_synthetic.py
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from ml.yolo.synthetic import (
+    CORRECT_MAX_PX, ERROR_MIN_PX, FRAME_SIZE,
+    generate_layout, generate_scene, read_tag, render_scene, scene_for_image,
+)
+
+
+def _same_scene(a, b):
+    return (
+        a["cad"] == b["cad"]
+        and np.array_equal(a["truth"].xyxy, b["truth"].xyxy)
+        and np.array_equal(a["truth"].conf, b["truth"].conf)
+        and np.array_equal(a["truth"].cls, b["truth"].cls)
+        and np.array_equal(a["cad_index"], b["cad_index"])
+    )
+
+
+def _offsets(scene):
+    """Distance of each built element from its CAD point, skipping extras and clipped centres"""
+    truth, cad = scene["truth"], scene["cad"]
+    centers = (truth.xyxy[:, :2] + truth.xyxy[:, 2:]) / 2
+    out = []
+    for (cx, cy), idx in zip(centers.tolist(), scene["cad_index"].tolist()):
+        if idx >= 0 and 1 < cx < FRAME_SIZE - 2 and 1 < cy < FRAME_SIZE - 2:
+            out.append(np.hypot(cx - cad[idx]["x"], cy - cad[idx]["y"]))
+    return np.array(out)
+
+
+def test_same_seed_gives_the_same_scene():
+    kwargs = dict(elements=60, error_rate=0.4, missing_rate=0.1, extra_rate=0.1)
+    assert _same_scene(generate_scene(7, **kwargs), generate_scene(7, **kwargs))
+    assert not _same_scene(generate_scene(7, **kwargs), generate_scene(8, **kwargs))
+
+
+def test_layout_elements_fit_the_frame_without_overlapping():
+    cad = generate_layout(3, 50)
+    assert len(cad) == 50
+    boxes = np.array([[c["x"] - c["width"] / 2, c["y"] - c["height"] / 2,
+                       c["x"] + c["width"] / 2, c["y"] + c["height"] / 2] for c in cad])
+    assert boxes.min() >= 0 and boxes.max() <= FRAME_SIZE
+    for i in range(len(boxes)):
+        for j in range(i + 1, len(boxes)):
+            a, b = boxes[i], boxes[j]
+            assert a[2] <= b[0] or b[2] <= a[0] or a[3] <= b[1] or b[3] <= a[1]
+
+
+def test_error_rate_separates_error_and_correct_offsets():
+    correct = _offsets(generate_scene(11, elements=100, error_rate=0.0))
+    errors = _offsets(generate_scene(11, elements=100, error_rate=1.0))
+    # Box corners are rounded, so centres move by up to half a pixel per axis
+    assert correct.max() <= CORRECT_MAX_PX + 1
+    assert errors.min() >= ERROR_MIN_PX - 1
+
+
+def test_missing_and_extra_elements():
+    assert len(generate_scene(5, elements=40, missing_rate=1.0)["truth"]) == 0
+
+    scene = generate_scene(5, elements=40, extra_rate=0.5)
+    extras = scene["cad_index"] == -1
+    assert extras.any()
+    assert len(scene["truth"]) == 40 + extras.sum()
+
+
+def test_rendered_scene_round_trips_through_its_tag():
+    scene = generate_scene(21, elements=12, error_rate=0.5)
+    data = render_scene(scene, size=(960, 720))
+
+    assert read_tag(data) == scene["params"]
+    assert _same_scene(scene_for_image(data), scene)
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    assert img.shape == (720, 960, 3)
+
+
+def test_untagged_image_gets_a_stable_scene():
+    _, buf = cv2.imencode(".jpg", np.full((64, 64, 3), 90, dtype=np.uint8))
+    data = buf.tobytes()
+
+    assert read_tag(data) is None
+    first = scene_for_image(data, default_elements=4)
+    assert len(first["cad"]) == 4
+    assert _same_scene(first, scene_for_image(data, default_elements=4))
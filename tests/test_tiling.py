@@ -0,0 +1,90 @@
+# tests/test_tiling.py
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from ml.yolo.detections import DetectionSet, class_id
+from ml.yolo.tiling import FRAME_SIZE, detect_tiled, make_tiles, merge_detections, nms
+
+
+@pytest.mark.parametrize("width,height", [(640, 640), (2000, 1200), (1281, 700), (4032, 3024)])
+def test_tiles_cover_the_image_with_overlap(width, height):
+    tiles = make_tiles(width, height, tile=640, overlap=0.2)
+    covered = np.zeros((height, width), dtype=bool)
+    for x0, y0, x1, y1 in tiles:
+        assert 0 <= x0 < x1 <= width and 0 <= y0 < y1 <= height
+        assert x1 - x0 == min(640, width) and y1 - y0 == min(640, height)
+        covered[y0:y1, x0:x1] = True
+    assert covered.all()
+
+    xs = sorted({x0 for x0, _, _, _ in tiles})
+    assert all(b - a <= 640 * 0.8 for a, b in zip(xs, xs[1:]))
+
+
+def test_image_smaller_than_a_tile_is_one_window():
+    assert make_tiles(300, 200, tile=640) == [(0, 0, 300, 200)]
+
+
+def test_nms_keeps_the_best_of_overlapping_boxes():
+    boxes = np.array([[0, 0, 100, 100], [5, 5, 105, 105], [200, 200, 260, 260]], dtype=np.float32)
+    scores = np.array([0.6, 0.9, 0.5], dtype=np.float32)
+    assert sorted(nms(boxes, scores, 0.5).tolist()) == [1, 2]
+    assert nms(np.zeros((0, 4)), np.zeros(0), 0.5).tolist() == []
+
+
+def test_merge_only_suppresses_within_a_class():
+    dets = DetectionSet(
+        [[0, 0, 100, 100], [2, 2, 102, 102], [1, 1, 101, 101]],
+        [0.9, 0.8, 0.7],
+        [class_id("Pillar"), class_id("Pillar"), class_id("Beam")],
+    )
+    merged = merge_detections(dets, 0.5)
+    assert merged.conf.tolist() == pytest.approx([0.9, 0.7])
+    assert merged.cls.tolist() == [class_id("Pillar"), class_id("Beam")]
+
+
+class _BrightBoxDetector:
+    """Reports the bright rectangle in each tile when it lies fully inside the tile"""
+
+    def __init__(self):
+        self.tiles_seen = 0
+
+    def enhance(self, img, profile=None):
+        return img
+
+    def _infer_batch(self, frames):
+        out = []
+        for frame in frames:
+            self.tiles_seen += 1
+            ys, xs = np.nonzero(frame[:, :, 0] > 200)
+            inside = len(xs) and xs.min() > 0 and ys.min() > 0 and xs.max() < FRAME_SIZE - 1 and ys.max() < FRAME_SIZE - 1
+            if not inside:
+                out.append(DetectionSet.empty())
+                continue
+            box = [xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]
+            out.append(DetectionSet([box], [0.9], [class_id("Column")]))
+        return out
+
+
+def test_detect_tiled_maps_tiles_back_to_one_global_box():
+    width, height = 2000, 1200
+    img = np.full((height, width, 3), 60, dtype=np.uint8)
+    img[570:630, 1060:1140] = 255
+    _, buf = cv2.imencode(".png", img)
+
+    detector = _BrightBoxDetector()
+    events = []
+    dets = detect_tiled(detector, buf.tobytes(), on_stage=events.append, tile_size=640, overlap=0.2)
+
+    tiles = make_tiles(width, height, 640, 0.2)
+    assert detector.tiles_seen == len(tiles)
+    assert len(dets) == 1
+    assert dets.native_xyxy[0].tolist() == [1060, 570, 1140, 630]
+    expected = np.round(np.array([1060, 570, 1140, 630]) * np.array([FRAME_SIZE / width, FRAME_SIZE / height] * 2))
+    assert dets.xyxy[0].tolist() == expected.tolist()
+
+    inference = events[-1]
+    assert inference["stage"] == "inference"
+    assert inference["raw_detections"] == 6  # the box sits whole in six overlapping tiles
+    assert len(inference["tiles"]) == len(tiles)